@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
+import utils  # noqa: F401 - puts the shared scripts package on sys.path
+from scripts.aggregates import AggregateStore
+from scripts.figures import subplots
+from scripts.ranking import METRIC_LABELS, RANKING_COLUMNS, rank_stations
+from scripts.time_index import parse_timestamps
 
 # Header
 st.title("Solar Energy Analysis")
@@ -19,28 +23,26 @@ for i, location in enumerate(locations):
 
 # Check if all files have been uploaded
 if all(file is not None for file in uploaded_files.values()):
-    # Load the data
-    dataframes = {}
+    # Load the data and reduce it to daily rollups
+    aggregates = {}
+    frames = {}
     for location, file in uploaded_files.items():
-        dataframes[location] = pd.read_csv(file)
+        df = pd.read_csv(file, usecols=lambda col: col in ['Timestamp'] + RANKING_COLUMNS)
+        df.index = parse_timestamps(df.pop('Timestamp'))
+        frames[location] = df
+        aggregates[location] = AggregateStore.from_frame(df, ['GHI', 'DNI', 'DHI'])
 
     # Calculate mean and standard deviation for GHI, DNI, and DHI for each location
     stats = {}
-    for location, df in dataframes.items():
-        ghi_mean = df['GHI'].mean()
-        dni_mean = df['DNI'].mean()
-        dhi_mean = df['DHI'].mean()
-        ghi_std = df['GHI'].std()
-        dni_std = df['DNI'].std()
-        dhi_std = df['DHI'].std()
-        
+    for location, store in aggregates.items():
+        location_stats = store.stats()
         stats[location] = {
-            'GHI Mean': ghi_mean,
-            'GHI StdDev': ghi_std,
-            'DNI Mean': dni_mean,
-            'DNI StdDev': dni_std,
-            'DHI Mean': dhi_mean,
-            'DHI StdDev': dhi_std
+            'GHI Mean': location_stats.loc['mean', 'GHI'],
+            'GHI StdDev': location_stats.loc['std', 'GHI'],
+            'DNI Mean': location_stats.loc['mean', 'DNI'],
+            'DNI StdDev': location_stats.loc['std', 'DNI'],
+            'DHI Mean': location_stats.loc['mean', 'DHI'],
+            'DHI StdDev': location_stats.loc['std', 'DHI']
         }
 
     # Convert the stats dictionary to a DataFrame for easier analysis and visualization
@@ -50,7 +52,7 @@ if all(file is not None for file in uploaded_files.values()):
     sns.set(style="whitegrid")
 
     # Plotting the GHI, DNI, and DHI Mean values
-    fig, axes = plt.subplots(3, 1, figsize=(10, 15))
+    fig, axes = subplots(3, 1, figsize=(10, 15))
 
     # Plot GHI
     sns.barplot(x=stats_df.index, y="GHI Mean", data=stats_df, ax=axes[0], palette="Blues_d")
@@ -68,22 +70,16 @@ if all(file is not None for file in uploaded_files.values()):
     axes[2].set_ylabel('Mean DHI (W/m²)')
 
     # Adjust layout
-    plt.tight_layout()
+    fig.tight_layout()
 
     st.write("Mean Irradiance Values")
     st.pyplot(fig)
 
-    # Convert 'Timestamp' column to datetime
-    for location, df in dataframes.items():
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        # Set the Timestamp as the index
-        df.set_index('Timestamp', inplace=True)
-
-    # Resample data to daily means
-    daily_data = {location: df.resample('D').mean() for location, df in dataframes.items()}
+    # Daily means straight from the rollups
+    daily_data = {location: store.daily_series() for location, store in aggregates.items()}
 
     # Plotting GHI over time for each location
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = subplots(figsize=(12, 8))
 
     for location, df in daily_data.items():
         ax.plot(df.index, df['GHI'], label=location)
@@ -95,13 +91,13 @@ if all(file is not None for file in uploaded_files.values()):
     ax.grid(True)
     ax.set_ylim(0, 600)
     ax.set_yticks([0, 100, 200, 300, 400, 500, 600])
-    plt.tight_layout()
+    fig.tight_layout()
 
     st.write("Daily Mean GHI Values")
     st.pyplot(fig)
 
     # Plotting DHI over time for each location
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = subplots(figsize=(12, 8))
 
     for location, df in daily_data.items():
         ax.plot(df.index, df['DHI'], label=location)
@@ -112,17 +108,18 @@ if all(file is not None for file in uploaded_files.values()):
     ax.grid(True)
     ax.set_ylim(0, 600)
     ax.set_yticks([0, 100, 200, 300, 400, 500, 600])
-    plt.tight_layout()
+    fig.tight_layout()
 
     st.write("Daily Mean DHI Values")
     st.pyplot(fig)
 
     st.write("Recommendations:")
-    st.write("Based on the analysis, the location with the highest mean GHI values is:")
-    st.write(stats_df['GHI Mean'].idxmax())
+    ranking = rank_stations(frames)
+    st.write("Based on the analysis, the location with the best solar resource is:")
+    st.write(ranking.index[0])
     st.write("The locations can be ranked as follows:")
-    st.write(stats_df['GHI Mean'].sort_values(ascending=False))
-    st.write("These results suggest that the location with the highest GHI values may be the best location for solar energy generation.")
+    st.dataframe(ranking.rename(columns=METRIC_LABELS).style.format(precision=2))
+    st.write("The score weighs the temperature-derated yield, the P90 daily insolation, the share of clear days and the variability of each location.")
     st.write("However, further analysis is needed to confirm these findings and to consider other factors such as wind speed, temperature, and humidity.")
 else:
     st.write("Please upload all the required files to proceed with the analysis.")
@@ -1,4 +1,6 @@
 import streamlit as st
+from utils.stations import get_ranking
+from scripts.ranking import DEFAULT_WEIGHTS, METRIC_LABELS
 
 def report():
     st.title("Solar Energy Analysis Report")
@@ -18,6 +20,10 @@ def report():
             st.write("* Loaded historical climate data for each location")
             st.write("* Calculated mean GHI, DNI, and DHI values for each location")
             st.write("* Resampled data to daily intervals")
+            st.write("* Integrated minute GHI and DNI into daily insolation (kWh/m²/day), keeping days with at least 90% of readings")
+            st.write("* Derated module yield for temperature (-0.4%/°C above 25 °C, from TModA or Tamb)")
+            st.write("* Ranked the stations on a weighted score: " + ", ".join(
+                f"{METRIC_LABELS[metric]} ({weight:+.0%})" for metric, weight in DEFAULT_WEIGHTS.items()))
         with col2:
             st.write("### Visualization Tools")
             st.write("* Used bar charts to compare mean GHI, DNI, and DHI values across locations")
@@ -25,16 +31,30 @@ def report():
 
     with tab3:
         st.write("## Recommendation")
+        ranking = get_ranking()
+        # The table is ordered by overall score; the GHI findings by GHI.
+        best = ranking.iloc[0]
+        by_ghi = ranking.sort_values('ghi_mean', ascending=False, kind='stable')
+        st.dataframe(ranking.rename(columns=METRIC_LABELS).style.format(precision=2))
         st.write("Based on the analysis, the following conclusions can be drawn:")
         st.write("### GHI (Global Horizontal Irradiance)")
-        st.write("* Benin (Malanville) has the highest average GHI (240.56 W/m²), followed closely by Togo (Dapaong) (230.56 W/m²).")
-        st.write("* Sierra Leone (Bumbuna) has the lowest average GHI (201.96 W/m²).")
+        sunniest, runner_up, last = by_ghi.iloc[0], by_ghi.iloc[min(1, len(by_ghi) - 1)], by_ghi.iloc[-1]
+        st.write(f"* {sunniest.name} receives the most, {sunniest['ghi_mean']:.2f} kWh/m²/day on average "
+                 f"(P90 {sunniest['ghi_p90']:.2f} kWh/m²/day), followed by {runner_up.name} "
+                 f"({runner_up['ghi_mean']:.2f} kWh/m²/day).")
+        st.write(f"* {last.name} receives the least, {last['ghi_mean']:.2f} kWh/m²/day.")
         st.write("### DNI (Direct Normal Irradiance)")
-        st.write("* Benin (Malanville) again has the highest average DNI (167.19 W/m²), with Togo (Dapaong) being the second highest (151.26 W/m²).")
-        st.write("* Sierra Leone (Bumbuna) has the lowest average DNI (116.38 W/m²).")
+        st.write("* " + ", ".join(f"{name}: {dni:.2f} kWh/m²/day"
+                                  for name, dni in ranking['dni_mean'].sort_values(ascending=False).items()))
+        st.write("### Temperature and variability")
+        st.write("* " + ", ".join(f"{name}: {loss:.1%} temperature loss, day-to-day CV {cv:.2f}"
+                                  for name, loss, cv in zip(ranking.index, ranking['temperature_loss'],
+                                                            ranking['insolation_cv'])))
         st.write("### Conclusion")
-        st.write("* Benin (Malanville) appears to be the best suited for solar radiation selection, with the highest mean values for both GHI and DNI, which are crucial for solar power generation.")
-        st.write("* Togo (Dapaong) is also a strong candidate, with only slightly lower solar radiation values.")
-        st.write("* Sierra Leone (Bumbuna), while still viable, has the lowest mean values for both GHI and DNI, making it less favorable compared to the other two locations.")
+        st.write(f"* {best.name} ranks first, with a derated yield of {best['yield_mean']:.2f} kWh/kWp/day "
+                 f"and a score of {best['score']:.2f}.")
+        for name, row in ranking.iloc[1:].iterrows():
+            st.write(f"* {name} ranks #{row['rank']:.0f}, with {row['yield_mean']:.2f} kWh/kWp/day "
+                     f"(score {row['score']:.2f}).")
 
 report()
\ No newline at end of file
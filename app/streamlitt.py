@@ -1,18 +1,20 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
+from utils.stations import get_correlations, get_station, get_wind_rose, query
+from scripts.decimation import DEFAULT_MAX_POINTS, decimate_frame
+from scripts.figures import subplots
+from scripts.rolling import rolling
+from scripts.wind_rose import frequencies
 
-# Load the data
-@st.cache_data
-def load_data(file_path):
-    data = pd.read_csv(file_path)
-    return data
+# Rolling statistics offered on the time series
+ROLLING_OPTIONS = {"Mean": "mean", "Standard deviation": "std", "Minimum": "min", "Maximum": "max", "Median": 0.5}
 
-togo_data = load_data("../data/togo-dapaong_qc.csv")
-benin_data = load_data("../data/benin-malanville.csv")
-sierraleone_data = load_data("../data/sierraleone-bumbuna.csv")
+# Load the data
+togo_data = get_station("Togo (Dapaong)")
+benin_data = get_station("Benin (Malanville)")
+sierraleone_data = get_station("Sierra Leone (Bumbuna)")
 
 # Create a Streamlit app
 st.title("Solar Radiation Data Dashboard")
@@ -38,10 +40,13 @@ elif country == "Sierra Leone":
 with st.container():
     if country == "Togo":
         data = togo_data
+        station = "Togo (Dapaong)"
     elif country == "Benin":
         data = benin_data
+        station = "Benin (Malanville)"
     elif country == "Sierra Leone":
         data = sierraleone_data
+        station = "Sierra Leone (Bumbuna)"
 
     if analysis_type == "Summary Statistics":
         # Display summary statistics
@@ -51,21 +56,35 @@ with st.container():
     elif analysis_type == "Time Series Analysis":
         # Display time series analysis
         st.subheader("Time Series Analysis")
-        fig = px.line(data, x="Timestamp", y=columns)
+        first_day, last_day = data.index.min().date(), data.index.max().date()
+        window = st.date_input("Time window", (first_day, last_day), min_value=first_day, max_value=last_day)
+        start, end = (window[0], window[-1]) if window else (first_day, last_day)
+        # Only the row groups of the window are read; narrow windows are
+        # drawn from the raw data, wide ones decimated.
+        window_data = query(station, columns, start=str(start), end=f"{end} 23:59")
+        smoothing = st.selectbox("Rolling window", ["None", "1h", "1D", "7D", "30D"])
+        if smoothing != "None":
+            statistic = st.selectbox("Rolling statistic", list(ROLLING_OPTIONS))
+            window_data = rolling(window_data, smoothing, ROLLING_OPTIONS[statistic], columns)
+        plot_data = decimate_frame(window_data, columns, DEFAULT_MAX_POINTS)
+        fig = px.line(plot_data, x=plot_data.index, y=columns)
         st.plotly_chart(fig, use_container_width=True)
 
     elif analysis_type == "Correlation Analysis":
         # Display correlation analysis
         st.subheader("Correlation Analysis")
-        corr_matrix = data[columns].corr()
-        fig = plt.figure(figsize=(10, 8))
-        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", square=True)
+        corr_matrix = get_correlations(station).pearson(columns)
+        fig, ax = subplots(figsize=(10, 8))
+        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", square=True, ax=ax)
         st.pyplot(fig)
 
     elif analysis_type == "Wind Analysis":
         # Display wind analysis
         st.subheader("Wind Analysis")
-        fig = px.scatter(data, x="WS", y="WD")
+        # Wind rose from the station's cached sector x speed-class counts
+        rose = frequencies(get_wind_rose(station)).stack().rename("Frequency (%)").reset_index()
+        fig = px.bar_polar(rose, r="Frequency (%)", theta="Sector", color="Speed (m/s)",
+                           color_discrete_sequence=px.colors.sequential.Viridis)
         st.plotly_chart(fig, use_container_width=True)
 
     elif analysis_type == "Temperature Analysis":
@@ -76,10 +95,11 @@ with st.container():
 
 # Add interactive features
 st.sidebar.title("Interactive Features")
-slider_value = st.sidebar.slider("Select a range of values for WS", min_value=data["WS"].min(), max_value=data["WS"].max())
+slider_value = st.sidebar.slider("Select a range of values for WS", min_value=float(data["WS"].min()), max_value=float(data["WS"].max()))
 
-# Filter the data based on the slider value
-filtered_data = data[data["WS"] <= slider_value]
+# Filter the data based on the slider value, skipping blocks with no matching rows
+# and decoding only WS and the selected columns
+filtered_data = query(station, ["WS"] + [col for col in columns if col != "WS"], filters=[("WS", "<=", slider_value)])
 
 # Display the filtered data
 st.subheader("Filtered Data")
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Make the shared `scripts` package importable from the Streamlit pages.
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
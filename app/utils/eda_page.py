@@ -0,0 +1,193 @@
+import os
+import uuid
+from pathlib import Path
+
+import streamlit as st
+
+from scripts.figure_cache import FigureCache
+from scripts.instrumentation import span
+from scripts.jobs import JobQueue, iter_completed
+from scripts.schema import footprint_summary
+from scripts.soiling import analyze_cleaning_events, soiling_summary
+from scripts.station_store import CACHE_DIR_ENV
+from utils.figure_jobs import FIGURE_OPTIONS, render_station_figure
+from utils.plotting import PlottingUtils
+from utils.profiling import page_profile
+from utils.stations import DATA_DIR, get_quality_report, get_sketches, get_station, station_fingerprint, station_path
+
+# Create an instance of the PlottingUtils class
+plotting_utils = PlottingUtils()
+
+plotting_options = [
+    'Data Quality',
+    'Correlation Heatmap',
+    'Pair Plot',
+    'Scatter Matrix',
+    'Polar Plot',
+    'Temperature Data Analysis',
+    'Histograms',
+    'Z-scores',
+    'Bubble Charts',
+    'Time Series Plots',
+    'Cleaning Events'
+]
+
+
+@st.cache_resource
+def get_figure_cache():
+    """
+    Return the figure cache shared by every session.
+
+    Returns:
+    - cache (FigureCache): Rendered figures, kept in memory and under
+      `figures/` in the station cache directory.
+    """
+    return FigureCache(Path(os.environ.get(CACHE_DIR_ENV, DATA_DIR / '.station_cache')) / 'figures')
+
+
+@st.cache_resource
+def get_job_queue():
+    """
+    Return the process pool rendering figures for every session.
+
+    Returns:
+    - queue (JobQueue): Shared job queue; identical figures requested by
+      several sessions are rendered once.
+    """
+    return JobQueue()
+
+
+def _session_id():
+    if 'eda_session' not in st.session_state:
+        st.session_state['eda_session'] = uuid.uuid4().hex
+    return st.session_state['eda_session']
+
+
+def submit_figures(station, options, fingerprint):
+    """
+    Start rendering the figures that are not cached yet.
+
+    Finished figures go into the figure cache even if the session has
+    moved on, so a rerun finds them there.
+
+    Args:
+    - station (str): The configured station name.
+    - options (list): Selected plotting options.
+    - fingerprint (str): Version of the station data.
+
+    Returns:
+    - images (dict): Option -> cached images, for the options already rendered.
+    - jobs (dict): Option -> Job, for the options being rendered.
+    """
+    figure_cache = get_figure_cache()
+    job_queue = get_job_queue()
+    images, jobs = {}, {}
+    for option in options:
+        if option not in FIGURE_OPTIONS:
+            continue
+        key = FigureCache.make_key(station, option, fingerprint=fingerprint)
+        cached = figure_cache.get_images(key)
+        if cached is not None:
+            images[option] = cached
+            continue
+        jobs[option] = job_queue.submit(
+            key, render_station_figure, str(station_path(station)), fingerprint, option, figure_cache.fmt,
+            label=f'{station}: {option}', owner=_session_id(),
+            on_done=lambda result, key=key: figure_cache.put_images(key, result),
+        )
+    return images, jobs
+
+
+def render_eda_page(station):
+    """
+    Render the exploratory data analysis page for one station.
+
+    Args:
+    - station (str): The configured station name.
+    """
+    with page_profile(station):
+        _render_eda_page(station)
+
+
+def _render_eda_page(station):
+    # Create a Streamlit app
+    st.title('Exploratory Data Analysis')
+    st.caption(station)
+
+    # Load the data
+    with span('load station'):
+        df = get_station(station)
+    fingerprint = station_fingerprint(station)
+
+    # Create a multi-select box for plotting options
+    selected_options = st.multiselect('Select Plotting Options', plotting_options)
+
+    # Create buttons to generate the plots and to cancel those still rendering
+    generate = st.button('Generate plots')
+    cancel = st.button('Cancel', help='Stop rendering the plots requested by this session.')
+    job_queue = get_job_queue()
+
+    if cancel:
+        requested = st.session_state.pop('eda_jobs', [])
+        cancelled = job_queue.cancel(requested, owner=_session_id())
+        st.write(f'Cancelled {cancelled} of {len(requested)} plots; plots already rendering finish in the background.')
+    elif generate:
+        # Figures render in worker processes while the tables below are
+        # computed here; each figure is shown as soon as it is ready.
+        with span('submit figure jobs'):
+            images, jobs = submit_figures(station, selected_options, fingerprint)
+        st.session_state['eda_jobs'] = [job.key for job in jobs.values()]
+        slots = {}
+        for option in selected_options:
+            st.write(option)
+            if option == 'Data Quality':
+                report = get_quality_report(station)
+                st.dataframe(report.summary())
+                footprint = footprint_summary({station: df}).iloc[0]
+                st.caption(f"In memory: {footprint['MB']:.1f} MB "
+                           f"({footprint['float64 MB']:.1f} MB as float64, {footprint['saving']:.0%} saved)")
+            elif option == 'Cleaning Events':
+                events = analyze_cleaning_events(df)
+                st.dataframe(soiling_summary(events))
+                st.dataframe(events)
+            elif option == 'Z-scores':
+                zscore_df = plotting_utils.calculate_zscores(df, ['GHI', 'DNI', 'DHI', 'Tamb'],
+                                                             sketches=get_sketches(station))
+                st.write(zscore_df)
+            elif option in images:
+                with span(f'st.image: {option}'):
+                    for image in images[option]:
+                        st.image(image)
+            else:
+                slots[option] = st.empty()
+                slots[option].caption('Rendering...')
+
+        if jobs:
+            progress = st.progress(0.0, text=f'Rendering {len(jobs)} plots...')
+            options = {job: option for option, job in jobs.items()}
+
+            def show_progress(finished):
+                progress.progress(finished / len(jobs), text=f'{finished} of {len(jobs)} plots ready...')
+
+            with span('wait for figure jobs'):
+                for finished, job in enumerate(iter_completed(jobs.values(), on_wait=show_progress), 1):
+                    option = options[job]
+                    with slots[option].container():
+                        if job.future.cancelled():
+                            st.caption('Cancelled.')
+                        elif job.future.exception() is not None:
+                            st.error(f'{option} failed: {job.future.exception()}')
+                        else:
+                            for image in job.future.result():
+                                st.image(image)
+                    show_progress(finished)
+            progress.empty()
+            st.session_state.pop('eda_jobs', None)
+
+    else:
+        st.write("Please select plotting options and click 'Generate plots' button.")
+
+    in_flight = job_queue.table()
+    if not in_flight.empty:
+        with st.expander(f'Background jobs ({len(in_flight)})'):
+            st.dataframe(in_flight.drop(columns='key'), hide_index=True)
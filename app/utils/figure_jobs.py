@@ -0,0 +1,70 @@
+import functools
+
+from scripts.correlation import CORRELATION_COLUMNS, load_station_correlations
+from scripts.figure_cache import render_images
+from scripts.station_store import load_station
+from scripts.wind_rose import load_station_wind_rose
+from utils.plotting import PlottingUtils
+
+# Plotting options rendered as figures, in a worker process.
+FIGURE_OPTIONS = [
+    'Correlation Heatmap',
+    'Pair Plot',
+    'Scatter Matrix',
+    'Polar Plot',
+    'Temperature Data Analysis',
+    'Histograms',
+    'Bubble Charts',
+    'Time Series Plots',
+]
+
+plotting_utils = PlottingUtils()
+
+
+def figure_builders(df, file_path):
+    """
+    Map each figure option to a function building its figure(s).
+
+    Args:
+    - df (pd.DataFrame): The station data.
+    - file_path (str): Path to the station CSV file, for the derived caches.
+
+    Returns:
+    - builders (dict): Option -> zero-argument callable.
+    """
+    return {
+        'Correlation Heatmap': lambda: plotting_utils.create_correlation_heatmap(
+            load_station_correlations(file_path).pearson(CORRELATION_COLUMNS)),
+        'Pair Plot': lambda: plotting_utils.create_pair_plot(df),
+        'Scatter Matrix': lambda: plotting_utils.create_scatter_matrix(df),
+        'Polar Plot': lambda: plotting_utils.create_polar_plot(df, table=load_station_wind_rose(file_path)),
+        'Temperature Data Analysis': lambda: plotting_utils.analyze_temperature_data(df),
+        # Rendered and released by `render_images`, so the pooled figure is reused.
+        'Histograms': lambda: plotting_utils.create_histograms(df, pooled=True),
+        'Bubble Charts': lambda: plotting_utils.create_bubble_charts(df, ['GHI', 'DNI', 'DHI', 'Tamb'], 'RH'),
+        'Time Series Plots': lambda: plotting_utils.create_time_series_plots(df),
+    }
+
+
+@functools.lru_cache(maxsize=2)
+def _station_frame(file_path, fingerprint):
+    # Each worker reads a station from the columnar cache once per data
+    # version and reuses it for the following jobs.
+    return load_station(file_path)
+
+
+def render_station_figure(file_path, fingerprint, option, fmt='png'):
+    """
+    Render the figure(s) of one plotting option; runs in a `JobQueue` worker.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - fingerprint (str): Version of the station data.
+    - option (str): One of FIGURE_OPTIONS.
+    - fmt (str): Image format.
+
+    Returns:
+    - images (list): The image bytes, one per figure.
+    """
+    df = _station_frame(file_path, fingerprint)
+    return render_images(figure_builders(df, file_path)[option], fmt)
@@ -1,22 +1,56 @@
-import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import pandas as pd
 
+from scripts import eda_helpers
+from scripts.correlation import CORRELATION_COLUMNS
+from scripts.decimation import DEFAULT_MAX_POINTS, decimate_frame
+from scripts.density import (DEFAULT_BINS, DEFAULT_SAMPLE_SIZE, draw_density, draw_density_grid,
+                             pair_histograms, stratified_sample)
+from scripts.figures import FigureTemplate, histogram_stairs, new_figure, subplots
+from scripts.instrumentation import timed
+from scripts.soiling import daily_performance_ratio, detect_cleaning_events, has_time_axis
+from scripts.wind_rose import draw_wind_rose, wind_rose_table
+
+# Columns and titles of the histogram grid, row by row.
+HISTOGRAM_PANELS = [
+    ('GHI', 'Global Horizontal Irradiance (W/m²)'),
+    ('DNI', 'Direct Normal Irradiance (W/m²)'),
+    ('DHI', 'Diffuse Horizontal Irradiance (W/m²)'),
+    ('WS', 'Wind Speed (m/s)'),
+    ('RH', 'Relative Humidity (%)'),
+    ('Tamb', 'Ambient Temperature (°C)'),
+]
+
+
+def _histogram_layout(fig, axes):
+    for ax, (_, title) in zip(axes.flat, HISTOGRAM_PANELS):
+        ax.set_title(title)
+        ax.set_xlabel('Value')
+        ax.set_ylabel('Frequency')
+
+
+# Constrained layout is computed at draw time, once the histograms are in.
+HISTOGRAM_TEMPLATE = FigureTemplate(3, 2, figsize=(15, 10), layout='constrained', setup=_histogram_layout)
+
+
 class PlottingUtils:
-    def calculate_correlation_matrix(self, df):
+    @timed()
+    def calculate_correlation_matrix(self, df, columns=CORRELATION_COLUMNS, method='pearson'):
         """
         Calculate the correlation matrix for the given DataFrame.
 
         Args:
         - df (pd.DataFrame): The DataFrame containing the data.
+        - columns (list): Columns to correlate. Defaults to irradiance and module temperatures.
+        - method (str): 'pearson' or 'spearman'.
 
         Returns:
         - corr_matrix (pd.DataFrame): The correlation matrix.
         """
-        corr_df = df[['GHI', 'DNI', 'DHI', 'TModA', 'TModB']]
-        return corr_df.corr()
+        return eda_helpers.calculate_correlation_matrix(df, columns, method)
 
+    @timed()
     def create_correlation_heatmap(self, corr_matrix):
         """
         Create a heatmap for correlation analysis.
@@ -27,203 +61,279 @@ class PlottingUtils:
         Returns:
         - fig (matplotlib.figure.Figure): The figure object.
         """
-        fig, ax = plt.subplots(figsize=(8, 8))
+        fig, ax = subplots(figsize=(8, 8))
         sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', square=True, ax=ax)
         ax.set_title('Correlation Analysis')
         return fig
 
-    def create_pair_plot(self, df):
+    @timed()
+    def create_pair_plot(self, df, density=True, bins=DEFAULT_BINS):
         """
         Create a pair plot for correlation analysis.
 
         Args:
         - df (pd.DataFrame): The DataFrame containing the data.
+        - density (bool): Draw 2D histograms instead of scattering every row,
+          which keeps render time independent of the number of rows.
+        - bins (int): Number of bins per variable in density mode.
 
         Returns:
         - fig (matplotlib.figure.Figure): The figure object.
         """
-        corr_df = df[['GHI', 'DNI', 'DHI', 'TModA', 'TModB']]
-        fig = sns.pairplot(corr_df)
+        cols = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB']
+        if not density:
+            return sns.pairplot(df[cols]).figure
+        pairs, marginals = pair_histograms(df, cols, cols, bins)
+        fig, axes = subplots(len(cols), len(cols), figsize=(12, 12))
+        draw_density_grid(axes, pairs, marginals, cols, cols)
+        fig.suptitle('Pair Plot for Correlation Analysis')
+        fig.tight_layout()
         return fig
-    def create_scatter_matrix(self, df):
+
+    @timed()
+    def create_scatter_matrix(self, df, density=True, bins=DEFAULT_BINS):
         """
         Create a scatter matrix for wind conditions and solar irradiance.
 
         Args:
         - df (pd.DataFrame): The DataFrame containing the data.
+        - density (bool): Draw 2D histograms instead of scattering every row.
+        - bins (int): Number of bins per variable in density mode.
 
         Returns:
         - fig (matplotlib.figure.Figure): The figure object.
         """
-        scatter_df = df[['WS', 'WSgust', 'WD', 'GHI', 'DNI', 'DHI']]
-        fig = sns.pairplot(scatter_df, x_vars=['WS', 'WSgust', 'WD'], y_vars=['GHI', 'DNI', 'DHI'], height=4, aspect=0.8)
+        x_vars = ['WS', 'WSgust', 'WD']
+        y_vars = ['GHI', 'DNI', 'DHI']
+        if not density:
+            scatter_df = df[x_vars + y_vars]
+            return sns.pairplot(scatter_df, x_vars=x_vars, y_vars=y_vars, height=4, aspect=0.8).figure
+        pairs, marginals = pair_histograms(df, x_vars, y_vars, bins)
+        fig, axes = subplots(len(y_vars), len(x_vars), figsize=(10, 12))
+        draw_density_grid(axes, pairs, marginals, x_vars, y_vars)
+        fig.suptitle('Scatter Matrix for Wind Conditions and Solar Irradiance')
+        fig.tight_layout()
         return fig
 
-    def create_polar_plot(self, df, ws_col='WS', wd_col='WD'):
+    @timed()
+    def create_polar_plot(self, df, ws_col='WS', wd_col='WD', table=None):
         """
-        Create a polar plot of wind speed and direction distribution.
+        Create a wind rose of wind speed and direction distribution.
+
+        Readings are binned into direction sectors and speed classes, and
+        the rose is drawn as stacked bars from the resulting table.
 
         Parameters:
         df (Pandas DataFrame): Dataset containing wind speed and direction data.
         ws_col (str): Column name for wind speed data. Defaults to 'WS'.
         wd_col (str): Column name for wind direction data. Defaults to 'WD'.
+        table (pd.DataFrame): Precomputed `wind_rose_table`; `df` is not read when given.
 
         Returns:
         - fig (matplotlib.figure.Figure): The figure object.
         """
-        df[f'{wd_col}_rad'] = np.radians(df[wd_col])
+        if table is None:
+            table = wind_rose_table(df, ws_col=ws_col, wd_col=wd_col)
 
-        fig = plt.figure(figsize=(8, 8))
+        fig = new_figure(figsize=(8, 8))
         ax = fig.add_subplot(111, polar=True)
-
-        ax.scatter(df[f'{wd_col}_rad'], df[ws_col], c=df[ws_col], cmap='viridis', alpha=0.5)
-
-        ax.set_rlim(0, df[ws_col].max() * 1.1)  
-        ax.set_rticks([max(df[ws_col]) // 4, max(df[ws_col]) // 2, max(df[ws_col]) * 3 // 4])
-        ax.set_rlabel_position(270)
+        draw_wind_rose(ax, table)
         ax.set_title('Wind Speed and Direction Distribution')
         ax.set_xlabel('Wind Direction (°)', labelpad=20)
 
-        direction_labels = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-        ax.set_thetagrids(22.5 * np.arange(8), direction_labels)
+        return fig
 
+    @timed()
+    def analyze_temperature_data(self, df, density=True, bins=DEFAULT_BINS):
+        """
+        Plot temperature and irradiance against relative humidity.
+
+        Args:
+        - df (pd.DataFrame): The DataFrame containing the data.
+        - density (bool): Draw 2D histograms instead of scattering every row.
+        - bins (int): Number of bins per variable in density mode.
+
+        Returns:
+        - fig (matplotlib.figure.Figure): The figure object.
+        """
+        y_vars = ['Tamb', 'GHI', 'DNI']
+        if density:
+            pairs, _ = pair_histograms(df, ['RH'], y_vars, bins)
+
+        # Create scatter plots
+        fig, axes = subplots(nrows=1, ncols=3, figsize=(15, 5))
+        for ax, y_col in zip(axes, y_vars):
+            if density:
+                draw_density(ax, pairs[('RH', y_col)])
+            else:
+                sns.scatterplot(x='RH', y=y_col, data=df, ax=ax)
+        axes[0].set_title('Temperature vs Relative Humidity')
+        axes[0].set_xlabel('Relative Humidity (%)')
+        axes[0].set_ylabel('Temperature (°C)')
+
+        axes[1].set_title('Global Horizontal Irradiance vs Relative Humidity')
+        axes[1].set_xlabel('Relative Humidity (%)')
+        axes[1].set_ylabel('Global Horizontal Irradiance (W/m²)')
+
+        axes[2].set_title('Direct Normal Irradiance vs Relative Humidity')
+        axes[2].set_xlabel('Relative Humidity (%)')
+        axes[2].set_ylabel('Direct Normal Irradiance (W/m²)')
+
+        fig.tight_layout()
+        return fig
+
+    @timed()
+    def create_histograms(self, df, pooled=False):
+        """
+        Create histograms of irradiance, wind speed, humidity and temperature.
+
+        Args:
+        - df (pd.DataFrame): The DataFrame containing the data.
+        - pooled (bool): Draw on a figure from HISTOGRAM_TEMPLATE, whose grid
+          and titles are built once and reused. The caller must then pass
+          the figure to `figures.release_figure` once rendered (as
+          `figure_to_bytes` does), or it is never returned to the pool.
+          By default a new figure is returned and owned by the caller.
+
+        Returns:
+        - fig (matplotlib.figure.Figure): The figure object.
+        """
+        if pooled:
+            fig, axes = HISTOGRAM_TEMPLATE.acquire()
+        else:
+            fig, axes = subplots(3, 2, figsize=(15, 10), layout='constrained', squeeze=False)
+            _histogram_layout(fig, axes)
+        for ax, (col, _) in zip(axes.flat, HISTOGRAM_PANELS):
+            histogram_stairs(ax, df[col].to_numpy(), bins=50, alpha=0.5, label=col)
         return fig
 
-    def analyze_temperature_data(self, df):
-            # Create scatter plots
-            fig, axes = plt.subplots(nrows=1, ncols=3, figsize=(15, 5))
-            sns.scatterplot(x='RH', y='Tamb', data=df, ax=axes[0])
-            axes[0].set_title('Temperature vs Relative Humidity')
-            axes[0].set_xlabel('Relative Humidity (%)')
-            axes[0].set_ylabel('Temperature (°C)')
-
-            sns.scatterplot(x='RH', y='GHI', data=df, ax=axes[1])
-            axes[1].set_title('Global Horizontal Irradiance vs Relative Humidity')
-            axes[1].set_xlabel('Relative Humidity (%)')
-            axes[1].set
-            axes[1].set_ylabel('Global Horizontal Irradiance (W/m²)')
-
-            sns.scatterplot(x='RH', y='DNI', data=df, ax=axes[2])
-            axes[2].set_title('Direct Normal Irradiance vs Relative Humidity')
-            axes[2].set_xlabel('Relative Humidity (%)')
-            axes[2].set_ylabel('Direct Normal Irradiance (W/m²)')
-
-            plt.tight_layout()
-            return fig
-
-    def create_histograms(self, df):
+    @timed()
+    def calculate_zscores(self, df, cols, threshold=3, sketches=None):
+        """
+        Calculate absolute Z-scores and flag outlying rows, without
+        modifying or copying `df`.
+
+        Args:
+        - df (pd.DataFrame): The DataFrame containing the data.
+        - cols (list): Columns to score.
+        - threshold (float): Rows with any |Z| above this are flagged.
+        - sketches (SketchStore): Optional per-day sketches giving the means
+          and standard deviations, see `eda_helpers.calculate_zscores`.
+
+        Returns:
+        - zscore_df (pd.DataFrame): '<col>_zscore' float32 columns plus an
+          int8 'outlier' flag, indexed like `df`.
+        """
+        return eda_helpers.calculate_zscores(df, cols, threshold, sketches)
+
+    @timed()
+    def create_bubble_charts(self, df, cols, bubble_col, density=True, sample_size=DEFAULT_SAMPLE_SIZE, bins=DEFAULT_BINS):
+        """
+        Create bubble charts of irradiance vs. ambient temperature.
+
+        Args:
+        - df (pd.DataFrame): The DataFrame containing the data.
+        - cols (list): Columns of interest (kept for API compatibility).
+        - bubble_col (str): Column giving the bubble size, e.g. 'RH' or 'BP'.
+        - density (bool): Draw a 2D histogram of all rows and overlay bubbles
+          for a stratified sample of `sample_size` rows only.
+        - sample_size (int): Rows drawn as bubbles in density mode.
+        - bins (int): Number of bins per variable in density mode.
+
+        Returns:
+        - fig (matplotlib.figure.Figure): The figure object.
+        """
+        if density:
+            pairs, _ = pair_histograms(df, ['GHI', 'DNI'], ['Tamb'], bins)
+            points = stratified_sample(df[['GHI', 'DNI', 'Tamb', bubble_col]], sample_size)
+        else:
+            points = df
+
         # Create a figure with multiple subplots
-        fig, axes = plt.subplots(nrows=3, ncols=2, figsize=(15, 10))
-
-        # Plot histograms
-        axes[0, 0].hist(df['GHI'], bins=50, alpha=0.5, label='GHI')
-        axes[0, 0].set_title('Global Horizontal Irradiance (W/m²)')
-        axes[0, 0].set_xlabel('Value')
-        axes[0, 0].set_ylabel('Frequency')
-
-        axes[0, 1].hist(df['DNI'], bins=50, alpha=0.5, label='DNI')
-        axes[0, 1].set_title('Direct Normal Irradiance (W/m²)')
-        axes[0, 1].set_xlabel('Value')
-        axes[0, 1].set_ylabel('Frequency')
-
-        axes[1, 0].hist(df['DHI'], bins=50, alpha=0.5, label='DHI')
-        axes[1, 0].set_title('Diffuse Horizontal Irradiance (W/m²)')
-        axes[1, 0].set_xlabel('Value')
-        axes[1, 0].set_ylabel('Frequency')
-
-        axes[1, 1].hist(df['WS'], bins=50, alpha=0.5, label='WS')
-        axes[1, 1].set_title('Wind Speed (m/s)')
-        axes[1, 1].set_xlabel('Value')
-        axes[1, 1].set_ylabel('Frequency')
-
-        axes[2, 0].hist(df['RH'], bins=50, alpha=0.5, label='RH')
-        axes[2, 0].set_title('Relative Humidity (%)')
-        axes[2, 0].set_xlabel('Value')
-        axes[2, 0].set_ylabel('Frequency')
-
-        axes[2, 1].hist(df['Tamb'], bins=50, alpha=0.5, label='Tamb')
-        axes[2, 1].set_title('Ambient Temperature (°C)')
-        axes[2, 1].set_xlabel('Value')
-        axes[2, 1].set_ylabel('Frequency')
-
-        plt.tight_layout()
+        fig, axes = subplots(nrows=2, ncols=2, figsize=(10, 10))
+
+        # Bubble charts for GHI (top row) and DNI (bottom row) vs. Tamb, with
+        # bubble size representing RH or BP at two scales
+        for row, x_col in enumerate(['GHI', 'DNI']):
+            for col, scale in enumerate([10, 0.1]):
+                ax = axes[row, col]
+                if density:
+                    draw_density(ax, pairs[(x_col, 'Tamb')], cmap='Greys')
+                ax.scatter(points[x_col], points['Tamb'], s=points[bubble_col] * scale, alpha=0.5, label=f'{x_col} vs. Tamb vs. WS')
+                ax.set_title(f'{x_col} vs. Tamb vs. WS with {bubble_col}')
+                ax.set_xlabel(f'{x_col} (W/m²)')
+                ax.set_ylabel('Tamb (°C)')
+
+        fig.tight_layout()
         return fig
 
-    def calculate_zscores(self, df, cols, threshold=3):
-        # Calculate Z-scores for each column
-        for col in cols:
-            df[f'{col}_zscore'] = np.abs((df[col] - df[col].mean()) / df[col].std())
-
-        # Flag outliers
-        df['outlier'] = np.where(df[[f'{col}_zscore' for col in cols]].max(axis=1) > threshold, 1, 0)
-
-        return df
-
-    def create_bubble_charts(self, df, cols, bubble_col):
-            # Create a figure with multiple subplots
-            fig, axes = plt.subplots(nrows=2, ncols=2, figsize=(10, 10))
-
-            # Plot bubble chart for GHI vs. Tamb vs. WS with bubble size representing RH or BP
-            axes[0, 0].scatter(df['GHI'], df['Tamb'], s=df[bubble_col] * 10, alpha=0.5, label='GHI vs. Tamb vs. WS')
-            axes[0, 0].set_title(f'GHI vs. Tamb vs. WS with {bubble_col}')
-            axes[0, 0].set_xlabel('GHI (W/m²)')
-            axes[0, 0].set_ylabel('Tamb (°C)')
-
-            # Plot bubble chart for GHI vs. Tamb vs. WS with bubble size representing RH or BP
-            axes[0, 1].scatter(df['GHI'], df['Tamb'], s=df[bubble_col] * 0.1, alpha=0.5, label='GHI vs. Tamb vs. WS')
-            axes[0, 1].set_title(f'GHI vs. Tamb vs. WS with {bubble_col}')
-            axes[0, 1].set_xlabel('GHI (W/m²)')
-            axes[0, 1].set_ylabel('Tamb (°C)')
-            # Plot bubble chart for DNI vs. Tamb vs. WS with bubble size representing RH or BP
-            axes[1, 0].scatter(df['DNI'], df['Tamb'], s=df[bubble_col] * 10, alpha=0.5, label='DNI vs. Tamb vs. WS')
-            axes[1, 0].set_title(f'DNI vs. Tamb vs. WS with {bubble_col}')
-            axes[1, 0].set_xlabel('DNI (W/m²)')
-            axes[1, 0].set_ylabel('Tamb (°C)')
-
-            # Plot bubble chart for DNI vs. Tamb vs. WS with bubble size representing RH or BP
-            axes[1, 1].scatter(df['DNI'], df['Tamb'], s=df[bubble_col] * 0.1, alpha=0.5, label='DNI vs. Tamb vs. WS')
-            axes[1, 1].set_title(f'DNI vs. Tamb vs. WS with {bubble_col}')
-            axes[1, 1].set_xlabel('DNI (W/m²)')
-            axes[1, 1].set_ylabel('Tamb (°C)')
-
-            plt.tight_layout()
-            return fig
-
-    def create_time_series_plots(self, df):
+    @timed()
+    def create_time_series_plots(self, df, max_points=DEFAULT_MAX_POINTS, start=None, end=None):
+        """
+        Create line, area and cleaning-impact plots over time.
+
+        The cleaning-impact plot shows the daily ModA/ModB performance ratio
+        (module reading over GHI) with the cleaning events marked. Without
+        timestamps (neither a DatetimeIndex nor a Timestamp column) it plots
+        the ModA/ModB readings of clean and dirty rows instead.
+
+        The series share a budget of `max_points` rows, each decimated to
+        its part with per-bucket min/max so peaks survive, before drawing;
+        a window narrow enough to fit in `max_points` is drawn from the raw
+        data.
+
+        Args:
+        - df (pd.DataFrame): The DataFrame containing the data, in time order.
+        - max_points (int): Most points drawn per line, shared by the
+          series' decimation. None draws every row.
+        - start, end: Optional time window to plot.
+
+        Returns:
+        - figs (list): The three figure objects.
+        """
+        series = ['GHI', 'DNI', 'DHI', 'Tamb']
+        plot_df = decimate_frame(df, series, max_points, start=start, end=end)
+
         # Plot line graphs for GHI, DNI, DHI, and Tamb over time
-        fig1, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(df['GHI'], label='GHI')
-        ax.plot(df['DNI'], label='DNI')
-        ax.plot(df['DHI'], label='DHI')
-        ax.plot(df['Tamb'], label='Tamb')
+        fig1, ax = subplots(figsize=(10, 6))
+        for col in series:
+            ax.plot(plot_df.index, plot_df[col], label=col)
         ax.legend()
         ax.set_title('Time Series Plot of GHI, DNI, DHI, and Tamb')
         ax.set_xlabel('Time')
         ax.set_ylabel('Value')
 
         # Plot area plots for GHI, DNI, DHI, and Tamb over time
-        fig2, ax = plt.subplots(figsize=(10, 6))
-        ax.fill_between(df.index, df['GHI'], label='GHI')
-        ax.fill_between(df.index, df['DNI'], label='DNI')
-        ax.fill_between(df.index, df['DHI'], label='DHI')
-        ax.fill_between(df.index, df['Tamb'], label='Tamb')
+        fig2, ax = subplots(figsize=(10, 6))
+        for col in series:
+            ax.fill_between(plot_df.index, plot_df[col], label=col)
         ax.legend()
         ax.set_title('Area Plot of GHI, DNI, DHI, and Tamb')
         ax.set_xlabel('Time')
         ax.set_ylabel('Value')
 
-        # Create a line graph with separate lines for clean and dirty sensors
-        clean_df = df[df['Cleaning'] == 1]
-        dirty_df = df[df['Cleaning'] == 0]
-
-        fig3, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(clean_df.index, clean_df['ModA'], label='Clean ModA')
-        ax.plot(clean_df.index, clean_df['ModB'], label='Clean ModB')
-        ax.plot(dirty_df.index, dirty_df['ModA'], label='Dirty ModA')
-        ax.plot(dirty_df.index, dirty_df['ModB'], label='Dirty ModB')
+        module_df = df.loc[start:end]
+        fig3, ax = subplots(figsize=(10, 6))
+        if has_time_axis(module_df):
+            # Daily module performance ratio, with the cleaning events marked
+            ratios = daily_performance_ratio(module_df)
+            events = detect_cleaning_events(module_df)
+            for col in ratios.columns:
+                ax.plot(ratios.index, ratios[col], label=f'{col} / GHI')
+            for i, when in enumerate(events['start']):
+                ax.axvline(when, color='grey', linestyle=':', linewidth=1, label='Cleaning' if i == 0 else None)
+            ax.set_ylabel('Daily performance ratio')
+        else:
+            # Separate lines for clean and dirty sensors
+            clean_df = module_df[module_df['Cleaning'] == 1]
+            dirty_df = module_df[module_df['Cleaning'] == 0]
+            ax.plot(clean_df.index, clean_df['ModA'], label='Clean ModA')
+            ax.plot(clean_df.index, clean_df['ModB'], label='Clean ModB')
+            ax.plot(dirty_df.index, dirty_df['ModA'], label='Dirty ModA')
+            ax.plot(dirty_df.index, dirty_df['ModB'], label='Dirty ModB')
+            ax.set_ylabel('Value')
         ax.legend()
         ax.set_title('Impact of Cleaning on Sensor Readings')
         ax.set_xlabel('Time')
-        ax.set_ylabel('Value')
 
-        return [fig1, fig2, fig3]
\ No newline at end of file
+        return [fig1, fig2, fig3]
@@ -0,0 +1,34 @@
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from scripts.instrumentation import profile
+
+
+@contextmanager
+def page_profile(page):
+    """
+    Time a page render.
+
+    Adds a sidebar toggle; spans recorded in the block are shown in the
+    sidebar when it is on, and always go to the SOLAR_PROFILE_LOG
+    JSON-lines file when that variable is set. The profile is closed
+    even when the render is interrupted by a rerun or fails; the
+    breakdown is only shown for completed renders.
+
+    Args:
+    - page (str): The page name.
+
+    Yields:
+    - profile (Profile): The profile being recorded.
+    """
+    show = st.sidebar.toggle('Show timing breakdown', key='show_timing_breakdown')
+    with profile(page) as current:
+        yield current
+    elapsed = time.perf_counter() - current.started
+    if show:
+        table = current.to_frame()
+        st.sidebar.subheader('Timing breakdown')
+        st.sidebar.caption(f'{elapsed:.2f} s total, {len(table)} spans')
+        st.sidebar.dataframe(table, hide_index=True)
@@ -0,0 +1,286 @@
+import os
+from pathlib import Path
+
+import streamlit as st
+
+from scripts.aggregates import load_station_aggregates
+from scripts.correlation import load_station_correlations
+from scripts.eda_helpers import data_quality_report
+from scripts.parallel import load_aggregates_parallel
+from scripts.ranking import rank_station_files
+from scripts.sketch_store import SketchStore, load_station_sketches
+from scripts.station_store import load_station, load_time_index, query_station, source_fingerprint
+from scripts.wind_rose import load_station_wind_rose
+
+# Station data lives in `data/` at the repository root unless SOLAR_DATA_DIR
+# points somewhere else (e.g. a mounted volume on the server).
+DATA_DIR_ENV = 'SOLAR_DATA_DIR'
+DATA_DIR = Path(os.environ.get(DATA_DIR_ENV, Path(__file__).resolve().parents[2] / 'data'))
+
+STATIONS = {
+    'Benin (Malanville)': 'benin-malanville.csv',
+    'Sierra Leone (Bumbuna)': 'sierraleone-bumbuna.csv',
+    'Togo (Dapaong)': 'togo-dapaong_qc.csv',
+}
+
+
+def station_names():
+    """
+    Return the configured station names in display order.
+
+    Returns:
+    - names (list): The station names.
+    """
+    return list(STATIONS)
+
+
+def station_path(name):
+    """
+    Return the source CSV path of a configured station.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - path (Path): The path to the station CSV file.
+    """
+    return DATA_DIR / STATIONS[name]
+
+
+def station_fingerprint(name):
+    """
+    Return the fingerprint of the current version of a station's data.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - fingerprint (str): The source file fingerprint.
+    """
+    return source_fingerprint(station_path(name))
+
+
+@st.cache_resource(show_spinner='Loading station data...', max_entries=32)
+def _load_shared_station(name, fingerprint):
+    # The fingerprint is only part of the cache key, so that a changed
+    # source file is picked up without restarting the server.
+    return load_station(station_path(name))
+
+
+def get_station(name, columns=None):
+    """
+    Return a station's data, loaded once per server process.
+
+    The underlying frame is shared by every session. Callers receive a
+    shallow copy, so adding or replacing columns never leaks into the
+    shared data; sensor buffers must still be treated as read-only.
+
+    Args:
+    - name (str): The station name.
+    - columns (list): Columns to return. Defaults to all columns.
+
+    Returns:
+    - df (pd.DataFrame): The station data indexed by Timestamp.
+    """
+    df = _load_shared_station(name, station_fingerprint(name))
+    if columns is not None:
+        return df[list(columns)]
+    return df.copy(deep=False)
+
+
+# Query results depend on free-form values such as slider positions, so
+# they are not kept in the shared registry: a few recent results are
+# cached, each session gets its own copy, and old ones expire.
+@st.cache_data(show_spinner=False, max_entries=8, ttl=600)
+def _cached_query(name, fingerprint, columns, start, end, filters):
+    return query_station(station_path(name), columns=list(columns) if columns is not None else None,
+                         start=start, end=end, filters=list(filters))
+
+
+def query(name, columns=None, start=None, end=None, filters=None):
+    """
+    Return the rows of a station matching a query, read from the columnar cache.
+
+    Only the row groups overlapping the time window and passing the
+    predicates are decoded, see `station_store.query_station`. Unlike
+    `get_station`, results are not shared: the last few are cached briefly
+    and the caller owns the returned frame.
+
+    Args:
+    - name (str): The station name.
+    - columns (list): Columns to return. Defaults to all columns; pass
+      the columns needed so the others are not decoded.
+    - start, end (str or Timestamp): Inclusive time window.
+    - filters (list): (column, operator, value) predicates, e.g. [('WS', '<=', 4.0)].
+
+    Returns:
+    - df (pd.DataFrame): The matching rows indexed by Timestamp.
+    """
+    return _cached_query(name, station_fingerprint(name), tuple(columns) if columns is not None else None,
+                         start, end, tuple(tuple(f) for f in filters or []))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_time_index(name, fingerprint):
+    return load_time_index(station_path(name))
+
+
+def get_time_index(name):
+    """
+    Return the implicit time index of a station, built once per data version.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - time_index (TimeIndex): Start + step segments of the station's timestamps.
+    """
+    return _shared_time_index(name, station_fingerprint(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_wind_rose(name, fingerprint, freq):
+    return load_station_wind_rose(station_path(name), freq=freq)
+
+
+def get_wind_rose(name, freq=None):
+    """
+    Return the wind rose table of a station, computed once per data version.
+
+    Args:
+    - name (str): The station name.
+    - freq (str): Optional period, e.g. 'M', for one table per time window.
+
+    Returns:
+    - table (pd.DataFrame): Counts per direction sector and speed class.
+    """
+    return _shared_wind_rose(name, station_fingerprint(name), freq)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_correlations(name, fingerprint):
+    return load_station_correlations(station_path(name))
+
+
+def get_correlations(name):
+    """
+    Return the per-day correlation statistics of a station, built once per data version.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - store (CorrelationStore): Answers correlation matrices for any column
+      subset and date range without reading the minute data.
+    """
+    return _shared_correlations(name, station_fingerprint(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_sketches(name, fingerprint):
+    return load_station_sketches(station_path(name))
+
+
+def get_sketches(name):
+    """
+    Return the per-day moment and quantile sketches of a station, built once per data version.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - store (SketchStore): Answers means, standard deviations and IQR bounds
+      for any date range without reading the minute data.
+    """
+    return _shared_sketches(name, station_fingerprint(name))
+
+
+def get_group_sketches(names=None):
+    """
+    Return the sketches of several stations pooled into one store.
+
+    Args:
+    - names (list): Station names. Defaults to every configured station.
+
+    Returns:
+    - store (SketchStore): Sketches of all the stations together.
+    """
+    return SketchStore.combine(get_sketches(name) for name in (names or station_names()))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_quality_report(name, fingerprint):
+    return data_quality_report(_load_shared_station(name, fingerprint))
+
+
+def get_quality_report(name):
+    """
+    Return the data-quality report of a station, computed once per data version.
+
+    Args:
+    - name (str): The station name.
+
+    Returns:
+    - report (DataQualityReport): The station's quality report.
+    """
+    return _shared_quality_report(name, station_fingerprint(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _shared_aggregates(name, fingerprint, columns):
+    return load_station_aggregates(station_path(name), columns=list(columns) if columns else None)
+
+
+def get_aggregates(name, columns=None):
+    """
+    Return the daily rollups of a station, computed once per data version.
+
+    Args:
+    - name (str): The station name.
+    - columns (list): Columns to aggregate. Defaults to all numeric columns.
+
+    Returns:
+    - store (AggregateStore): The station's rollups.
+    """
+    return _shared_aggregates(name, station_fingerprint(name), tuple(columns) if columns else None)
+
+
+@st.cache_resource(show_spinner='Preparing station data...', max_entries=8)
+def _shared_all_aggregates(fingerprints, columns):
+    file_paths = {name: station_path(name) for name, _ in fingerprints}
+    return load_aggregates_parallel(file_paths, columns=list(columns) if columns else None)
+
+
+def get_all_aggregates(columns=None):
+    """
+    Return the daily rollups of every configured station.
+
+    Stations are parsed in a process pool and aggregated in a thread pool,
+    so a cold start is bounded by the number of cores rather than stations.
+
+    Args:
+    - columns (list): Columns to aggregate. Defaults to all numeric columns.
+
+    Returns:
+    - aggregates (dict): Station name -> AggregateStore, in configured order.
+    """
+    fingerprints = tuple((name, station_fingerprint(name)) for name in station_names())
+    return _shared_all_aggregates(fingerprints, tuple(columns) if columns else None)
+
+
+@st.cache_resource(show_spinner='Ranking stations...', max_entries=8)
+def _shared_ranking(fingerprints):
+    # From each station's cached daily table, not from the minute data.
+    return rank_station_files({name: station_path(name) for name, _ in fingerprints})
+
+
+def get_ranking():
+    """
+    Return the solar-resource ranking of every configured station.
+
+    Returns:
+    - ranking (pd.DataFrame): One row per station with its metrics, score
+      and rank, best first; see `scripts.ranking.rank_sites`.
+    """
+    fingerprints = tuple((name, station_fingerprint(name)) for name in station_names())
+    return _shared_ranking(fingerprints)
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.station_store import (incremental_cache_path, load_station, parse_appended_rows, pyarrow,
+                                   source_fingerprint, source_state, write_atomically)
+
+IRRADIANCE_COLUMNS = ['GHI', 'DNI', 'DHI']
+STATS = ['sum', 'count', 'sumsq']
+
+
+def daily_rollups(df, columns=None):
+    """
+    Reduce minute data to per-day sum, count and sum of squares.
+
+    Args:
+    - df (pd.DataFrame): Minute data indexed by timestamp.
+    - columns (list): Columns to aggregate. Defaults to all numeric columns.
+
+    Returns:
+    - daily (pd.DataFrame): One row per day, columns ('sum' | 'count' |
+      'sumsq', column).
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    values = df[list(columns)].astype(np.float64)
+    days = values.index.floor('D')
+    grouped = values.groupby(days)
+    daily = pd.concat(
+        {'sum': grouped.sum(), 'count': grouped.count(), 'sumsq': (values ** 2).groupby(days).sum()},
+        axis=1,
+    )
+    daily.index.name = 'Day'
+    return daily
+
+
+def _mean_std(totals):
+    # Sample standard deviation (ddof=1), matching pandas.
+    n = totals['count']
+    mean = totals['sum'] / n
+    var = (totals['sumsq'] - totals['sum'] * mean) / (n - 1)
+    return mean, np.sqrt(var.clip(lower=0))
+
+
+class AggregateStore:
+    """
+    Daily rollups of a station's minute data.
+
+    Stores sum, count and sum of squares per column per day, which is enough
+    to answer mean, standard deviation and daily/monthly series for any date
+    range from a few hundred rows instead of the raw minute data.
+
+    Args:
+    - daily (pd.DataFrame): Rollups as returned by `daily_rollups`.
+    - source (dict): State of the source file the rollups describe, see
+      `station_store.source_state`.
+    """
+
+    def __init__(self, daily, source=None):
+        self.daily = daily.sort_index()
+        self.source = source
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        """
+        Build the store from minute data.
+
+        Args:
+        - df (pd.DataFrame): Minute data indexed by timestamp.
+        - columns (list): Columns to aggregate. Defaults to all numeric columns.
+
+        Returns:
+        - store (AggregateStore): The new store.
+        """
+        return cls(daily_rollups(df, columns))
+
+    @property
+    def columns(self):
+        return list(self.daily['sum'].columns)
+
+    def append(self, df):
+        """
+        Fold newly appended minute data into the rollups.
+
+        Only the days present in `df` are touched: existing days are
+        incremented, new days are added.
+
+        Args:
+        - df (pd.DataFrame): New minute data indexed by timestamp.
+
+        Returns:
+        - store (AggregateStore): This store.
+        """
+        # Columns with no reading in the new rows may have been dropped on parsing.
+        new = daily_rollups(df.reindex(columns=self.columns), self.columns)
+        existing = new.index.intersection(self.daily.index)
+        if len(existing):
+            self.daily.loc[existing] = self.daily.loc[existing] + new.loc[existing]
+        added = new.index.difference(self.daily.index)
+        if len(added):
+            self.daily = pd.concat([self.daily, new.loc[added]]).sort_index()
+        return self
+
+    def _window(self, start=None, end=None):
+        return self.daily.loc[start:end]
+
+    def stats(self, columns=None, start=None, end=None):
+        """
+        Mean and standard deviation over a date range.
+
+        Args:
+        - columns (list): Columns to report. Defaults to all stored columns.
+        - start, end (str or Timestamp): Inclusive date range. Defaults to all data.
+
+        Returns:
+        - stats (pd.DataFrame): Rows 'mean' and 'std', one column per column.
+        """
+        columns = self.columns if columns is None else list(columns)
+        window = self._window(start, end)
+        totals = {stat: window[stat][columns].sum() for stat in STATS}
+        mean, std = _mean_std(totals)
+        return pd.DataFrame({'mean': mean, 'std': std}).T
+
+    def daily_series(self, columns=None, start=None, end=None):
+        """
+        Daily means, the equivalent of `df.resample('D').mean()`.
+
+        Args:
+        - columns (list): Columns to return. Defaults to all stored columns.
+        - start, end (str or Timestamp): Inclusive date range.
+
+        Returns:
+        - daily (pd.DataFrame): One row per day.
+        """
+        columns = self.columns if columns is None else list(columns)
+        window = self._window(start, end)
+        return window['sum'][columns] / window['count'][columns]
+
+    def monthly(self, columns=None):
+        """
+        Monthly mean and standard deviation.
+
+        Args:
+        - columns (list): Columns to return. Defaults to all stored columns.
+
+        Returns:
+        - monthly (pd.DataFrame): One row per month, columns ('mean' | 'std', column).
+        """
+        columns = self.columns if columns is None else list(columns)
+        months = self.daily.index.to_period('M')
+        totals = {stat: self.daily[stat][columns].groupby(months).sum() for stat in STATS}
+        mean, std = _mean_std(totals)
+        return pd.concat({'mean': mean, 'std': std}, axis=1)
+
+    def save(self, path):
+        """
+        Write the rollups to a Parquet file.
+
+        Args:
+        - path (str): The output path.
+        """
+        flat = self.daily.copy()
+        flat.columns = [f'{stat}:{col}' for stat, col in flat.columns]
+        flat.attrs['source'] = self.source
+        flat.to_parquet(path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read rollups written by `save`.
+
+        Args:
+        - path (str): The Parquet file.
+
+        Returns:
+        - store (AggregateStore): The loaded store.
+        """
+        flat = pd.read_parquet(path)
+        source = flat.attrs.pop('source', None)
+        flat.columns = pd.MultiIndex.from_tuples([tuple(c.split(':', 1)) for c in flat.columns])
+        return cls(flat, source)
+
+
+def aggregates_cache_path(file_path, columns=None, cache_dir=None):
+    """
+    Return the rollup file of a station.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - columns (list): Aggregated columns. Defaults to all numeric columns.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - path (Path): Location of the Parquet file (which may not exist yet).
+    """
+    name = 'daily' if columns is None else 'daily-' + '-'.join(columns)
+    return incremental_cache_path(file_path, name, cache_dir)
+
+
+@timed()
+def load_station_aggregates(file_path, columns=None, cache_dir=None):
+    """
+    Return the daily rollups of a station, cached next to the station data.
+
+    When rows were appended to the source since the rollups were saved,
+    only the new rows are parsed and folded in; any other change to the
+    source rebuilds the rollups from the station data.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - columns (list): Columns to aggregate. Defaults to all numeric columns.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - store (AggregateStore): The station's rollups.
+    """
+    if pyarrow is None:
+        return AggregateStore.from_frame(load_station(file_path, columns=columns, cache_dir=cache_dir), columns)
+
+    path = aggregates_cache_path(file_path, columns, cache_dir)
+    store = AggregateStore.load(path) if path.exists() else None
+    if store is not None and store.source is not None:
+        if store.source['fingerprint'] == source_fingerprint(file_path):
+            return store
+    state, offset = source_state(file_path, store.source if store is not None else None)
+    if offset is not None:
+        store.append(parse_appended_rows(file_path, offset, state['size']))
+    else:
+        store = AggregateStore.from_frame(load_station(file_path, columns=columns, cache_dir=cache_dir), columns)
+    store.source = state
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomically(path, store.save)
+    return store
@@ -0,0 +1,314 @@
+"""
+Batch EDA over many station files, without a display.
+
+Runs a pipeline of load -> quality report -> clean -> statistics -> figures
+on every station CSV matched by the inputs, in a process pool, and writes
+the outputs under one directory per station plus a `summary.csv` table:
+
+    python -m scripts.batch_eda data/ --output eda-out
+    python -m scripts.batch_eda 'data/*.csv' --output eda-out --steps clean quality --workers 4
+
+Stations whose source file and pipeline settings are unchanged since the
+last run (as recorded in `manifest.json`) are skipped; `--force` reruns them.
+"""
+import argparse
+import contextlib
+import functools
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+import warnings
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from scripts import eda_helpers  # noqa: E402
+from scripts.parallel import map_stations  # noqa: E402
+from scripts.station_store import load_station, source_fingerprint  # noqa: E402
+
+# Bumped whenever the outputs of a step change, so the next run redoes
+# every station instead of trusting the manifest.
+PIPELINE_VERSION = 1
+
+# In execution order; the quality report describes the data before cleaning.
+STEPS = ['quality', 'clean', 'stats', 'figures']
+
+# Figures drawn with the notebook functions of `eda_helpers`; each draws on
+# fresh pyplot figures, which are saved and closed afterwards.
+FIGURES = {
+    'correlation_heatmap': lambda df: eda_helpers.create_correlation_heatmap(
+        eda_helpers.calculate_correlation_matrix(df)),
+    'pair_plot': eda_helpers.create_pair_plot,
+    'scatter_matrix': eda_helpers.create_scatter_matrix,
+    'polar_plot': eda_helpers.create_polar_plot,
+    'temperature': eda_helpers.analyze_temperature_data,
+    'histograms': eda_helpers.create_histograms,
+    'bubble_charts': lambda df: eda_helpers.create_bubble_charts(df, ['GHI', 'DNI', 'DHI', 'Tamb'], 'RH'),
+    'time_series': eda_helpers.create_time_series_plots,
+}
+
+SUMMARY_COLUMNS = ['station', 'file', 'status', 'rows', 'rows_clean', 'nulls', 'negatives', 'outliers',
+                   'GHI mean', 'DNI mean', 'DHI mean', 'figures', 'seconds', 'error']
+
+MANIFEST_NAME = 'manifest.json'
+SUMMARY_NAME = 'summary.csv'
+
+
+def find_station_files(inputs):
+    """
+    Expand directories and glob patterns into station CSV paths.
+
+    Args:
+    - inputs (list): Directories (all their *.csv files) and/or glob patterns.
+
+    Returns:
+    - files (dict): Station name (file stem) -> path, sorted by name.
+    """
+    files = {}
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.csv'))
+        else:
+            matches = glob.glob(pattern)
+        for match in matches:
+            files[Path(match).stem] = Path(match)
+    return dict(sorted(files.items()))
+
+
+def pipeline_settings(steps, figures, fmt, dpi):
+    """
+    Describe a pipeline configuration, for the manifest.
+
+    Args:
+    - steps (list): Steps to run, a subset of STEPS.
+    - figures (list): Figure names, a subset of FIGURES.
+    - fmt (str): Image format of the figures.
+    - dpi (int): Resolution of the figures.
+
+    Returns:
+    - settings (dict): The settings and their hash under 'hash'.
+    """
+    settings = {
+        'version': PIPELINE_VERSION,
+        'steps': [step for step in STEPS if step in steps],
+        'figures': [name for name in FIGURES if name in figures] if 'figures' in steps else [],
+        'format': fmt,
+        'dpi': dpi,
+    }
+    settings['hash'] = hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+    return settings
+
+
+def save_figures(draw, df, directory, name, fmt='png', dpi=100):
+    """
+    Run a pyplot drawing function headlessly and save what it drew.
+
+    Args:
+    - draw (callable): Function of `df` drawing on new pyplot figures.
+    - df (pd.DataFrame): The station data.
+    - directory (Path): Output directory.
+    - name (str): File name stem; several figures get '-1', '-2', ... suffixes.
+    - fmt (str): Image format.
+    - dpi (int): Resolution for raster formats.
+
+    Returns:
+    - paths (list): The written files.
+    """
+    before = set(plt.get_fignums())
+    try:
+        with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+            # plt.show() is a no-op on the Agg backend but warns about it.
+            warnings.filterwarnings('ignore', message='.*non-interactive.*')
+            draw(df)
+        numbers = [n for n in plt.get_fignums() if n not in before]
+        paths = []
+        for i, number in enumerate(numbers, 1):
+            path = directory / (f'{name}.{fmt}' if len(numbers) == 1 else f'{name}-{i}.{fmt}')
+            plt.figure(number).savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+            paths.append(path)
+        return paths
+    finally:
+        for number in set(plt.get_fignums()) - before:
+            plt.close(number)
+
+
+def _report_text(df, report):
+    # The printed notebook checks, captured as text.
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        eda_helpers.describe_df(df)
+        print()
+        eda_helpers.check_missing_values(df, report)
+        eda_helpers.check_outliers(df, report)
+        eda_helpers.check_incorrect_entries(df, report)
+    return buffer.getvalue()
+
+
+def run_station(item, output_dir, settings, cache_dir=None):
+    """
+    Run the pipeline on one station; runs in a worker process.
+
+    Failures are recorded in the returned row rather than raised, so one
+    bad file does not stop the batch. A figure that cannot be drawn (e.g.
+    a missing column) is reported in 'error' and the other figures are kept.
+
+    Args:
+    - item (tuple): (station name, CSV path).
+    - output_dir (Path): Root output directory; the station writes to
+      `output_dir / name`.
+    - settings (dict): Output of `pipeline_settings`.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - row (dict): The station's summary row, see SUMMARY_COLUMNS.
+    """
+    name, path = item
+    started = time.perf_counter()
+    row = {'station': name, 'file': str(path), 'status': 'done', 'figures': 0}
+    errors = []
+    try:
+        directory = Path(output_dir) / name
+        directory.mkdir(parents=True, exist_ok=True)
+        steps = settings['steps']
+
+        df = load_station(path, cache_dir=cache_dir)
+        row['rows'] = len(df)
+
+        if 'quality' in steps:
+            report = eda_helpers.data_quality_report(df)
+            report.summary().to_csv(directory / 'quality.csv')
+            (directory / 'report.txt').write_text(_report_text(df, report))
+            row['nulls'] = int(report.null_counts.sum())
+            row['negatives'] = int(report.negative_counts.sum())
+            row['outliers'] = int(report.outlier_counts.sum())
+
+        if 'clean' in steps:
+            df, audit = eda_helpers.clean_data(df, return_audit=True)
+            audit.to_csv(directory / 'clean_audit.csv')
+            row['rows_clean'] = len(df)
+
+        if 'stats' in steps:
+            numeric = df.select_dtypes(include='number')
+            numeric.describe().T.to_csv(directory / 'stats.csv')
+            for col in ['GHI', 'DNI', 'DHI']:
+                if col in numeric.columns:
+                    row[f'{col} mean'] = float(numeric[col].mean())
+
+        for figure in settings['figures']:
+            try:
+                row['figures'] += len(save_figures(FIGURES[figure], df, directory, figure,
+                                                   settings['format'], settings['dpi']))
+            except Exception as exc:
+                errors.append(f'{figure}: {type(exc).__name__}: {exc}')
+    except Exception as exc:
+        row['status'] = 'failed'
+        errors.append(f'{type(exc).__name__}: {exc}')
+        traceback.print_exc(file=sys.stderr)
+    row['error'] = '; '.join(errors) or None
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+
+def load_manifest(output_dir):
+    """
+    Read the manifest of a previous run.
+
+    Args:
+    - output_dir (Path): The output directory.
+
+    Returns:
+    - manifest (dict): Station name -> {'fingerprint', 'settings', 'row'};
+      empty when there was no previous run.
+    """
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def run_batch(files, output_dir, settings, max_workers=None, force=False, cache_dir=None):
+    """
+    Run the pipeline on every station whose inputs changed since the last run.
+
+    Args:
+    - files (dict): Station name -> CSV path.
+    - output_dir (Path): Root output directory.
+    - settings (dict): Output of `pipeline_settings`.
+    - max_workers (int): Process pool size. Defaults to the number of CPUs.
+    - force (bool): Rerun stations even if they are unchanged.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - summary (pd.DataFrame): One row per station, see SUMMARY_COLUMNS;
+      also written to `summary.csv` next to the updated manifest.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    fingerprints = {name: source_fingerprint(path) for name, path in files.items()}
+
+    def unchanged(name):
+        entry = manifest.get(name)
+        return (entry is not None and entry['fingerprint'] == fingerprints[name]
+                and entry['settings'] == settings['hash'] and entry['row']['status'] == 'done')
+
+    stale = {name: (name, path) for name, path in files.items() if force or not unchanged(name)}
+    rows = map_stations(functools.partial(run_station, output_dir=output_dir, settings=settings,
+                                          cache_dir=cache_dir),
+                        stale, max_workers, processes=len(stale) > 1 and max_workers != 1)
+
+    summary = []
+    for name in files:
+        if name in rows:
+            row = rows[name]
+            manifest[name] = {'fingerprint': fingerprints[name], 'settings': settings['hash'], 'row': row}
+        else:
+            row = dict(manifest[name]['row'], status='skipped', seconds=0.0)
+        summary.append(row)
+
+    tmp = output_dir / f'{MANIFEST_NAME}.tmp'
+    tmp.write_text(json.dumps(manifest, indent=2, default=str))
+    os.replace(tmp, output_dir / MANIFEST_NAME)
+    summary = pd.DataFrame(summary, columns=SUMMARY_COLUMNS)
+    summary.to_csv(output_dir / SUMMARY_NAME, index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='Station CSV files, directories or glob patterns.')
+    parser.add_argument('--output', required=True, help='Output directory.')
+    parser.add_argument('--steps', nargs='+', choices=STEPS, default=STEPS, help='Pipeline steps to run.')
+    parser.add_argument('--figures', nargs='+', choices=list(FIGURES), default=list(FIGURES),
+                        help='Figures to save when the figures step runs.')
+    parser.add_argument('--format', default='png', help='Image format of the figures.')
+    parser.add_argument('--dpi', type=int, default=100, help='Resolution of the figures.')
+    parser.add_argument('--workers', type=int, help='Process pool size. Defaults to the number of CPUs.')
+    parser.add_argument('--force', action='store_true', help='Rerun stations whose inputs are unchanged.')
+    parser.add_argument('--cache-dir', help='Station cache directory.')
+    args = parser.parse_args(argv)
+
+    files = find_station_files(args.inputs)
+    if not files:
+        parser.error(f'no station CSV files match {args.inputs}')
+    settings = pipeline_settings(args.steps, args.figures, args.format, args.dpi)
+    summary = run_batch(files, args.output, settings, args.workers, args.force, args.cache_dir)
+    print(summary.drop(columns=['file', 'error']).to_string(index=False))
+    failed = summary[summary['status'] == 'failed']
+    for _, row in failed.iterrows():
+        print(f"{row['station']} failed: {row['error']}", file=sys.stderr)
+    return 1 if len(failed) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
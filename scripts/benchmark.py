@@ -0,0 +1,237 @@
+"""
+Benchmarks for the EDA and plotting hot paths.
+
+Runs each benchmark on synthetic station data at 1x, 10x, ... of a real
+station year, measuring wall time and peak traced memory, and writes the
+results as JSON so runs can be compared:
+
+    python -m scripts.benchmark --scales 1 10 --output bench.json
+    python -m scripts.benchmark --scales 1 --compare bench.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from scripts import eda_helpers  # noqa: E402
+from scripts.figures import release_figure  # noqa: E402
+from scripts.rolling import rolling_statistics  # noqa: E402
+from scripts.synthetic import STATION_ROWS, make_station_frame  # noqa: E402
+from scripts.time_index import parse_timestamps  # noqa: E402
+
+PLOTTING_MODULE = Path(__file__).resolve().parents[1] / 'app' / 'utils' / 'plotting.py'
+
+
+def _load_plotting_utils():
+    # app/ is not a package and holds a module named `streamlit`, so load
+    # the plotting module from its file instead of putting app/ on sys.path.
+    spec = importlib.util.spec_from_file_location('_benchmark_plotting', PLOTTING_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PlottingUtils()
+
+
+def _drawn(func):
+    # Figure builders only create artists; rasterising is part of the cost.
+    # Figures are then released, as the dashboard does once they are encoded.
+    def run(*args):
+        result = func(*args)
+        for fig in result if isinstance(result, (list, tuple)) else [result]:
+            fig.canvas.draw()
+            release_figure(fig)
+        return result
+    return run
+
+
+def _quiet(func):
+    def run(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args)
+    return run
+
+
+def build_benchmarks():
+    """
+    Return the benchmark table.
+
+    Returns:
+    - benchmarks (dict): Name -> (setup, func). `setup(df)` returns the
+      arguments of `func` and is not timed.
+    """
+    plotting = _load_plotting_utils()
+    stations = lambda df: (df,)  # noqa: E731
+    benchmarks = {
+        'eda_helpers.clean_data': (stations, eda_helpers.clean_data),
+        'eda_helpers.check_outliers': (stations, _quiet(eda_helpers.check_outliers)),
+        'eda_helpers.data_quality_report': (stations, eda_helpers.data_quality_report),
+        'eda_helpers.calculate_correlation_matrix': (stations, eda_helpers.calculate_correlation_matrix),
+        'eda_helpers.calculate_zscores': (lambda df: (df, ['GHI', 'DNI', 'DHI', 'Tamb']), eda_helpers.calculate_zscores),
+        'rolling.rolling_statistics': (
+            lambda df: (df.set_index(parse_timestamps(df['Timestamp'])), '1h', ['GHI', 'DNI', 'DHI', 'Tamb']),
+            rolling_statistics),
+    }
+    for name in ['create_pair_plot', 'create_scatter_matrix', 'create_polar_plot',
+                 'analyze_temperature_data', 'create_histograms', 'create_time_series_plots']:
+        benchmarks[f'PlottingUtils.{name}'] = (stations, _drawn(getattr(plotting, name)))
+    benchmarks['PlottingUtils.create_bubble_charts'] = (
+        lambda df: (df, ['GHI', 'DNI', 'DHI', 'Tamb'], 'RH'), _drawn(plotting.create_bubble_charts))
+    return benchmarks
+
+
+def measure(setup, func, df, repeat):
+    """
+    Time a benchmark and measure its peak traced memory.
+
+    Args:
+    - setup (callable): Builds the arguments of `func` from `df`.
+    - func (callable): The function under test.
+    - df (pd.DataFrame): Synthetic station data.
+    - repeat (int): Number of timed runs.
+
+    Returns:
+    - result (dict): 'seconds' (all runs), 'seconds_min', 'seconds_median'
+      and 'peak_mb'.
+    """
+    seconds = []
+    for _ in range(repeat):
+        args = setup(df)
+        start = time.perf_counter()
+        func(*args)
+        seconds.append(time.perf_counter() - start)
+        plt.close('all')
+
+    # Memory is measured in a separate run: tracing slows allocation down.
+    args = setup(df)
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        plt.close('all')
+
+    return {
+        'seconds': seconds,
+        'seconds_min': min(seconds),
+        'seconds_median': statistics.median(seconds),
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def run(scales, repeat=3, only=None):
+    """
+    Run the benchmarks at each scale.
+
+    Args:
+    - scales (list): Multiples of one station year (525,600 rows).
+    - repeat (int): Timed runs per benchmark.
+    - only (list): Substrings selecting benchmarks by name. Defaults to all.
+
+    Returns:
+    - report (dict): 'meta' (environment) and 'results' (one entry per
+      benchmark and scale; failures carry an 'error' instead of timings).
+    """
+    benchmarks = build_benchmarks()
+    if only:
+        benchmarks = {name: bench for name, bench in benchmarks.items() if any(o in name for o in only)}
+
+    results = []
+    for scale in scales:
+        n_rows = int(STATION_ROWS * scale)
+        df = make_station_frame(n_rows)
+        for name, (setup, func) in benchmarks.items():
+            entry = {'name': name, 'scale': scale, 'rows': n_rows}
+            try:
+                entry.update(measure(setup, func, df, repeat))
+            except Exception as e:  # a broken hot path is a result, not a crash
+                entry['error'] = f'{type(e).__name__}: {e}'
+            results.append(entry)
+            status = entry.get('error') or f"{entry['seconds_median']:.3f}s, {entry['peak_mb']:.0f} MB"
+            print(f'{name} x{scale}: {status}', file=sys.stderr)
+        del df
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compare a report with a baseline report.
+
+    Args:
+    - report (dict): The current results.
+    - baseline (dict): Earlier results, as written by `run`.
+    - tolerance (float): Allowed relative slowdown / memory growth.
+
+    Returns:
+    - comparison (pd.DataFrame): One row per benchmark and scale present in
+      both, with time and memory ratios and a 'regression' flag.
+    """
+    def table(rep):
+        rows = [r for r in rep['results'] if 'error' not in r]
+        return pd.DataFrame(rows, columns=['name', 'scale', 'seconds_median', 'peak_mb']).set_index(['name', 'scale'])
+
+    current, previous = table(report), table(baseline)
+    joined = current.join(previous, lsuffix='', rsuffix='_baseline', how='inner')
+    joined['time_ratio'] = joined['seconds_median'] / joined['seconds_median_baseline']
+    joined['memory_ratio'] = joined['peak_mb'] / joined['peak_mb_baseline']
+    joined['regression'] = (joined['time_ratio'] > 1 + tolerance) | (joined['memory_ratio'] > 1 + tolerance)
+    return joined
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=float, nargs='+', default=[1], help='Multiples of one station year.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark.')
+    parser.add_argument('--only', nargs='+', help='Only run benchmarks whose name contains one of these.')
+    parser.add_argument('--output', help='Write the JSON results here.')
+    parser.add_argument('--compare', help='Baseline JSON results to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression.')
+    args = parser.parse_args(argv)
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    report = run(scales, repeat=args.repeat, only=args.only)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    # A benchmark that crashes fails the run, like a regression.
+    failed = [entry for entry in report['results'] if 'error' in entry]
+    for entry in failed:
+        print(f"{entry['name']} x{entry['scale']} failed: {entry['error']}", file=sys.stderr)
+
+    if args.compare:
+        comparison = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        print(comparison.to_string())
+        return 1 if failed or comparison['regression'].any() else 0
+    print(json.dumps(report['results'], indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.station_store import derived_cache_path, load_station, pyarrow, write_atomically
+
+# Sufficient statistics kept per day and column pair (i, j), over the rows
+# where both columns are present: the row count, the sum and sum of squares
+# of column i, and the sum of cross products.
+PAIR_STATS = ['n', 'sum', 'sumsq', 'cross']
+
+BLOCK_ROWS = 65_536
+
+# Columns of the default correlation heatmap.
+CORRELATION_COLUMNS = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB']
+
+
+def _pair_statistics(values):
+    # Pairwise-complete sufficient statistics of one block of rows.
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    v = valid.astype(np.float64)
+    return np.stack([v.T @ v, x.T @ v, (x * x).T @ v, x.T @ x])
+
+
+def _pearson(stats):
+    # Correlation matrices from summed statistics of shape (..., 4, k, k).
+    n, s, q, c = (stats[..., i, :, :] for i in range(4))
+    s_t, q_t = np.swapaxes(s, -1, -2), np.swapaxes(q, -1, -2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * c - s * s_t
+        var = (n * q - s * s) * (n * q_t - s_t * s_t)
+        r = cov / np.sqrt(var)
+    r[(n < 2) | ~(var > 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+@timed()
+def daily_pair_statistics(df, columns=None):
+    """
+    Reduce minute data to per-day pairwise sufficient statistics.
+
+    Args:
+    - df (pd.DataFrame): Minute data indexed by timestamp, in time order.
+    - columns (list): Columns to correlate. Defaults to all numeric columns.
+
+    Returns:
+    - days (pd.DatetimeIndex): The days present in the data.
+    - stats (np.ndarray): Array of shape (days, 4, k, k) holding PAIR_STATS.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    values = df[list(columns)].to_numpy(dtype=np.float64)
+    day_index = df.index.floor('D')
+    days, starts = np.unique(day_index.as_unit('ns').asi8, return_index=True)
+    bounds = np.append(starts, len(values))
+    stats = np.empty((len(days), len(PAIR_STATS), len(columns), len(columns)))
+    for d in range(len(days)):
+        stats[d] = _pair_statistics(values[bounds[d]:bounds[d + 1]])
+    return pd.DatetimeIndex(days.astype('datetime64[ns]'), name='Day'), stats
+
+
+@timed()
+def pearson_matrix(df, columns=None):
+    """
+    Pairwise-complete Pearson correlation matrix, like `df.corr()`.
+
+    Computed from four matrix products per block of rows instead of one
+    pass per column pair.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - columns (list): Columns to correlate. Defaults to all numeric columns.
+
+    Returns:
+    - corr (pd.DataFrame): The correlation matrix.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=np.float64)
+    totals = np.zeros((len(PAIR_STATS), len(columns), len(columns)))
+    # Blocks of rows bound the temporaries to a few MB.
+    for lo in range(0, len(values), BLOCK_ROWS):
+        totals += _pair_statistics(values[lo:lo + BLOCK_ROWS])
+    r = _pearson(totals)
+    return pd.DataFrame(r, index=columns, columns=columns)
+
+
+@timed()
+def spearman_matrix(df, columns=None):
+    """
+    Spearman rank correlation matrix, like `df.corr(method='spearman')`.
+
+    Ranks cannot be combined from per-day statistics, so this always reads
+    the rows of the window. Columns are ranked once; when values are
+    missing, pandas' pairwise re-ranking is used instead.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - columns (list): Columns to correlate. Defaults to all numeric columns.
+
+    Returns:
+    - corr (pd.DataFrame): The rank correlation matrix.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    data = df[list(columns)]
+    if data.isnull().to_numpy().any():
+        return data.corr(method='spearman')
+    return pearson_matrix(data.rank(), columns)
+
+
+class CorrelationStore:
+    """
+    Per-day pairwise sufficient statistics of a station's minute data.
+
+    The correlation matrix of any column subset over any range of days is
+    the Pearson formula applied to the summed statistics of those days, so
+    windows and subsets are answered from a few hundred small blocks
+    instead of the raw data. Like `AggregateStore`, days from new data can
+    be folded in.
+
+    Args:
+    - days (pd.DatetimeIndex): One entry per day.
+    - stats (np.ndarray): Shape (days, 4, k, k), see `daily_pair_statistics`.
+    - columns (list): The k columns.
+    """
+
+    def __init__(self, days, stats, columns):
+        order = np.argsort(days)
+        self.days = pd.DatetimeIndex(days[order], name='Day')
+        self.stats = stats[order]
+        self.columns = list(columns)
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        """
+        Build the store from minute data.
+
+        Args:
+        - df (pd.DataFrame): Minute data indexed by timestamp.
+        - columns (list): Columns to correlate. Defaults to all numeric columns.
+
+        Returns:
+        - store (CorrelationStore): The new store.
+        """
+        if columns is None:
+            columns = df.select_dtypes(include='number').columns
+        days, stats = daily_pair_statistics(df, columns)
+        return cls(days, stats, columns)
+
+    def append(self, df):
+        """
+        Fold newly appended minute data into the statistics.
+
+        Args:
+        - df (pd.DataFrame): New minute data indexed by timestamp.
+
+        Returns:
+        - store (CorrelationStore): This store.
+        """
+        days, stats = daily_pair_statistics(df, self.columns)
+        position = self.days.get_indexer(days)
+        existing = position >= 0
+        self.stats[position[existing]] += stats[existing]
+        if (~existing).any():
+            merged = CorrelationStore(self.days.append(days[~existing]),
+                                      np.concatenate([self.stats, stats[~existing]]), self.columns)
+            self.days, self.stats = merged.days, merged.stats
+        return self
+
+    def _select(self, columns):
+        columns = self.columns if columns is None else list(columns)
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            raise KeyError(f"Columns not in the correlation store: {missing}")
+        idx = [self.columns.index(col) for col in columns]
+        return columns, np.ix_(idx, idx)
+
+    def pearson(self, columns=None, start=None, end=None):
+        """
+        Pearson correlation matrix over a date range.
+
+        Args:
+        - columns (list): Columns to correlate. Defaults to all stored columns.
+        - start, end (str or Timestamp): Inclusive date range. Defaults to all data.
+
+        Returns:
+        - corr (pd.DataFrame): The correlation matrix.
+        """
+        columns, block = self._select(columns)
+        lo, hi = self.days.slice_locs(start, end)
+        totals = self.stats[lo:hi].sum(axis=0)
+        r = _pearson(totals[(slice(None),) + block])
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+    def by_period(self, freq='M', columns=None):
+        """
+        One correlation matrix per period, computed in a single batch.
+
+        Args:
+        - freq (str): Period, e.g. 'M' or 'Q'.
+        - columns (list): Columns to correlate. Defaults to all stored columns.
+
+        Returns:
+        - corr (pd.DataFrame): Correlation matrices stacked with a
+          (period, column) index.
+        """
+        columns, block = self._select(columns)
+        codes, periods = pd.factorize(self.days.to_period(freq), sort=True)
+        totals = np.zeros((len(periods),) + self.stats.shape[1:])
+        np.add.at(totals, codes, self.stats)
+        r = _pearson(totals[(slice(None), slice(None)) + block])
+        index = pd.MultiIndex.from_product([periods, columns], names=['Period', 'Column'])
+        return pd.DataFrame(r.reshape(-1, len(columns)), index=index, columns=columns)
+
+    def save(self, path):
+        """
+        Write the statistics to a Parquet file.
+
+        The column names are stored in the file's schema metadata; fields
+        are named by statistic and column position.
+
+        Args:
+        - path (str): The output path.
+        """
+        k = len(self.columns)
+        labels = [f'{stat}:{a}:{b}' for stat in PAIR_STATS for a in range(k) for b in range(k)]
+        flat = pd.DataFrame(self.stats.reshape(len(self.days), -1), index=self.days, columns=labels)
+        flat.attrs['columns'] = self.columns
+        flat.to_parquet(path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read statistics written by `save`.
+
+        Args:
+        - path (str): The Parquet file.
+
+        Returns:
+        - store (CorrelationStore): The loaded store.
+
+        Raises:
+        - ValueError: If the file does not record its columns (written by
+          an older version).
+        """
+        flat = pd.read_parquet(path)
+        columns = flat.attrs.get('columns')
+        if columns is None:
+            raise ValueError(f"{path} does not record its columns.")
+        k = len(columns)
+        return cls(flat.index, flat.to_numpy().reshape(len(flat), len(PAIR_STATS), k, k), columns)
+
+
+@timed()
+def load_station_correlations(file_path, columns=None, cache_dir=None):
+    """
+    Return the correlation statistics of a station, cached next to the station data.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - columns (list): Columns to correlate. Defaults to all numeric columns.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - store (CorrelationStore): The station's correlation statistics.
+    """
+    name = 'pairs' if columns is None else 'pairs-' + '-'.join(columns)
+    path = derived_cache_path(file_path, name, cache_dir)
+    if pyarrow is not None and path.exists():
+        try:
+            return CorrelationStore.load(path)
+        except ValueError:
+            pass
+
+    df = load_station(file_path, columns=columns, cache_dir=cache_dir)
+    store = CorrelationStore.from_frame(df, columns)
+    if pyarrow is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(path, store.save)
+    return store
+
+
+def correlations_by_period(stores, freq='M', columns=None):
+    """
+    Per-period correlation matrices for several stations in one call.
+
+    Args:
+    - stores (dict): Station name -> CorrelationStore.
+    - freq (str): Period, e.g. 'M'.
+    - columns (list): Columns to correlate; must be in every store.
+
+    Returns:
+    - corr (pd.DataFrame): Matrices stacked with a (station, period, column) index.
+    """
+    return pd.concat({name: store.by_period(freq, columns) for name, store in stores.items()},
+                     names=['Station'])
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# Rows kept for one plot, shared by its series: roughly two points per
+# horizontal pixel of a 10-inch, 100 dpi figure.
+DEFAULT_MAX_POINTS = 2000
+
+
+def points_for_width(width_inches, dpi=100):
+    """
+    Number of points worth drawing for a plot of the given width.
+
+    Args:
+    - width_inches (float): Figure width in inches.
+    - dpi (int): Figure resolution.
+
+    Returns:
+    - n_points (int): Two points (a min and a max) per pixel column.
+    """
+    return int(2 * width_inches * dpi)
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Positions of the minimum and maximum of `y` in equal-size buckets.
+
+    Keeps every peak and trough visible at the chosen resolution.
+
+    Args:
+    - y (np.ndarray): The series values; NaNs are ignored.
+    - n_buckets (int): Number of buckets.
+
+    Returns:
+    - idx (np.ndarray): Sorted, unique positions into `y`.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1) + offsets
+    highs = np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1) + offsets
+    idx = np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+    return idx[idx < n]
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Picks, in each bucket, the point forming the largest triangle with the
+    previously selected point and the mean of the next bucket, which keeps
+    the visual shape of the series.
+
+    Args:
+    - x (np.ndarray): Monotonic x positions.
+    - y (np.ndarray): The series values; NaNs are skipped.
+    - n_out (int): Number of points to keep.
+
+    Returns:
+    - idx (np.ndarray): Sorted positions into `y`.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= n_out or n_out < 3:
+        return valid
+    xv, yv = x[valid], y[valid]
+    edges = np.linspace(1, len(valid) - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = len(valid) - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else len(valid)
+        avg_x = xv[next_lo:next_hi].mean()
+        avg_y = yv[next_lo:next_hi].mean()
+        area = np.abs(
+            (xv[prev] - avg_x) * (yv[lo:hi] - yv[prev])
+            - (xv[prev] - xv[lo:hi]) * (avg_y - yv[prev])
+        )
+        prev = lo + int(area.argmax())
+        selected[i + 1] = prev
+    return valid[selected]
+
+
+def decimate_frame(df, columns, max_points=DEFAULT_MAX_POINTS, method='minmax', start=None, end=None,
+                   time_index=None):
+    """
+    Reduce the rows of a time series frame to what a plot can show.
+
+    The frame is first restricted to the [start, end] window. If the window
+    holds at most `max_points` rows the raw data is returned, so zooming in
+    shows every sample; otherwise the budget is split between the columns,
+    each column is decimated to its share and the union of the kept rows is
+    returned. Every column is drawn from the returned rows, so each line has
+    at most `max_points` points.
+
+    Args:
+    - df (pd.DataFrame): The time series, in index order.
+    - columns (list): Columns to preserve the shape of.
+    - max_points (int): Maximum number of rows returned. None disables decimation.
+    - method (str): 'minmax' (per-bucket extremes) or 'lttb'.
+    - start, end: Optional index window, as accepted by `df.loc`.
+    - time_index (TimeIndex): Implicit index of `df`; when given, the window
+      is located by index arithmetic instead of a search over the rows.
+
+    Returns:
+    - plot_df (pd.DataFrame): The rows to plot, without copying unrelated columns.
+    """
+    if time_index is not None:
+        df = df.iloc[time_index.slice(start, end)]
+    elif start is not None or end is not None:
+        df = df.loc[start:end]
+    df = df[list(columns)]
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    share = max(3, max_points // max(1, len(columns)))
+    if method == 'minmax':
+        # Two extremes per bucket, plus the first and last rows.
+        keep = [minmax_indices(df[col].to_numpy(), max(1, (share - 2) // 2)) for col in columns]
+    elif method == 'lttb':
+        if isinstance(df.index, pd.DatetimeIndex):
+            x = df.index.asi8
+        else:
+            x = np.arange(len(df))
+        keep = [lttb_indices(x, df[col].to_numpy(), share) for col in columns]
+    else:
+        raise ValueError(f"Unknown decimation method: {method}")
+    return df.iloc[np.unique(np.concatenate(keep))]
@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LogNorm
+
+DEFAULT_BINS = 100
+DEFAULT_SAMPLE_SIZE = 2000
+
+
+@dataclass
+class Density2D:
+    """
+    2D histogram of one variable pair.
+
+    Attributes:
+    - counts (np.ndarray): Counts of shape (len(xedges) - 1, len(yedges) - 1).
+    - xedges, yedges (np.ndarray): Bin edges along x and y.
+    """
+    counts: np.ndarray
+    xedges: np.ndarray
+    yedges: np.ndarray
+
+
+def column_edges(df, columns, bins=DEFAULT_BINS):
+    """
+    Bin edges spanning the finite range of each column.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - columns (list): Columns to bin.
+    - bins (int): Number of bins per column.
+
+    Returns:
+    - edges (dict): Column -> bin edges.
+    """
+    edges = {}
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        if not np.isfinite(lo) or lo == hi:
+            lo, hi = (0.0, 1.0) if not np.isfinite(lo) else (lo - 0.5, hi + 0.5)
+        edges[col] = np.linspace(lo, hi, bins + 1)
+    return edges
+
+
+def pair_histograms(df, x_cols, y_cols, bins=DEFAULT_BINS):
+    """
+    2D histograms for every (x, y) column pair, plus 1D histograms.
+
+    Each column is converted and binned once, then reused for every pair it
+    takes part in, so a full pair matrix costs one pass per pair over
+    compact integer bin codes.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - x_cols (list): Columns on the x axis.
+    - y_cols (list): Columns on the y axis.
+    - bins (int): Number of bins per column.
+
+    Returns:
+    - pairs (dict): (x_col, y_col) -> Density2D for x_col != y_col.
+    - marginals (dict): Column -> (counts, edges) 1D histogram.
+    """
+    columns = list(dict.fromkeys(list(x_cols) + list(y_cols)))
+    edges = column_edges(df, columns, bins)
+
+    codes, valid = {}, {}
+    marginals = {}
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        valid[col] = ~np.isnan(values)
+        code = np.clip(np.searchsorted(edges[col], values, side='right') - 1, 0, bins - 1)
+        codes[col] = code
+        marginals[col] = (np.bincount(code[valid[col]], minlength=bins), edges[col])
+
+    pairs = {}
+    for y_col in y_cols:
+        for x_col in x_cols:
+            if x_col == y_col:
+                continue
+            both = valid[x_col] & valid[y_col]
+            flat = codes[x_col][both] * bins + codes[y_col][both]
+            counts = np.bincount(flat, minlength=bins * bins).reshape(bins, bins)
+            pairs[(x_col, y_col)] = Density2D(counts, edges[x_col], edges[y_col])
+    return pairs, marginals
+
+
+def stratified_sample(df, n=DEFAULT_SAMPLE_SIZE, by=None, seed=0):
+    """
+    Sample about `n` rows spread evenly over strata.
+
+    Args:
+    - df (pd.DataFrame): The data.
+    - n (int): Approximate number of rows to return.
+    - by (array-like): Stratum of each row. Defaults to the calendar month
+      for a DatetimeIndex, otherwise to 12 equal blocks of rows.
+    - seed (int): Random seed.
+
+    Returns:
+    - sample (pd.DataFrame): The sampled rows, in original order.
+    """
+    if len(df) <= n:
+        return df
+    if by is None:
+        if isinstance(df.index, pd.DatetimeIndex):
+            by = df.index.to_period('M')
+        else:
+            by = np.arange(len(df)) * 12 // len(df)
+    positions = pd.Series(np.arange(len(df))).groupby(np.asarray(by)).sample(
+        frac=n / len(df), random_state=seed)
+    return df.iloc[np.sort(positions.to_numpy())]
+
+
+def draw_density(ax, density, cmap='viridis'):
+    """
+    Draw a 2D histogram on an axes with a log colour scale.
+
+    Args:
+    - ax (matplotlib.axes.Axes): Target axes.
+    - density (Density2D): The histogram.
+    - cmap (str): Colour map.
+
+    Returns:
+    - mesh (QuadMesh): The drawn artist.
+    """
+    counts = np.ma.masked_equal(density.counts.T, 0)
+    norm = LogNorm(vmin=1, vmax=max(1, counts.max())) if counts.count() else None
+    return ax.pcolormesh(density.xedges, density.yedges, counts, cmap=cmap, norm=norm, rasterized=True)
+
+
+def draw_density_grid(axes, pairs, marginals, x_cols, y_cols):
+    """
+    Fill a grid of axes like a pair plot, from precomputed histograms.
+
+    Diagonal cells (same column on both axes) show the 1D histogram.
+
+    Args:
+    - axes (np.ndarray): 2D array of axes, rows = y_cols, columns = x_cols.
+    - pairs, marginals: As returned by `pair_histograms`.
+    - x_cols, y_cols (list): Column names along x and y.
+    """
+    for i, y_col in enumerate(y_cols):
+        for j, x_col in enumerate(x_cols):
+            ax = axes[i, j]
+            if x_col == y_col:
+                counts, edges = marginals[x_col]
+                ax.stairs(counts, edges, fill=True, alpha=0.7)
+            else:
+                draw_density(ax, pairs[(x_col, y_col)])
+            if i == len(y_cols) - 1:
+                ax.set_xlabel(x_col)
+            if j == 0:
+                ax.set_ylabel(y_col)
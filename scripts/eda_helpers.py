@@ -1,21 +1,62 @@
+import warnings
+from dataclasses import dataclass, field
+
 import pandas as pd
 from tabulate import tabulate as tb
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import statsmodels.api as sm
-def read_csv_to_df(file_path):
+from scripts.correlation import CORRELATION_COLUMNS, pearson_matrix, spearman_matrix
+from scripts.decimation import DEFAULT_MAX_POINTS, decimate_frame
+from scripts.density import (DEFAULT_BINS, DEFAULT_SAMPLE_SIZE, draw_density, draw_density_grid,
+                             pair_histograms, stratified_sample)
+from scripts.instrumentation import timed
+from scripts.soiling import daily_performance_ratio, detect_cleaning_events, has_time_axis
+from scripts.station_store import load_station
+from scripts.wind_rose import draw_wind_rose, wind_rose_table
+
+
+def _sketch_window(df, columns, sketches):
+    # Columns a SketchStore can answer for, and the days of `df` to ask about
+    # (all stored days when `df` is not indexed by timestamp). The store
+    # summarises whole days, so it only answers when `df` holds every row of
+    # those days; for a filtered subset (a predicate, daytime rows, a window
+    # starting mid-day) no column is returned and the exact path is used.
+    if sketches is None:
+        return [], None, None
+    covered = [col for col in columns if col in sketches.columns]
+    start = end = None
+    if isinstance(df.index, pd.DatetimeIndex) and len(df):
+        start, end = df.index.min(), df.index.max()
+    if covered:
+        stats = sketches.stats(covered, start, end)
+        rows = (stats['count'] + stats['missing']).to_numpy()
+        present = df[covered].notnull().sum().to_numpy()
+        if (rows != len(df)).any() or (stats['count'].to_numpy() != present).any():
+            return [], None, None
+    return covered, start, end
+
+
+@timed()
+def read_csv_to_df(file_path, columns=None, use_cache=False, cache_dir=None):
     """
     Reads a CSV file into a pandas DataFrame.
 
     Args:
     file_path (str): The path to the CSV file.
+    columns (list): Columns to read. Defaults to all columns.
+    use_cache (bool): Serve the data from the typed columnar station cache,
+        building it on first use. The cached frame is indexed by Timestamp.
+    cache_dir (str): Cache directory used when `use_cache` is set.
 
     Returns:
     pd.DataFrame: A pandas DataFrame containing the data from the CSV file.
     """
     try:
-        df = pd.read_csv(file_path)
+        if use_cache:
+            return load_station(file_path, columns=columns, cache_dir=cache_dir)
+        df = pd.read_csv(file_path, usecols=columns)
         return df
     except FileNotFoundError:
         print(f"File not found at {file_path}. Please check the file path.")
@@ -27,6 +68,7 @@ def read_csv_to_df(file_path):
         print(f"Error parsing file {file_path}: {e}")
         return None
 
+@timed()
 def describe_df(df):
     """
     Describes a pandas DataFrame.
@@ -50,13 +92,13 @@ def describe_df(df):
     print(df.dtypes)
 
     # Get the summary statistics for numeric columns
-    numeric_df = df.select_dtypes(include=['int64', 'float64'])
+    numeric_df = df.select_dtypes(include='number')
     if not numeric_df.empty:
         print("\nSummary Statistics:")
         print(numeric_df.describe())
 
     # Get the unique values for categorical columns
-    categorical_df = df.select_dtypes(include=['object'])
+    categorical_df = df.select_dtypes(include=['object', 'string'])
     if not categorical_df.empty:
         print("\nUnique Values for Categorical Columns:")
         for col in categorical_df.columns:
@@ -69,8 +111,9 @@ def describe_df(df):
         print(missing_values)
     else:
         print("\nNo missing values found.")
-import pandas as pd
 
+
+@timed()
 def summary_statistics(df):
     """
     Generates summary statistics for a pandas DataFrame.
@@ -91,7 +134,7 @@ def summary_statistics(df):
         return
 
     # Get the summary statistics for numeric columns
-    numeric_df = df.select_dtypes(include=['int64', 'float64'])
+    numeric_df = df.select_dtypes(include='number')
     if not numeric_df.empty:
         print("Summary Statistics:")
         print(numeric_df.describe())
@@ -99,7 +142,7 @@ def summary_statistics(df):
         print("No numeric columns found.")
 
     # Get the summary statistics for non-numeric columns
-    non_numeric_df = df.select_dtypes(exclude=['int64', 'float64'])
+    non_numeric_df = df.select_dtypes(exclude='number')
     if not non_numeric_df.empty:
         print("\nNon-Numeric Columns:")
         for col in non_numeric_df.columns:
@@ -112,106 +155,219 @@ def summary_statistics(df):
 
 
 
-def check_missing_values(df):
+@dataclass
+class DataQualityReport:
+    """
+    Structured result of `data_quality_report`.
+
+    Attributes:
+    n_rows (int): Number of rows checked.
+    null_counts (pd.Series): Missing values per column (all columns).
+    negative_counts (pd.Series): Negative values per numeric column.
+    bounds (pd.DataFrame): Q1, Q3 and the 1.5 * IQR lower/upper bounds per
+        numeric column.
+    outlier_counts (pd.Series): Values outside the IQR bounds per numeric column.
+    outlier_index (dict): Index labels of the outlying rows per numeric column.
+    """
+    n_rows: int
+    null_counts: pd.Series
+    negative_counts: pd.Series
+    bounds: pd.DataFrame
+    outlier_counts: pd.Series
+    outlier_index: dict = field(repr=False)
+
+    def summary(self):
+        """
+        Combine the per-column checks into one table.
+
+        Returns:
+        pd.DataFrame: One row per column with null, negative and outlier
+            counts and the IQR bounds.
+        """
+        table = pd.concat(
+            [
+                self.null_counts.rename('nulls'),
+                self.negative_counts.rename('negatives'),
+                self.outlier_counts.rename('outliers'),
+                self.bounds,
+            ],
+            axis=1,
+        )
+        return table
+
+
+@timed()
+def data_quality_report(df, iqr_factor=1.5, sketches=None):
+    """
+    Compute missing values, negative values and IQR outliers in one pass.
+
+    All numeric columns are checked together on a single 2D array, with one
+    quantile call for both quartiles of every column.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to check.
+    iqr_factor (float): Multiplier of the IQR used for the outlier bounds.
+    sketches (SketchStore): Optional per-day sketches of the same data. The
+        quartiles of the columns it covers are then estimated from the
+        sketches of the days in `df` (within the store's reported rank
+        error) instead of sorting every column. Only used when `df` holds
+        every row of those days; a filtered subset, or a window that starts
+        or ends mid-day, takes the exact path. None uses the exact path.
+
+    Returns:
+    DataQualityReport: The structured result.
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError("Input is not a pandas DataFrame.")
+
+    numeric_df = df.select_dtypes(include='number')
+    num_cols = numeric_df.columns
+    values = numeric_df.to_numpy(dtype=np.float64)
+    nan_mask = np.isnan(values)
+
+    null_counts = df.isnull().sum()
+    null_counts[num_cols] = nan_mask.sum(axis=0)
+
+    with np.errstate(invalid='ignore'):
+        negative_counts = pd.Series((values < 0).sum(axis=0), index=num_cols)
+
+    sketched, start, end = _sketch_window(df, num_cols, sketches)
+    exact = [i for i, col in enumerate(num_cols) if col not in sketched]
+    q1 = np.full(len(num_cols), np.nan)
+    q3 = np.full(len(num_cols), np.nan)
+    if len(values) and exact:
+        with warnings.catch_warnings():
+            # All-null columns (e.g. Comments) legitimately have no quartiles.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            subset = values if len(exact) == len(num_cols) else values[:, exact]
+            q1[exact], q3[exact] = np.nanquantile(subset, [0.25, 0.75], axis=0)
+    if sketched:
+        estimated = sketches.bounds(sketched, start, end)
+        position = num_cols.get_indexer(sketched)
+        q1[position] = estimated['q1'].to_numpy()
+        q3[position] = estimated['q3'].to_numpy()
+    iqr = q3 - q1
+    lower = q1 - iqr_factor * iqr
+    upper = q3 + iqr_factor * iqr
+    bounds = pd.DataFrame({'q1': q1, 'q3': q3, 'lower': lower, 'upper': upper}, index=num_cols)
+
+    with np.errstate(invalid='ignore'):
+        outlier_mask = (values < lower) | (values > upper)
+    outlier_counts = pd.Series(outlier_mask.sum(axis=0), index=num_cols)
+    outlier_index = {
+        col: df.index[np.flatnonzero(outlier_mask[:, i])]
+        for i, col in enumerate(num_cols)
+        if outlier_counts.iloc[i]
+    }
+
+    return DataQualityReport(
+        n_rows=len(df),
+        null_counts=null_counts,
+        negative_counts=negative_counts,
+        bounds=bounds,
+        outlier_counts=outlier_counts,
+        outlier_index=outlier_index,
+    )
+
+
+@timed()
+def check_missing_values(df, report=None):
     """
     Checks for missing values in a pandas DataFrame.
 
     Args:
     df (pd.DataFrame): The DataFrame to check for missing values.
+    report (DataQualityReport): A precomputed report to print instead of
+        rescanning `df`.
 
     Returns:
     None
     """
-    missing_values = df.isnull().sum()
+    missing_values = (report if report is not None else data_quality_report(df)).null_counts
     if missing_values.any():
         print("Missing Values:")
         print(missing_values[missing_values > 0])
     else:
         print("No missing values found.")
 
-def check_outliers(df):
+@timed()
+def check_outliers(df, report=None):
     """
     Checks for outliers in numeric columns of a pandas DataFrame.
 
     Args:
     df (pd.DataFrame): The DataFrame to check for outliers.
+    report (DataQualityReport): A precomputed report to print instead of
+        rescanning `df`.
 
     Returns:
     None
     """
-    numeric_df = df.select_dtypes(include=['int64', 'float64'])
-    if not numeric_df.empty:
+    if report is None:
+        report = data_quality_report(df)
+    if not report.outlier_counts.empty:
         print("\nOutliers:")
-        for col in numeric_df.columns:
-            q1 = numeric_df[col].quantile(0.25)
-            q3 = numeric_df[col].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            outliers = numeric_df[(numeric_df[col] < lower_bound) | (numeric_df[col] > upper_bound)]
-            if not outliers.empty:
-                print(f"Column: {col}")
-                print(outliers)
+        for col, count in report.outlier_counts.items():
+            if count:
+                bounds = report.bounds.loc[col]
+                print(f"Column: {col} has {count} outliers outside [{bounds['lower']:.2f}, {bounds['upper']:.2f}]")
             else:
                 print(f"No outliers found in column: {col}")
     else:
         print("No numeric columns found.")
 
-def check_incorrect_entries(df):
+@timed()
+def check_incorrect_entries(df, report=None):
     """
     Checks for incorrect entries (e.g., negative values where only positive should exist) in a pandas DataFrame.
 
     Args:
     df (pd.DataFrame): The DataFrame to check for incorrect entries.
+    report (DataQualityReport): A precomputed report to print instead of
+        rescanning `df`.
 
     Returns:
     None
     """
+    if report is None:
+        report = data_quality_report(df)
     print("\nIncorrect Entries:")
     for col in df.columns:
-        if df[col].dtype.kind in 'bifc':
+        if col in report.negative_counts.index:
             # Check for negative values in columns that should not have them
-            if (df[col] < 0).any():
+            if report.negative_counts[col]:
                 print(f"Column: {col} has negative values.")
             else:
                 print(f"No negative values found in column: {col}")
         elif df[col].dtype.kind == 'O':
             # Check for invalid categories in categorical columns
-            if df[col].isnull().any():
+            if report.null_counts[col]:
                 print(f"Column: {col} has missing values.")
             else:
                 print(f"No missing values found in column: {col}")
         else:
             print(f"Column: {col} has no incorrect entries.")
 
-# def data_quality_check(df):
-#     """
-#     Performs a data quality check on a pandas DataFrame.
-
-#     Args:
-#     df (pd.DataFrame): The DataFrame to perform data quality check on.
-
-#     Returns:
-#     None
-#     """
-#     check_outliers(df)
-#     check_incorrect_entries(df)
 
 
-
-def calculate_correlation_matrix(df):
+@timed()
+def calculate_correlation_matrix(df, columns=CORRELATION_COLUMNS, method='pearson'):
     """
     Calculate the correlation matrix for the given DataFrame.
 
     Args:
     - df (pd.DataFrame): The DataFrame containing the data.
+    - columns (list): Columns to correlate. Defaults to irradiance and module temperatures.
+    - method (str): 'pearson' or 'spearman'.
 
     Returns:
     - corr_matrix (pd.DataFrame): The correlation matrix.
     """
-    corr_df = df[['GHI', 'DNI', 'DHI', 'TModA', 'TModB']]
-    return corr_df.corr()
+    if method == 'spearman':
+        return spearman_matrix(df, columns)
+    return pearson_matrix(df, columns)
 
+@timed()
 def create_correlation_heatmap(corr_matrix):
     """
     Create a heatmap for correlation analysis.
@@ -227,42 +383,65 @@ def create_correlation_heatmap(corr_matrix):
     plt.title('Correlation Analysis')
     plt.show()
 
-def create_pair_plot(df):
+@timed()
+def create_pair_plot(df, density=True, bins=DEFAULT_BINS):
     """
     Create a pair plot for correlation analysis.
 
     Args:
     - df (pd.DataFrame): The DataFrame containing the data.
+    - density (bool): Draw 2D histograms instead of scattering every row.
+    - bins (int): Number of bins per variable in density mode.
 
     Returns:
     - None
     """
-    corr_df = df[['GHI', 'DNI', 'DHI', 'TModA', 'TModB']]
-    plt.figure(figsize=(10, 8))
-    sns.pairplot(corr_df)
-    plt.title('Pair Plot for Correlation Analysis')
+    cols = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB']
+    if density:
+        pairs, marginals = pair_histograms(df, cols, cols, bins)
+        fig, axes = plt.subplots(len(cols), len(cols), figsize=(12, 12))
+        draw_density_grid(axes, pairs, marginals, cols, cols)
+        fig.suptitle('Pair Plot for Correlation Analysis')
+        fig.tight_layout()
+    else:
+        sns.pairplot(df[cols])
+        plt.suptitle('Pair Plot for Correlation Analysis')
     plt.show()
 
-def create_scatter_matrix(df):
+@timed()
+def create_scatter_matrix(df, density=True, bins=DEFAULT_BINS):
     """
     Create a scatter matrix for wind conditions and solar irradiance.
 
     Args:
     - df (pd.DataFrame): The DataFrame containing the data.
+    - density (bool): Draw 2D histograms instead of scattering every row.
+    - bins (int): Number of bins per variable in density mode.
 
     Returns:
     - None
     """
-    scatter_df = df[['WS', 'WSgust', 'WD', 'GHI', 'DNI', 'DHI']]
-    plt.figure(figsize=(10, 8))
-    sns.pairplot(scatter_df, x_vars=['WS', 'WSgust', 'WD'], y_vars=['GHI', 'DNI', 'DHI'], height=4, aspect=0.8)
-    plt.title('Scatter Matrix for Wind Conditions and Solar Irradiance')
+    x_vars = ['WS', 'WSgust', 'WD']
+    y_vars = ['GHI', 'DNI', 'DHI']
+    if density:
+        pairs, marginals = pair_histograms(df, x_vars, y_vars, bins)
+        fig, axes = plt.subplots(len(y_vars), len(x_vars), figsize=(10, 12))
+        draw_density_grid(axes, pairs, marginals, x_vars, y_vars)
+        fig.suptitle('Scatter Matrix for Wind Conditions and Solar Irradiance')
+        fig.tight_layout()
+    else:
+        sns.pairplot(df[x_vars + y_vars], x_vars=x_vars, y_vars=y_vars, height=4, aspect=0.8)
+        plt.suptitle('Scatter Matrix for Wind Conditions and Solar Irradiance')
     plt.show()
 
 
+@timed()
 def create_polar_plot(df, ws_col='WS', wd_col='WD'):
     """
-    Create a polar plot of wind speed and direction distribution.
+    Create a wind rose of wind speed and direction distribution.
+
+    Readings are binned into direction sectors and speed classes, and the
+    rose is drawn as stacked bars from the resulting table.
 
     Parameters:
     df (Pandas DataFrame): Dataset containing wind speed and direction data.
@@ -272,43 +451,53 @@ def create_polar_plot(df, ws_col='WS', wd_col='WD'):
     Returns:
     None
     """
-    # Ensure wd is in radians for plotting
-    df[f'{wd_col}_rad'] = np.radians(df[wd_col])
+    # Count readings per direction sector and speed class
+    table = wind_rose_table(df, ws_col=ws_col, wd_col=wd_col)
 
     # Create a polar plot
     fig = plt.figure(figsize=(8, 8))
     ax = fig.add_subplot(111, polar=True)
 
-    # Plot wind speed and direction
-    ax.scatter(df[f'{wd_col}_rad'], df[ws_col], c=df[ws_col], cmap='viridis', alpha=0.5)
-
-    # Set plot limits and labels
-    ax.set_rlim(0, df[ws_col].max() * 1.1)  # Set y-axis limit to max wind speed
-    ax.set_rticks([max(df[ws_col]) // 4, max(df[ws_col]) // 2, max(df[ws_col]) * 3 // 4])
-    ax.set_rlabel_position(270)
+    # Draw the rose as stacked bars per sector
+    draw_wind_rose(ax, table)
     ax.set_title('Wind Speed and Direction Distribution')
     ax.set_xlabel('Wind Direction (°)', labelpad=20)
 
-    # Add direction labels
-    direction_labels = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-    ax.set_thetagrids(22.5 * np.arange(8), direction_labels)
-
     plt.show()
 
-def analyze_temperature_data(df):
+@timed()
+def analyze_temperature_data(df, density=True, bins=DEFAULT_BINS):
+    """
+    Plot temperature and irradiance against relative humidity and print
+    their correlations.
+
+    Args:
+    - df (pd.DataFrame): The DataFrame containing the data.
+    - density (bool): Draw 2D histograms instead of scattering every row.
+    - bins (int): Number of bins per variable in density mode.
+
+    Returns:
+    - None
+    """
+    y_vars = ['Tamb', 'GHI', 'DNI']
+    if density:
+        pairs, _ = pair_histograms(df, ['RH'], y_vars, bins)
+
     # Create scatter plots
     fig, axes = plt.subplots(nrows=1, ncols=3, figsize=(15, 5))
-    sns.scatterplot(x='RH', y='Tamb', data=df, ax=axes[0])
+    for ax, y_col in zip(axes, y_vars):
+        if density:
+            draw_density(ax, pairs[('RH', y_col)])
+        else:
+            sns.scatterplot(x='RH', y=y_col, data=df, ax=ax)
     axes[0].set_title('Temperature vs Relative Humidity')
     axes[0].set_xlabel('Relative Humidity (%)')
     axes[0].set_ylabel('Temperature (°C)')
 
-    sns.scatterplot(x='RH', y='GHI', data=df, ax=axes[1])
     axes[1].set_title('Global Horizontal Irradiance vs Relative Humidity')
     axes[1].set_xlabel('Relative Humidity (%)')
     axes[1].set_ylabel('Global Horizontal Irradiance (W/m²)')
 
-    sns.scatterplot(x='RH', y='DNI', data=df, ax=axes[2])
     axes[2].set_title('Direct Normal Irradiance vs Relative Humidity')
     axes[2].set_xlabel('Relative Humidity (%)')
     axes[2].set_ylabel('Direct Normal Irradiance (W/m²)')
@@ -321,6 +510,7 @@ def analyze_temperature_data(df):
     print(correlation_matrix)
 
 
+@timed()
 def create_histograms(df):
     # Create a figure with multiple subplots
     fig, axes = plt.subplots(nrows=3, ncols=2, figsize=(15, 10))
@@ -343,55 +533,118 @@ def create_histograms(df):
 
     axes[1, 1].hist(df['WS'], bins=50, alpha=0.5, label='WS')
 
-def calculate_zscores(df, cols, threshold=3):
-    # Calculate Z-scores for each column
-    for col in cols:
-        df[f'{col}_zscore'] = np.abs((df[col] - df[col].mean()) / df[col].std())
+@timed()
+def calculate_zscores(df, cols, threshold=3, sketches=None):
+    """
+    Calculate absolute Z-scores and flag outlying rows.
 
-    # Flag outliers
-    df['outlier'] = np.where(df[[f'{col}_zscore' for col in cols]].max(axis=1) > threshold, 1, 0)
+    The input frame is neither modified nor copied: Z-scores are written
+    into one float32 buffer and returned as a new frame sharing `df.index`.
 
-    return df
+    Args:
+    - df (pd.DataFrame): The DataFrame containing the data.
+    - cols (list): Columns to score.
+    - threshold (float): Rows with any |Z| above this are flagged.
+    - sketches (SketchStore): Optional per-day sketches of the same data;
+      the mean and standard deviation of the columns it covers then come
+      from its per-day moments (exact, without a pass over `df`). Only
+      used when `df` holds every row of the days it spans; for a filtered
+      subset they are computed from `df`, as with None.
 
+    Returns:
+    - zscore_df (pd.DataFrame): '<col>_zscore' columns plus an int8
+      'outlier' flag, indexed like `df`.
+    """
+    # Column-major so each column's Z-scores are contiguous
+    zscores = np.empty((len(df), len(cols)), dtype=np.float32, order='F')
+    sketched, start, end = _sketch_window(df, cols, sketches)
+    moments = sketches.stats(sketched, start, end) if sketched else None
+    for i, col in enumerate(cols):
+        values = df[col].to_numpy()
+        if col in sketched:
+            mean, std = moments.loc[col, 'mean'], moments.loc[col, 'std']
+        else:
+            mean = np.nanmean(values, dtype=np.float64)
+            std = np.nanstd(values, ddof=1, dtype=np.float64)
+        out = zscores[:, i]
+        np.subtract(values, mean, out=out, casting='unsafe')
+        out /= std
+        np.abs(out, out=out)
+
+    # Flag outliers (NaN scores never exceed the threshold)
+    outlier = (zscores > threshold).any(axis=1).astype(np.int8)
+
+    zscore_df = pd.DataFrame(zscores, index=df.index, columns=[f'{col}_zscore' for col in cols], copy=False)
+    zscore_df['outlier'] = outlier
+    return zscore_df
+
+
+@timed()
+def create_bubble_charts(df, cols, bubble_col, density=True, sample_size=DEFAULT_SAMPLE_SIZE, bins=DEFAULT_BINS):
+    """
+    Create bubble charts of irradiance vs. ambient temperature.
+
+    Args:
+    - df (pd.DataFrame): The DataFrame containing the data.
+    - cols (list): Columns of interest (kept for API compatibility).
+    - bubble_col (str): Column giving the bubble size, e.g. 'RH' or 'BP'.
+    - density (bool): Draw a 2D histogram of all rows and overlay bubbles
+      for a stratified sample of `sample_size` rows only.
+    - sample_size (int): Rows drawn as bubbles in density mode.
+    - bins (int): Number of bins per variable in density mode.
+
+    Returns:
+    - None
+    """
+    if density:
+        pairs, _ = pair_histograms(df, ['GHI', 'DNI'], ['Tamb'], bins)
+        points = stratified_sample(df[['GHI', 'DNI', 'Tamb', bubble_col]], sample_size)
+    else:
+        points = df
 
-def create_bubble_charts(df, cols, bubble_col):
     # Create a figure with multiple subplots
     fig, axes = plt.subplots(nrows=2, ncols=2, figsize=(10, 10))
 
-    # Plot bubble chart for GHI vs. Tamb vs. WS with bubble size representing RH or BP
-    axes[0, 0].scatter(df['GHI'], df['Tamb'], s=df[bubble_col] * 10, alpha=0.5, label='GHI vs. Tamb vs. WS')
-    axes[0, 0].set_title(f'GHI vs. Tamb vs. WS with {bubble_col}')
-    axes[0, 0].set_xlabel('GHI (W/m²)')
-    axes[0, 0].set_ylabel('Tamb (°C)')
-
-    # Plot bubble chart for GHI vs. Tamb vs. WS with bubble size representing RH or BP
-    axes[0, 1].scatter(df['GHI'], df['Tamb'], s=df[bubble_col] * 0.1, alpha=0.5, label='GHI vs. Tamb vs. WS')
-    axes[0, 1].set_title(f'GHI vs. Tamb vs. WS with {bubble_col}')
-    axes[0, 1].set_xlabel('GHI (W/m²)')
-    axes[0, 1].set_ylabel('Tamb (°C)')
-
-    # Plot bubble chart for DNI vs. Tamb vs. WS with bubble size representing RH or BP
-    axes[1, 0].scatter(df['DNI'], df['Tamb'], s=df[bubble_col] * 10, alpha=0.5, label='DNI vs. Tamb vs. WS')
-    axes[1, 0].set_title(f'DNI vs. Tamb vs. WS with {bubble_col}')
-    axes[1, 0].set_xlabel('DNI (W/m²)')
-    axes[1, 0].set_ylabel('Tamb (°C)')
-
-    # Plot bubble chart for DNI vs. Tamb vs. WS with bubble size representing RH or BP
-    axes[1, 1].scatter(df['DNI'], df['Tamb'], s=df[bubble_col] * 0.1, alpha=0.5, label='DNI vs. Tamb vs. WS')
-    axes[1, 1].set_title(f'DNI vs. Tamb vs. WS with {bubble_col}')
-    axes[1, 1].set_xlabel('DNI (W/m²)')
-    axes[1, 1].set_ylabel('Tamb (°C)')
+    # Bubble charts for GHI (top row) and DNI (bottom row) vs. Tamb, with
+    # bubble size representing RH or BP at two scales
+    for row, x_col in enumerate(['GHI', 'DNI']):
+        for col, scale in enumerate([10, 0.1]):
+            ax = axes[row, col]
+            if density:
+                draw_density(ax, pairs[(x_col, 'Tamb')], cmap='Greys')
+            ax.scatter(points[x_col], points['Tamb'], s=points[bubble_col] * scale, alpha=0.5, label=f'{x_col} vs. Tamb vs. WS')
+            ax.set_title(f'{x_col} vs. Tamb vs. WS with {bubble_col}')
+            ax.set_xlabel(f'{x_col} (W/m²)')
+            ax.set_ylabel('Tamb (°C)')
 
     plt.tight_layout()
     plt.show()
 
-def create_time_series_plots(df):
+@timed()
+def create_time_series_plots(df, max_points=DEFAULT_MAX_POINTS):
+    """
+    Create line, area and cleaning-impact plots over time.
+
+    The cleaning-impact plot shows the daily ModA/ModB performance ratio
+    (module reading over GHI) with the cleaning events marked. Without
+    timestamps (neither a DatetimeIndex nor a Timestamp column) it plots
+    the ModA/ModB readings of clean and dirty rows instead.
+
+    Args:
+    - df (pd.DataFrame): The DataFrame containing the data, in time order.
+    - max_points (int): Most points drawn per line; the series share this
+      budget in the min/max decimation. None draws every row.
+
+    Returns:
+    - None
+    """
+    series = ['GHI', 'DNI', 'DHI', 'Tamb']
+    plot_df = decimate_frame(df, series, max_points)
+
     # Plot line graphs for GHI, DNI, DHI, and Tamb over time
     plt.figure(figsize=(10, 6))
-    plt.plot(df['GHI'], label='GHI')
-    plt.plot(df['DNI'], label='DNI')
-    plt.plot(df['DHI'], label='DHI')
-    plt.plot(df['Tamb'], label='Tamb')
+    for col in series:
+        plt.plot(plot_df.index, plot_df[col], label=col)
     plt.legend()
     plt.title('Time Series Plot of GHI, DNI, DHI, and Tamb')
     plt.xlabel('Time')
@@ -400,43 +653,76 @@ def create_time_series_plots(df):
 
     # Plot area plots for GHI, DNI, DHI, and Tamb over time
     plt.figure(figsize=(10, 6))
-    plt.fill_between(df.index, df['GHI'], label='GHI')
-    plt.fill_between(df.index, df['DNI'], label='DNI')
-    plt.fill_between(df.index, df['DHI'], label='DHI')
-    plt.fill_between(df.index, df['Tamb'], label='Tamb')
+    for col in series:
+        plt.fill_between(plot_df.index, plot_df[col], label=col)
     plt.legend()
     plt.title('Area Plot of GHI, DNI, DHI, and Tamb')
     plt.xlabel('Time')
     plt.ylabel('Value')
     plt.show()
 
-    # Create a line graph with separate lines for clean and dirty sensors
-    clean_df = df[df['Cleaning'] == 1]
-    dirty_df = df[df['Cleaning'] == 0]
-
     plt.figure(figsize=(10, 6))
-    plt.plot(clean_df.index, clean_df['ModA'], label='Clean ModA')
-    plt.plot(clean_df.index, clean_df['ModB'], label='Clean ModB')
-    plt.plot(dirty_df.index, dirty_df['ModA'], label='Dirty ModA')
-    plt.plot(dirty_df.index, dirty_df['ModB'], label='Dirty ModB')
+    if has_time_axis(df):
+        # Daily module performance ratio, with the cleaning events marked
+        ratios = daily_performance_ratio(df)
+        events = detect_cleaning_events(df)
+        for col in ratios.columns:
+            plt.plot(ratios.index, ratios[col], label=f'{col} / GHI')
+        for i, when in enumerate(events['start']):
+            plt.axvline(when, color='grey', linestyle=':', linewidth=1, label='Cleaning' if i == 0 else None)
+        plt.ylabel('Daily performance ratio')
+    else:
+        # Separate lines for clean and dirty sensors
+        clean_df = df[df['Cleaning'] == 1]
+        dirty_df = df[df['Cleaning'] == 0]
+        plt.plot(clean_df.index, clean_df['ModA'], label='Clean ModA')
+        plt.plot(clean_df.index, clean_df['ModB'], label='Clean ModB')
+        plt.plot(dirty_df.index, dirty_df['ModA'], label='Dirty ModA')
+        plt.plot(dirty_df.index, dirty_df['ModB'], label='Dirty ModB')
+        plt.ylabel('Value')
     plt.legend()
     plt.title('Impact of Cleaning on Sensor Readings')
     plt.xlabel('Time')
-    plt.ylabel('Value')
     plt.show()
 
 
 
 
-def clean_data(df):
+@timed()
+def clean_data(df, return_audit=False, sketches=None):
     """
     Clean the input DataFrame by handling missing values and anomalies.
 
+    Drops an all-null Comments column, imputes numeric columns with their
+    mean, forward fills the other columns and drops rows outside the
+    1.5 * IQR bounds (computed after imputation) of any numeric column.
+
+    The numeric columns are imputed into one column-major buffer, whose
+    quartiles come from a single `np.quantile` call that partitions it in
+    place; the kept rows are then compacted back into the same buffer,
+    which backs the returned frame. The input frame is not modified.
+
+    For files that do not fit in memory, use
+    `scripts.streaming.clean_csv_streaming`, which applies the same steps
+    chunk by chunk.
+
     Args:
     - df (pd.DataFrame): Input DataFrame to be cleaned.
+    - return_audit (bool): Also return the per-column audit.
+    - sketches (SketchStore): Optional per-day sketches of the same data.
+      The IQR bounds of the columns it covers are then estimated from the
+      sketches (with missing values counted at the mean, as below) instead
+      of partitioning the buffer. Only used when `df` holds every row of
+      the days it spans; a filtered subset (e.g. a wind speed predicate or
+      daytime rows) takes the exact path, as does None.
 
     Returns:
     - cleaned_df (pd.DataFrame): Cleaned DataFrame.
+    - audit (pd.DataFrame): Only if `return_audit`. One row per column with
+      the imputation value ('mean'), IQR bounds ('lower', 'upper'), number
+      of values imputed ('imputed') and number of rows outside the bounds
+      ('rejected'); rows read and kept are in `attrs['rows_in']` and
+      `attrs['rows_out']`.
     """
 
     # Check if the input is a pandas DataFrame
@@ -449,26 +735,96 @@ def clean_data(df):
             df = df.drop('Comments', axis=1)
 
     # Identify numerical and categorical columns
-    num_cols = df.select_dtypes(include=['int64', 'float64']).columns
-    cat_cols = df.select_dtypes(include=['object']).columns
-
-    # Mean imputation for numerical columns
-    df[num_cols] = df[num_cols].fillna(df[num_cols].mean())
-
-    # Forward fill for categorical columns
-    df[cat_cols] = df[cat_cols].fillna(method='ffill')
-
-    # Handle anomalies in numerical columns
-    mask = np.ones(len(df), dtype=bool)
+    num_cols = list(df.select_dtypes(include='number').columns)
+    cat_cols = list(df.select_dtypes(include=['object', 'string']).columns)
+
+    # Mean imputation into one column-major buffer. Float32 holds small
+    # integers and float32 sensors exactly; anything wider needs float64.
+    n_rows = len(df)
+    dtype = np.result_type(*[df[col].dtype for col in num_cols], np.float32)
+    values = np.empty((n_rows, len(num_cols)), dtype=dtype, order='F')
+    means = np.full(len(num_cols), np.nan)
+    imputed = np.zeros(len(num_cols), dtype=np.int64)
+    for j, col in enumerate(num_cols):
+        column = values[:, j]
+        column[:] = df[col].to_numpy()
+        missing = np.isnan(column)
+        imputed[j] = missing.sum()
+        if imputed[j] < n_rows:
+            column[missing] = 0
+            means[j] = column.sum(dtype=np.float64) / (n_rows - imputed[j])
+        column[missing] = means[j]
+    fill = means.astype(dtype)
+
+    # IQR bounds of every column in one call, partitioning the buffer in place
+    sketched, start, end = _sketch_window(df, num_cols, sketches)
+    exact = [j for j, col in enumerate(num_cols) if col not in sketched]
+    Q1 = np.full(len(num_cols), np.nan, dtype=dtype)
+    Q3 = np.full(len(num_cols), np.nan, dtype=dtype)
+    with warnings.catch_warnings():
+        # All-null columns have no quartiles; they reject every row, as before.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if n_rows and exact:
+            subset = values if len(exact) == len(num_cols) else values[:, exact]
+            Q1[exact], Q3[exact] = np.quantile(subset, [0.25, 0.75], axis=0, overwrite_input=True)
+    if sketched:
+        estimated = sketches.bounds(sketched, start, end, impute=True)
+        position = [num_cols.index(col) for col in sketched]
+        Q1[position] = estimated['q1'].to_numpy()
+        Q3[position] = estimated['q3'].to_numpy()
+    IQR = Q3 - Q1
+    lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+
+    # Anomaly mask; an imputed value is inside the bounds if the mean is
+    mask = np.ones(n_rows, dtype=bool)
+    rejected = np.zeros(len(num_cols), dtype=np.int64)
+    fill_inside = (fill >= lower) & (fill <= upper)
+    for j, col in enumerate(num_cols):
+        original = df[col].to_numpy()
+        inside = (original >= lower[j]) & (original <= upper[j])
+        if imputed[j] and fill_inside[j]:
+            inside |= np.isnan(original)
+        rejected[j] = n_rows - inside.sum()
+        mask &= inside
+
+    # One compaction: the kept rows are written back into the buffer
+    n_kept = int(mask.sum())
+    kept = values[:n_kept]
+    for j, col in enumerate(num_cols):
+        column = kept[:, j]
+        column[:] = df[col].to_numpy()[mask]
+        if imputed[j]:
+            column[np.isnan(column)] = fill[j]
+    cleaned_df = pd.DataFrame(kept, index=df.index[mask], columns=num_cols, copy=False)
     for col in num_cols:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        mask = mask & ((df[col] >= (Q1 - 1.5 * IQR)) & (df[col] <= (Q3 + 1.5 * IQR)))
-
-    df = df[mask]
-
-    return df
+        if df[col].dtype != dtype:
+            cleaned_df[col] = cleaned_df[col].astype(df[col].dtype)
+    for col in df.columns:
+        if col in num_cols:
+            continue
+        # Forward fill for categorical columns; the dtype is passed on so
+        # object columns are not inferred as strings.
+        column = df[col].ffill() if col in cat_cols else df[col]
+        cleaned_df[col] = pd.Series(column.array[mask], index=cleaned_df.index, dtype=column.dtype, copy=False)
+    if list(cleaned_df.columns) != list(df.columns):
+        cleaned_df = cleaned_df[list(df.columns)]
+
+    if not return_audit:
+        return cleaned_df
+
+    audit = pd.DataFrame({
+        'mean': means,
+        'lower': lower.astype(np.float64),
+        'upper': upper.astype(np.float64),
+        'imputed': imputed,
+        'rejected': rejected,
+    }, index=pd.Index(num_cols))
+    filled = pd.DataFrame({'imputed': [int(df[col].isnull().sum() - df[col].ffill().isnull().sum()) for col in cat_cols],
+                           'rejected': 0}, index=pd.Index(cat_cols))
+    audit = pd.concat([audit, filled]) if cat_cols else audit
+    audit.attrs['rows_in'] = len(df)
+    audit.attrs['rows_out'] = n_kept
+    return cleaned_df, audit
 
 
 
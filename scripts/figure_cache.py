@@ -0,0 +1,246 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from scripts.figures import DENSE_ARTIST_POINTS, VECTOR_FORMATS, rasterize_dense_artists, release_figure
+from scripts.station_store import write_atomically
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+
+def figure_to_bytes(fig, fmt='png', dpi=100, rasterize_above=DENSE_ARTIST_POINTS):
+    """
+    Render a figure to image bytes and release it.
+
+    Args:
+    - fig (matplotlib.figure.Figure): The figure to render.
+    - fmt (str): Image format, e.g. 'png' or 'svg'.
+    - dpi (int): Resolution for raster formats and rasterized artists.
+    - rasterize_above (int): In vector formats, rasterize lines and
+      collections with at least this many points, see
+      `figures.rasterize_dense_artists`. None keeps everything vector.
+
+    Returns:
+    - data (bytes): The encoded image.
+    """
+    try:
+        if rasterize_above is not None and fmt in VECTOR_FORMATS:
+            rasterize_dense_artists(fig, rasterize_above)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        release_figure(fig)
+
+
+def render_images(render, fmt='png'):
+    """
+    Build one or more figures and render them to image bytes.
+
+    Args:
+    - render (callable): Builds a figure or a list of figures.
+    - fmt (str): Image format.
+
+    Returns:
+    - images (list): The image bytes, one per figure.
+    """
+    figs = render()
+    if not isinstance(figs, (list, tuple)):
+        figs = [figs]
+    return [figure_to_bytes(fig, fmt=fmt) for fig in figs]
+
+
+class FigureCache:
+    """
+    Two-level LRU cache of rendered figures.
+
+    Images are kept in memory up to `max_memory_bytes` and, when a directory
+    is given, on disk up to `max_disk_bytes`; the least recently used images
+    are evicted first. Keys are built with `make_key` from the station, plot
+    kind, plot parameters and dataset fingerprint, so a new data version
+    never serves a stale image. Safe to share between threads/sessions, and
+    between processes using the same directory: every write goes through a
+    temporary file of its own.
+
+    A multi-figure entry is stored as one image per figure plus a small
+    JSON manifest recording the number of figures, written last.
+
+    Args:
+    - directory (str): Directory for the on-disk level. None keeps images in memory only.
+    - max_memory_bytes (int): Size cap of the in-memory level.
+    - max_disk_bytes (int): Size cap of the on-disk level.
+    - fmt (str): Image format of cached figures.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_DISK_BYTES, fmt='png'):
+        self.directory = Path(directory) if directory is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.fmt = fmt
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(station, kind, params=None, fingerprint=None):
+        """
+        Build a cache key.
+
+        Args:
+        - station (str): The station name.
+        - kind (str): The plot kind.
+        - params (dict): Parameters that change the rendered image.
+        - fingerprint (str): Version of the underlying data.
+
+        Returns:
+        - key (str): A hexadecimal key.
+        """
+        payload = json.dumps([station, kind, params or {}, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f'{key}.{self.fmt}'
+
+    def _manifest_path(self, key):
+        return self.directory / f'{key}.json'
+
+    def get(self, key):
+        """
+        Return the cached image for a key, or None.
+
+        Args:
+        - key (str): The cache key.
+
+        Returns:
+        - data (bytes): The image, or None on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        Store an image under a key.
+
+        Args:
+        - key (str): The cache key.
+        - data (bytes): The image.
+        """
+        self._remember(key, data)
+        if self.directory is not None:
+            write_atomically(self._path(key), lambda path: Path(path).write_bytes(data))
+            self._evict_disk()
+
+    def get_images(self, key):
+        """
+        Return the cached images of a multi-figure entry, or None.
+
+        Args:
+        - key (str): The cache key.
+
+        Returns:
+        - images (list): The image bytes, one per figure, or None on a miss.
+        """
+        count = self._image_count(key)
+        if count is None:
+            return None
+        images = [self.get(f'{key}-{i}') for i in range(count)]
+        if any(image is None for image in images):
+            return None
+        return images
+
+    def put_images(self, key, images):
+        """
+        Store the images of a multi-figure entry.
+
+        Args:
+        - key (str): The cache key.
+        - images (list): The image bytes, one per figure.
+        """
+        for i, image in enumerate(images):
+            self.put(f'{key}-{i}', image)
+        with self._lock:
+            self._counts[key] = len(images)
+        if self.directory is not None:
+            manifest = json.dumps({'count': len(images)})
+            write_atomically(self._manifest_path(key), lambda path: Path(path).write_text(manifest))
+
+    def _image_count(self, key):
+        # Number of figures of a multi-figure entry, None if it was never stored.
+        with self._lock:
+            count = self._counts.get(key)
+        if count is not None or self.directory is None:
+            return count
+        try:
+            count = int(json.loads(self._manifest_path(key).read_text())['count'])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        with self._lock:
+            self._counts[key] = count
+        return count
+
+    def get_or_render(self, key, render):
+        """
+        Return cached images, rendering and storing them on a miss.
+
+        Args:
+        - key (str): The cache key.
+        - render (callable): Builds a figure or a list of figures.
+
+        Returns:
+        - images (list): The image bytes, one per figure.
+        """
+        images = self.get_images(key)
+        if images is None:
+            images = render_images(render, self.fmt)
+            self.put_images(key, images)
+        return images
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        files = []
+        for path in self.directory.glob(f'*.{self.fmt}'):
+            try:
+                files.append((path.stat(), path))
+            except FileNotFoundError:
+                # Evicted concurrently by another session.
+                continue
+        total = sum(stat.st_size for stat, _ in files)
+        if total <= self.max_disk_bytes:
+            return
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            path.unlink(missing_ok=True)
+            # An entry missing one of its figures is a miss; drop its manifest too.
+            self._manifest_path(path.stem.rsplit('-', 1)[0]).unlink(missing_ok=True)
+            total -= stat.st_size
+            if total <= self.max_disk_bytes:
+                break
@@ -0,0 +1,211 @@
+import threading
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Lines and collections with at least this many points are rasterized when
+# a figure is saved in a vector format; below it they stay vector.
+DENSE_ARTIST_POINTS = 10_000
+VECTOR_FORMATS = {'svg', 'pdf', 'eps', 'ps'}
+
+
+def new_figure(figsize=None, dpi=100, layout=None):
+    """
+    Create a figure on its own Agg canvas, outside pyplot.
+
+    pyplot keeps every figure it creates in a global registry until
+    `plt.close` is called, and serialises figure creation behind a global
+    lock. A figure made here is owned by the caller only: it is freed with
+    its last reference and sessions can build figures in parallel.
+
+    Args:
+    - figsize (tuple): Width and height in inches.
+    - dpi (int): Resolution.
+    - layout (str): Layout engine, e.g. 'constrained'.
+
+    Returns:
+    - fig (matplotlib.figure.Figure): The figure.
+    """
+    fig = Figure(figsize=figsize, dpi=dpi, layout=layout)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def subplots(nrows=1, ncols=1, figsize=None, dpi=100, layout=None, squeeze=True, **subplot_kw):
+    """
+    Object-oriented `plt.subplots`: a new figure and a grid of axes.
+
+    Args:
+    - nrows, ncols (int): Grid shape.
+    - figsize (tuple): Width and height in inches.
+    - dpi (int): Resolution.
+    - layout (str): Layout engine, e.g. 'constrained'.
+    - squeeze (bool): As in `plt.subplots`.
+    - **subplot_kw: Passed to every axes, e.g. projection='polar'.
+
+    Returns:
+    - fig (matplotlib.figure.Figure): The figure.
+    - axes (Axes or np.ndarray): The axes.
+    """
+    fig = new_figure(figsize, dpi, layout)
+    axes = fig.subplots(nrows, ncols, squeeze=squeeze, subplot_kw=subplot_kw or None)
+    return fig, axes
+
+
+def _artist_points(artist):
+    if hasattr(artist, 'get_xydata'):
+        return len(artist.get_xydata())
+    if hasattr(artist, 'get_offsets') and len(artist.get_offsets()):
+        return len(artist.get_offsets())
+    if hasattr(artist, 'get_paths'):
+        return sum(len(path.vertices) for path in artist.get_paths())
+    return 0
+
+
+def rasterize_dense_artists(fig, min_points=DENSE_ARTIST_POINTS):
+    """
+    Rasterize the lines and collections of a figure that have many points.
+
+    In vector formats every point of a long time series or scatter is
+    written as a path node, which makes files large and slow to display;
+    rasterized artists are embedded as one image at the save resolution,
+    while axes, labels and sparse artists stay vector. No effect on raster
+    formats.
+
+    Args:
+    - fig (matplotlib.figure.Figure): The figure.
+    - min_points (int): Artists with at least this many points are rasterized.
+
+    Returns:
+    - rasterized (int): Number of artists switched to rasterized.
+    """
+    rasterized = 0
+    for ax in fig.axes:
+        for artist in list(ax.lines) + list(ax.collections):
+            if not artist.get_rasterized() and _artist_points(artist) >= min_points:
+                artist.set_rasterized(True)
+                rasterized += 1
+    return rasterized
+
+
+class FigureTemplate:
+    """
+    Pool of figures with a fixed layout, reused between renders.
+
+    Creating a figure and its axes grid costs more than drawing simple
+    data on it. A template builds the figure and its fixed decorations
+    (titles, axis labels) once; `acquire` hands out an idle figure and
+    `release_figure` removes the data artists and returns it to the pool,
+    keeping the decorations. A figure is only reused after it has been
+    released, so each one is used by one render at a time.
+
+    Args:
+    - nrows, ncols (int): Grid shape.
+    - figsize (tuple): Width and height in inches.
+    - dpi (int): Resolution.
+    - layout (str): Layout engine, e.g. 'constrained'. The layout is
+      computed when the figure is drawn, so it accounts for the data and
+      labels of each render; `tight_layout` in `setup` would only see the
+      empty template.
+    - setup (callable): Called with (fig, axes) once per new figure to
+      draw the fixed decorations.
+    - max_idle (int): Idle figures kept; more released figures are freed.
+    - **subplot_kw: Passed to every axes.
+    """
+
+    def __init__(self, nrows=1, ncols=1, figsize=None, dpi=100, layout=None, setup=None, max_idle=4, **subplot_kw):
+        self.nrows = nrows
+        self.ncols = ncols
+        self.figsize = figsize
+        self.dpi = dpi
+        self.layout = layout
+        self.setup = setup
+        self.max_idle = max_idle
+        self.subplot_kw = subplot_kw
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Return an idle figure of the template, building one if none is idle.
+
+        Returns:
+        - fig (matplotlib.figure.Figure): The figure, to be passed to
+          `release_figure` (e.g. via `figure_to_bytes`) when rendered.
+        - axes (np.ndarray): Its axes, shaped (nrows, ncols).
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        fig, axes = subplots(self.nrows, self.ncols, self.figsize, self.dpi, self.layout, squeeze=False,
+                             **self.subplot_kw)
+        if self.setup is not None:
+            self.setup(fig, axes)
+        fig._template = (self, axes)
+        return fig, axes
+
+    def release(self, fig):
+        """
+        Clear the data of a figure and return it to the pool.
+
+        Args:
+        - fig (matplotlib.figure.Figure): A figure from `acquire`.
+        """
+        _, axes = fig._template
+        for ax in fig.axes:
+            for artist in list(ax.lines) + list(ax.collections) + list(ax.patches) + list(ax.images):
+                artist.remove()
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+            ax.relim()
+            ax.autoscale_view()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((fig, axes))
+                return
+        del fig._template
+        fig.clear()
+
+
+def release_figure(fig):
+    """
+    End the life of a rendered figure.
+
+    Template figures go back to their pool, figures registered with pyplot
+    (e.g. from seaborn's figure-level functions) are closed, and other
+    figures are cleared so their artists are freed at once.
+
+    Args:
+    - fig (matplotlib.figure.Figure): The figure; unusable afterwards.
+    """
+    template = getattr(fig, '_template', None)
+    if template is not None:
+        template[0].release(fig)
+    elif getattr(fig.canvas, 'manager', None) is not None:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    else:
+        fig.clear()
+
+
+def histogram_stairs(ax, values, bins=50, **kwargs):
+    """
+    Draw a filled histogram as a single step artist.
+
+    Looks like `ax.hist(values, bins)` but bins with `np.histogram` and
+    draws one artist instead of one rectangle per bin. Missing values are
+    skipped.
+
+    Args:
+    - ax (matplotlib.axes.Axes): Target axes.
+    - values (array-like): The data.
+    - bins (int): Number of bins.
+    - **kwargs: Passed to `ax.stairs`, e.g. alpha and label.
+
+    Returns:
+    - artist (StepPatch): The drawn artist.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    return ax.stairs(counts, edges, fill=True, **kwargs)
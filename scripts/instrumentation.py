@@ -0,0 +1,213 @@
+import contextvars
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# JSON-lines file receiving one record per profiled page render.
+PROFILE_LOG_ENV = 'SOLAR_PROFILE_LOG'
+
+_active_profile = contextvars.ContextVar('solar_active_profile', default=None)
+_depth = contextvars.ContextVar('solar_span_depth', default=0)
+
+
+def _rss_bytes():
+    # Resident set size of this process, or None where it is not available.
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+@dataclass
+class Span:
+    """
+    One timed section of a profiled run.
+
+    Attributes:
+    - name (str): What was timed.
+    - start (float): Seconds since the profile started.
+    - seconds (float): Wall time.
+    - rows (int): Rows processed, if known.
+    - memory_delta (int): Change in resident memory in bytes, if known.
+    - depth (int): Nesting level; 0 for top-level spans.
+    """
+    name: str
+    start: float
+    seconds: float
+    rows: int = None
+    memory_delta: int = None
+    depth: int = 0
+
+
+@dataclass
+class Profile:
+    """
+    The spans recorded while a profile is active.
+
+    Attributes:
+    - name (str): What is being profiled, e.g. the page.
+    - spans (list): Recorded spans in completion order.
+    """
+    name: str
+    spans: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    _token: object = field(default=None, repr=False)
+
+    def to_frame(self):
+        """
+        Return the spans as a table ordered by start time.
+
+        Returns:
+        - df (pd.DataFrame): One row per span; memory in MB.
+        """
+        df = pd.DataFrame([asdict(s) for s in self.spans],
+                          columns=['name', 'start', 'seconds', 'rows', 'memory_delta', 'depth'])
+        df['memory_delta_mb'] = df.pop('memory_delta') / 2 ** 20
+        df['name'] = ['  ' * depth + name for depth, name in zip(df['depth'], df['name'])]
+        return df.sort_values('start').drop(columns='depth').reset_index(drop=True)
+
+    def to_record(self):
+        """
+        Return the profile as a JSON-serialisable record.
+
+        Returns:
+        - record (dict): Name, timestamp, total seconds and spans.
+        """
+        return {
+            'name': self.name,
+            'time': datetime.now(timezone.utc).isoformat(),
+            'seconds': time.perf_counter() - self.started,
+            'spans': [asdict(s) for s in self.spans],
+        }
+
+
+def start_profile(name):
+    """
+    Start recording spans in the current context.
+
+    Prefer the `profile` context manager, which calls `finish_profile` even
+    when the profiled code raises; a profile left open stays active in the
+    context until the next `start_profile`.
+
+    Args:
+    - name (str): What is being profiled.
+
+    Returns:
+    - profile (Profile): The profile being recorded.
+    """
+    current = Profile(name)
+    current._token = _active_profile.set(current)
+    return current
+
+
+def finish_profile(current, log_path=None):
+    """
+    Stop recording and append the profile to the JSON-lines sink.
+
+    The sink is `log_path`, defaulting to the SOLAR_PROFILE_LOG environment
+    variable; nothing is written when neither is set.
+
+    Args:
+    - current (Profile): The profile returned by `start_profile`.
+    - log_path (str): JSON-lines sink.
+    """
+    _active_profile.reset(current._token)
+    log_path = log_path or os.environ.get(PROFILE_LOG_ENV)
+    if log_path:
+        with open(log_path, 'a') as f:
+            f.write(json.dumps(current.to_record(), default=str) + '\n')
+
+
+@contextmanager
+def profile(name, log_path=None):
+    """
+    Record every span entered in this context (and its callees).
+
+    Spans run in worker threads or processes are not captured.
+
+    Args:
+    - name (str): What is being profiled.
+    - log_path (str): JSON-lines sink, see `finish_profile`.
+
+    Yields:
+    - profile (Profile): The profile being recorded.
+    """
+    current = start_profile(name)
+    try:
+        yield current
+    finally:
+        finish_profile(current, log_path)
+
+
+@contextmanager
+def span(name, rows=None):
+    """
+    Time a section of code, if a profile is active.
+
+    Costs a context-variable lookup when no profile is active.
+
+    Args:
+    - name (str): What is being timed.
+    - rows (int): Rows processed, if known.
+    """
+    current = _active_profile.get()
+    if current is None:
+        yield
+        return
+
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        rss_after = _rss_bytes()
+        _depth.reset(token)
+        current.spans.append(Span(
+            name=name,
+            start=start - current.started,
+            seconds=seconds,
+            rows=rows,
+            memory_delta=None if rss_before is None or rss_after is None else rss_after - rss_before,
+            depth=depth,
+        ))
+
+
+def timed(name=None):
+    """
+    Decorator recording each call as a span.
+
+    The row count is taken from the first DataFrame argument.
+
+    Args:
+    - name (str): Span name. Defaults to '<module>.<qualified name>'.
+
+    Returns:
+    - decorator (callable): The decorator.
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_profile.get() is None:
+                return func(*args, **kwargs)
+            rows = next((len(a) for a in args if isinstance(a, pd.DataFrame)), None)
+            with span(span_name, rows=rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,228 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+JOB_COLUMNS = ['key', 'label', 'state', 'owners', 'seconds']
+
+
+@dataclass(eq=False)
+class Job:
+    """
+    One analysis submitted to a `JobQueue`.
+
+    Attributes:
+    - key (str): Identity of the work; equal keys are computed once.
+    - label (str): Human-readable description, e.g. 'Benin: Pair Plot'.
+    - future (concurrent.futures.Future): The result, set when the job finishes.
+    - owners (set): Sessions waiting for the result.
+    - submitted (float): `time.perf_counter()` at submission.
+    """
+    key: str
+    label: str
+    future: Future = field(default_factory=Future)
+    owners: set = field(default_factory=set)
+    submitted: float = field(default_factory=time.perf_counter)
+    call: tuple = field(default=None, repr=False)
+    on_done: object = field(default=None, repr=False)
+
+    @property
+    def state(self):
+        if self.future.cancelled():
+            return 'cancelled'
+        if self.future.done():
+            return 'failed' if self.future.exception() is not None else 'done'
+        return 'running' if self.future.running() else 'pending'
+
+
+class JobQueue:
+    """
+    Process pool running independent analyses, with a table of in-flight jobs.
+
+    Jobs are identified by a key (e.g. a `FigureCache` key). Submitting a
+    key that is already pending or running, from any session, attaches to
+    the existing job instead of computing it again. Each job runs in its own
+    worker, so jobs finish in whatever order they complete and a slow one
+    only holds up its own worker; throughput grows with the pool size.
+
+    Jobs wait in the queue, in submission order, until a worker is free;
+    the pool's own queue is never filled ahead, so a waiting job can always
+    be cancelled. Cancelling removes the caller from a job's owners; once no
+    owner is left, a job that has not started is dropped. Worker processes
+    cannot be interrupted, so a job that is already running finishes in the
+    background. A job stays in the table until it finishes.
+
+    Args:
+    - max_workers (int): Pool size. Defaults to the number of CPUs.
+    - mp_context (multiprocessing.context.BaseContext): Start method of the
+      workers. Defaults to 'spawn': forking a multi-threaded server such as
+      Streamlit can deadlock the children.
+    """
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context or multiprocessing.get_context('spawn')
+        self._executor = None
+        self._jobs = {}
+        self._waiting = deque()
+        self._running = 0
+        # Re-entrant: a future that is already done runs its callbacks inline.
+        self._lock = threading.RLock()
+
+    def submit(self, key, func, *args, label=None, owner=None, on_done=None):
+        """
+        Run `func(*args)` in the pool, unless a job with the same key is in flight.
+
+        Args:
+        - key (str): Identity of the work.
+        - func (callable): Module-level function, picklable by reference.
+        - *args: Picklable arguments of `func`.
+        - label (str): Description shown in the job table. Defaults to the key.
+        - owner (hashable): Who is waiting, e.g. a session id.
+        - on_done (callable): Called with the result when the job succeeds,
+          whether or not anyone is still waiting, e.g. to fill a cache. Runs
+          on a pool management thread.
+
+        Returns:
+        - job (Job): The new or already queued job.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = Job(key, label or key, call=(func, args), on_done=on_done)
+                self._jobs[key] = job
+                self._waiting.append(job)
+            if owner is not None:
+                job.owners.add(owner)
+            self._dispatch()
+            return job
+
+    def _dispatch(self):
+        # Hand waiting jobs to free workers; called with the lock held.
+        while self._waiting and self._running < self.max_workers:
+            job = self._waiting.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                self._jobs.pop(job.key, None)
+                continue
+            try:
+                pool_future = self._pool_submit(*job.call)
+            except Exception as exc:
+                self._jobs.pop(job.key, None)
+                job.future.set_exception(exc)
+                continue
+            self._running += 1
+            pool_future.add_done_callback(lambda pool_future, job=job: self._finish(job, pool_future))
+
+    def _pool_submit(self, func, args):
+        # A worker killed mid-job (e.g. out of memory) breaks the whole pool;
+        # start a fresh one rather than failing every later submission.
+        for attempt in range(2):
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+            try:
+                return self._executor.submit(func, *args)
+            except BrokenProcessPool:
+                self._executor = None
+                if attempt:
+                    raise
+
+    def _finish(self, job, pool_future):
+        with self._lock:
+            self._running -= 1
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            self._dispatch()
+        exc = pool_future.exception()
+        if exc is not None:
+            job.future.set_exception(exc)
+            return
+        job.future.set_result(pool_future.result())
+        if job.on_done is not None:
+            job.on_done(job.future.result())
+
+    def cancel(self, keys, owner=None):
+        """
+        Stop waiting for jobs, cancelling those nobody else waits for.
+
+        Args:
+        - keys (iterable): Job keys.
+        - owner (hashable): The owner giving up the jobs.
+
+        Returns:
+        - cancelled (int): Jobs dropped before they started.
+        """
+        cancelled = 0
+        with self._lock:
+            for key in keys:
+                job = self._jobs.get(key)
+                if job is None:
+                    continue
+                job.owners.discard(owner)
+                if not job.owners and job.future.cancel():
+                    del self._jobs[key]
+                    self._waiting.remove(job)
+                    cancelled += 1
+        return cancelled
+
+    def table(self):
+        """
+        Return the jobs in flight.
+
+        Returns:
+        - table (pd.DataFrame): One row per job with JOB_COLUMNS, oldest first.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            rows = [[job.key, job.label, job.state, len(job.owners), now - job.submitted]
+                    for job in self._jobs.values()]
+        return pd.DataFrame(rows, columns=JOB_COLUMNS)
+
+    def shutdown(self, cancel_pending=True):
+        """
+        Stop the workers.
+
+        Args:
+        - cancel_pending (bool): Drop jobs that have not started.
+        """
+        with self._lock:
+            if cancel_pending:
+                for job in list(self._waiting):
+                    job.future.cancel()
+                    self._jobs.pop(job.key, None)
+                self._waiting.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+def iter_completed(jobs, poll=0.25, on_wait=None):
+    """
+    Yield jobs as they finish, in completion order.
+
+    Args:
+    - jobs (iterable): Job objects.
+    - poll (float): Seconds between calls of `on_wait` while nothing finishes.
+    - on_wait (callable): Called with the number of finished jobs while
+      waiting, e.g. to update a progress bar; a Streamlit rerun interrupts
+      the wait there.
+
+    Yields:
+    - job (Job): The next finished (done, failed or cancelled) job.
+    """
+    pending = set(jobs)
+    finished = 0
+    while pending:
+        wait([job.future for job in pending], timeout=poll, return_when=FIRST_COMPLETED)
+        ready = [job for job in pending if job.future.done()]
+        for job in ready:
+            pending.discard(job)
+            finished += 1
+            yield job
+        if not ready and on_wait is not None:
+            on_wait(finished)
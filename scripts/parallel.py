@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from scripts.aggregates import IRRADIANCE_COLUMNS, aggregates_cache_path, load_station_aggregates
+from scripts.station_store import build_station_cache, cache_path, load_station, pyarrow
+
+
+def _default_workers(n_items, max_workers):
+    return max(1, min(n_items, max_workers or os.cpu_count() or 1))
+
+
+def map_stations(func, items, max_workers=None, processes=False):
+    """
+    Apply a function to every station concurrently, keeping the input order.
+
+    Args:
+    - func (callable): Function of one station item. Must be importable at
+      module level when `processes` is set.
+    - items (dict): Station name -> argument for `func`.
+    - max_workers (int): Pool size. Defaults to the number of CPUs.
+    - processes (bool): Use a process pool (CPU-bound Python work such as
+      CSV parsing) instead of a thread pool (I/O and NumPy work).
+
+    Returns:
+    - results (dict): Station name -> result, in the order of `items`.
+    """
+    if not items:
+        return {}
+    pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool_cls(max_workers=_default_workers(len(items), max_workers)) as pool:
+        results = pool.map(func, items.values())
+        return dict(zip(items.keys(), results))
+
+
+def prepare_station_caches(file_paths, max_workers=None, cache_dir=None):
+    """
+    Build the columnar cache of every station whose cache is missing or stale.
+
+    Parsing runs in a process pool so stations are converted in parallel;
+    stations with an up-to-date cache are skipped without starting workers.
+
+    Args:
+    - file_paths (dict): Station name -> CSV path.
+    - max_workers (int): Process pool size. Defaults to the number of CPUs.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - None
+    """
+    if pyarrow is None:
+        return
+    stale = {name: path for name, path in file_paths.items() if not cache_path(path, cache_dir).exists()}
+    if len(stale) == 1 or max_workers == 1:
+        for path in stale.values():
+            build_station_cache(path, cache_dir)
+        return
+    with ProcessPoolExecutor(max_workers=_default_workers(len(stale), max_workers)) as pool:
+        list(pool.map(build_station_cache, stale.values(), [cache_dir] * len(stale)))
+
+
+def load_stations_parallel(file_paths, columns=None, max_workers=None, cache_dir=None):
+    """
+    Load several stations, parsing stale ones in parallel.
+
+    Args:
+    - file_paths (dict): Station name -> CSV path.
+    - columns (list): Columns to load. Defaults to all columns.
+    - max_workers (int): Pool size. Defaults to the number of CPUs.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - dataframes (dict): Station name -> data indexed by timestamp, in input order.
+    """
+    prepare_station_caches(file_paths, max_workers, cache_dir)
+    return map_stations(
+        lambda path: load_station(path, columns=columns, cache_dir=cache_dir),
+        file_paths,
+        max_workers,
+    )
+
+
+def load_aggregates_parallel(file_paths, columns=None, max_workers=None, cache_dir=None):
+    """
+    Load or build the daily rollups of several stations concurrently.
+
+    Stations without rollups have their columnar cache built in a process
+    pool first; stations with rollups only parse the rows appended since,
+    if any (see `load_station_aggregates`).
+
+    Args:
+    - file_paths (dict): Station name -> CSV path.
+    - columns (list): Columns to aggregate. Defaults to all numeric columns.
+    - max_workers (int): Pool size. Defaults to the number of CPUs.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - aggregates (dict): Station name -> AggregateStore, in input order.
+    """
+    missing = {name: path for name, path in file_paths.items()
+               if not aggregates_cache_path(path, columns, cache_dir).exists()}
+    prepare_station_caches(missing, max_workers, cache_dir)
+    return map_stations(
+        lambda path: load_station_aggregates(path, columns=columns, cache_dir=cache_dir),
+        file_paths,
+        max_workers,
+    )
+
+
+def station_statistics(dataframes, columns=IRRADIANCE_COLUMNS, max_workers=None):
+    """
+    Mean and standard deviation of each column for every station, in parallel.
+
+    Args:
+    - dataframes (dict): Station name -> DataFrame.
+    - columns (list): Columns to summarise.
+    - max_workers (int): Thread pool size. Defaults to the number of CPUs.
+
+    Returns:
+    - stats_df (pd.DataFrame): One row per station with '<col> Mean' and
+      '<col> StdDev' columns, in input order.
+    """
+    def summarise(df):
+        values = df[list(columns)]
+        mean, std = values.mean(), values.std()
+        stats = {}
+        for col in columns:
+            stats[f'{col} Mean'] = mean[col]
+            stats[f'{col} StdDev'] = std[col]
+        return stats
+
+    return pd.DataFrame(map_stations(summarise, dataframes, max_workers)).T
@@ -0,0 +1,308 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.station_store import derived_cache_path, load_station, pyarrow, station_columns, write_atomically
+
+RANKING_COLUMNS = ['GHI', 'DNI', 'DHI', 'Tamb', 'TModA']
+# Power temperature coefficient of crystalline silicon modules, per degree C
+# above the 25 C rating temperature.
+TEMPERATURE_COEFFICIENT = -0.004
+# Nominal operating cell temperature, used to estimate the cell temperature
+# from Tamb when no module temperature is logged.
+NOCT = 45.0
+# Days with fewer readings than this fraction of the station cadence are
+# left out of the daily metrics.
+MIN_COVERAGE = 0.9
+# Days whose diffuse fraction (DHI / GHI) stays below this count as clear.
+CLEAR_DIFFUSE_FRACTION = 0.3
+# Ramps are only measured in daylight.
+DAYLIGHT_IRRADIANCE = 20.0
+# Weight of each metric in the ranking score; negative weights reward low values.
+DEFAULT_WEIGHTS = {
+    'yield_mean': 0.4,
+    'ghi_p90': 0.3,
+    'clear_day_fraction': 0.1,
+    'insolation_cv': -0.1,
+    'ramp_variability': -0.1,
+}
+METRIC_LABELS = {
+    'days': 'Complete days',
+    'ghi_mean': 'GHI insolation (kWh/m²/day)',
+    'ghi_p50': 'GHI P50 (kWh/m²/day)',
+    'ghi_p90': 'GHI P90 (kWh/m²/day)',
+    'dni_mean': 'DNI insolation (kWh/m²/day)',
+    'clear_day_fraction': 'Clear-day fraction',
+    'yield_mean': 'Derated yield (kWh/kWp/day)',
+    'yield_p90': 'Derated yield P90 (kWh/kWp/day)',
+    'temperature_loss': 'Temperature loss',
+    'insolation_cv': 'Day-to-day variability (CV)',
+    'ramp_variability': 'Mean GHI ramp (W/m²/min)',
+    'score': 'Score',
+    'rank': 'Rank',
+}
+_DAY_NS = pd.Timedelta(days=1).value
+_MINUTE_NS = pd.Timedelta(minutes=1).value
+
+
+def _gather(frames, col):
+    # One column of every site, back to back; sites without it read as missing.
+    return np.concatenate([
+        df[col].to_numpy(dtype=np.float64) if col in df.columns else np.full(len(df), np.nan)
+        for df in frames.values()
+    ])
+
+
+def _group_median(codes, values, n_groups):
+    # Median of `values` per group code, from one sort.
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    middle = values[order][np.minimum(starts + (counts - 1) // 2, len(values) - 1)] if len(values) else starts
+    return np.where(counts > 0, middle, 0)
+
+
+def _segment_mean(values, starts):
+    # Mean of the finite values of each run of rows beginning at `starts`,
+    # and how many there were.
+    valid = np.isfinite(values)
+    count = np.add.reduceat(valid, starts, dtype=np.int64)
+    total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count, count
+
+
+@timed()
+def daily_site_table(frames):
+    """
+    Reduce the minute data of many sites to one row per site and day.
+
+    All sites are stacked into one set of arrays; rows are in (site, time)
+    order, so each site-day is a contiguous run and every per-day quantity
+    is a single `np.add.reduceat` over all sites at once. Insolation is the
+    mean irradiance of the day's readings times 24 h, which is the integral
+    of the minute data on complete days and is not biased by the logger
+    cadence.
+
+    Args:
+    - frames (dict): Site name -> minute data indexed by timestamp, with
+      any of RANKING_COLUMNS.
+
+    Returns:
+    - daily (pd.DataFrame): Indexed by (Station, Day), with the fraction of
+      the day covered by GHI readings ('coverage'), insolation in kWh/m²/day
+      ('ghi', 'dni', 'dhi'), the temperature-derated yield in kWh/kWp/day
+      ('yield') and the sum and count of daylight GHI ramps in W/m² per
+      minute ('ramp_sum', 'ramp_count').
+    """
+    frames = {name: df if df.index.is_monotonic_increasing else df.sort_index() for name, df in frames.items()}
+    names = list(frames)
+    lengths = np.array([len(df) for df in frames.values()], dtype=np.int64)
+    if not lengths.sum():
+        index = pd.MultiIndex.from_arrays([pd.Index([], dtype=object, name='Station'),
+                                           pd.DatetimeIndex([], dtype='datetime64[ns]', name='Day')])
+        columns = ['coverage', 'ghi', 'dni', 'dhi', 'yield', 'ramp_sum', 'ramp_count']
+        return pd.DataFrame(index=index, columns=columns, dtype=np.float64).astype({'ramp_count': np.int64})
+    site = np.repeat(np.arange(len(names)), lengths)
+    ns = np.concatenate([df.index.to_numpy() for df in frames.values()]).astype('datetime64[ns]').view(np.int64)
+
+    # Runs of rows of the same site and day.
+    day = ns // _DAY_NS
+    starts = np.flatnonzero(np.concatenate([[True], (day[1:] != day[:-1]) | (site[1:] != site[:-1])]))
+    run_site, run_day = site[starts], day[starts]
+
+    sun = np.clip(_gather(frames, 'GHI'), 0.0, None)
+    ghi_mean, readings = _segment_mean(sun, starts)
+    dni_mean, _ = _segment_mean(np.clip(_gather(frames, 'DNI'), 0.0, None), starts)
+    dhi_mean, _ = _segment_mean(np.clip(_gather(frames, 'DHI'), 0.0, None), starts)
+
+    # Cell temperature: the module sensor where logged, else estimated from
+    # the ambient temperature; no temperature at all means no derating.
+    cell = _gather(frames, 'TModA')
+    estimated = _gather(frames, 'Tamb')
+    estimated += (NOCT - 20.0) / 800.0 * sun
+    np.copyto(cell, estimated, where=~np.isfinite(cell))
+    del estimated
+    power = np.where(np.isfinite(cell), 1.0 + TEMPERATURE_COEFFICIENT * (cell - 25.0), 1.0)
+    power *= sun
+    yield_mean, _ = _segment_mean(power, starts)
+    del cell, power
+
+    # Logger cadence per site, and minute-normalised ramps between
+    # consecutive daylight readings of the same site, counted on the later one.
+    interval = np.diff(ns)
+    same_site = site[1:] == site[:-1]
+    step = _group_median(site[1:][same_site], interval[same_site], len(names))
+    ramp_ok = np.zeros(len(ns), dtype=bool)
+    ramp_ok[1:] = (same_site & (interval > 0) & (interval <= 2 * step[site[1:]])
+                   & (sun[1:] >= DAYLIGHT_IRRADIANCE) & (sun[:-1] >= DAYLIGHT_IRRADIANCE))
+    ramp = np.zeros(len(ns))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ramp[1:] = np.abs(np.diff(sun)) / (interval / _MINUTE_NS)
+    ramp[~ramp_ok] = 0.0
+
+    to_kwh = 24.0 / 1000.0
+    index = pd.MultiIndex.from_arrays([
+        pd.Index(np.asarray(names, dtype=object)[run_site], name='Station'),
+        pd.DatetimeIndex(run_day * _DAY_NS, name='Day'),
+    ])
+    return pd.DataFrame({
+        'coverage': np.minimum(readings * np.maximum(step[run_site], 1) / _DAY_NS, 1.0),
+        'ghi': ghi_mean * to_kwh,
+        'dni': dni_mean * to_kwh,
+        'dhi': dhi_mean * to_kwh,
+        'yield': yield_mean * to_kwh,
+        'ramp_sum': np.add.reduceat(ramp, starts),
+        'ramp_count': np.add.reduceat(ramp_ok, starts, dtype=np.int64),
+    }, index=index)
+
+
+@timed()
+def site_metrics(daily, min_coverage=MIN_COVERAGE):
+    """
+    Solar-resource metrics of every site from its daily table.
+
+    All sites are handled together as (site x day) matrices, with the days
+    a site lacks, or covers less than `min_coverage` of, left as NaN.
+
+    Args:
+    - daily (pd.DataFrame): Output of `daily_site_table`; tables of several
+      batches of sites can be concatenated.
+    - min_coverage (float): Minimum fraction of a day with readings.
+
+    Returns:
+    - metrics (pd.DataFrame): One row per site with the columns of
+      METRIC_LABELS except 'score' and 'rank'. P90 is the daily value
+      exceeded on 90% of the complete days.
+    """
+    if daily.empty:
+        # No site has a reading: the metrics table, without rows.
+        columns = [metric for metric in METRIC_LABELS if metric not in ('score', 'rank')]
+        return pd.DataFrame(index=pd.Index([], dtype=object, name='Station'), columns=columns, dtype=np.float64)
+    complete = daily['coverage'] >= min_coverage
+    grid = daily[['ghi', 'dni', 'dhi', 'yield']].where(complete, axis=0).unstack('Day')
+    ghi, dni, dhi, energy = (grid[col].to_numpy(dtype=np.float64) for col in ['ghi', 'dni', 'dhi', 'yield'])
+    days = np.isfinite(ghi).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        # Sites without a complete day have no percentiles.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        ghi_mean = np.nanmean(ghi, axis=1)
+        ghi_p50, ghi_p90 = np.nanpercentile(ghi, [50, 10], axis=1)
+        yield_mean = np.nanmean(energy, axis=1)
+        yield_p90 = np.nanpercentile(energy, 10, axis=1)
+        clear = np.where(np.isfinite(ghi) & np.isfinite(dhi), (dhi <= CLEAR_DIFFUSE_FRACTION * ghi) & (ghi > 0), np.nan)
+        metrics = pd.DataFrame({
+            'days': days,
+            'ghi_mean': ghi_mean,
+            'ghi_p50': ghi_p50,
+            'ghi_p90': ghi_p90,
+            'dni_mean': np.nanmean(dni, axis=1),
+            'clear_day_fraction': np.nanmean(clear, axis=1),
+            'yield_mean': yield_mean,
+            'yield_p90': yield_p90,
+            'temperature_loss': 1.0 - yield_mean / ghi_mean,
+            'insolation_cv': np.nanstd(ghi, axis=1, ddof=1) / ghi_mean,
+        }, index=grid.index)
+    ramps = daily[['ramp_sum', 'ramp_count']].groupby(level='Station', sort=False).sum()
+    ramps = ramps.reindex(metrics.index)
+    metrics['ramp_variability'] = ramps['ramp_sum'] / ramps['ramp_count'].where(ramps['ramp_count'] > 0)
+    return metrics
+
+
+def rank_sites(metrics, weights=None):
+    """
+    Score and rank sites on a weighted combination of their metrics.
+
+    Each metric is scaled to [0, 1] across the sites (1 for the best);
+    metrics with a negative weight are better when low. The score is the
+    weighted mean of the scaled metrics.
+
+    Args:
+    - metrics (pd.DataFrame): Output of `site_metrics`.
+    - weights (dict): Metric -> weight. Defaults to DEFAULT_WEIGHTS.
+
+    Returns:
+    - ranking (pd.DataFrame): `metrics` plus 'score' and 'rank' (1 = best),
+      sorted by rank.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    names = list(weights)
+    values = metrics[names].to_numpy(dtype=np.float64)
+    low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    scaled = (values - low) / span
+    w = np.array([weights[name] for name in names], dtype=np.float64)
+    scaled = np.where(w < 0, 1.0 - scaled, scaled)
+    scaled = np.where(np.isnan(scaled), 0.0, scaled)
+
+    ranking = metrics.copy()
+    ranking['score'] = scaled @ np.abs(w) / np.abs(w).sum()
+    ranking['rank'] = ranking['score'].rank(ascending=False, method='min').astype(int)
+    return ranking.sort_values('rank', kind='stable')
+
+
+def rank_stations(frames, weights=None, min_coverage=MIN_COVERAGE):
+    """
+    Compute the metrics of every site in one batch and rank them.
+
+    Args:
+    - frames (dict): Site name -> minute data indexed by timestamp.
+    - weights (dict): Metric weights, see `rank_sites`.
+    - min_coverage (float): Minimum fraction of a day with readings.
+
+    Returns:
+    - ranking (pd.DataFrame): See `rank_sites`.
+    """
+    return rank_sites(site_metrics(daily_site_table(frames), min_coverage), weights)
+
+
+@timed()
+def load_station_daily_table(file_path, cache_dir=None):
+    """
+    Return the daily site table of one station, cached next to the station data.
+
+    Only the first call for a data version reads the minute data, and only
+    the columns the ranking uses.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - daily (pd.DataFrame): Output of `daily_site_table` for this station,
+      indexed by Day.
+    """
+    path = derived_cache_path(file_path, 'site_days', cache_dir)
+    if pyarrow is not None and path.exists():
+        return pd.read_parquet(path)
+
+    columns = [col for col in RANKING_COLUMNS if col in station_columns(file_path, cache_dir)]
+    daily = daily_site_table({'': load_station(file_path, columns=columns, cache_dir=cache_dir)}).droplevel('Station')
+    if pyarrow is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(path, daily.to_parquet)
+    return daily
+
+
+def rank_station_files(file_paths, weights=None, min_coverage=MIN_COVERAGE, cache_dir=None):
+    """
+    Rank stations from their cached daily site tables.
+
+    Gives the same ranking as `rank_stations` on the stations' minute data,
+    without holding the minute data of every station in memory.
+
+    Args:
+    - file_paths (dict): Station name -> CSV path.
+    - weights (dict): Metric weights, see `rank_sites`.
+    - min_coverage (float): Minimum fraction of a day with readings.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - ranking (pd.DataFrame): See `rank_sites`.
+    """
+    daily = pd.concat({name: load_station_daily_table(path, cache_dir) for name, path in file_paths.items()},
+                      names=['Station'])
+    return rank_sites(site_metrics(daily, min_coverage), weights)
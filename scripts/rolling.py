@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.time_index import TimeIndex
+
+ROLLING_STATS = ['mean', 'std', 'min', 'max']
+ROLLING_FUNCTIONS = ['count', 'sum', 'mean', 'std', 'var', 'min', 'max']
+
+
+def _block_scan(values, window, ufunc, identity):
+    """
+    Trailing-window reduction of every row of `values` in O(n), whatever the window.
+
+    The series are cut into blocks of `window` samples and scanned forwards
+    and backwards within each block (van Herk / Gil-Werman). A trailing
+    window then spans at most two blocks: the tail of one and the head of
+    the next. Scans restart at each block, so sums never grow beyond one
+    window and stay as accurate as a direct sum.
+
+    Args:
+    - values (np.ndarray): Array of shape (k, n), one series per row.
+    - window (int): Window length in samples.
+    - ufunc (np.ufunc): np.add, np.minimum or np.maximum.
+    - identity (float): Neutral element of `ufunc`, used for padding.
+
+    Returns:
+    - out (np.ndarray): Shape (k, n); sample i reduces samples i - window + 1 to i.
+    """
+    k, n = values.shape
+    padded = window - 1 + n
+    padded += -padded % window
+    prefix = np.full((k, padded), identity, dtype=np.float64)
+    prefix[:, window - 1:window - 1 + n] = values
+    suffix = np.empty_like(prefix)
+    blocks = prefix.reshape(k, -1, window)
+    ufunc.accumulate(blocks[..., ::-1], axis=2, out=suffix.reshape(k, -1, window)[..., ::-1])
+    ufunc.accumulate(blocks, axis=2, out=blocks)
+
+    # Sample i sits at window - 1 + i; its window starts at i.
+    head = prefix[:, window - 1:window - 1 + n]
+    out = ufunc(suffix[:, :n], head)
+    # Windows starting on a block boundary are exactly one block.
+    out[:, ::window] = head[:, ::window]
+    return out
+
+
+def _window_rows(index, window):
+    """
+    Express a window on the row grid of the data.
+
+    Returns:
+    - rows (int): Window length in rows.
+    - grid (np.ndarray or None): Grid position of each row when the data has
+      gaps, None when rows and grid positions coincide.
+    - time_based (bool): Whether `window` is a duration.
+
+    Raises:
+    - ValueError: If the timestamps are repeated, out of order or do not
+      sit on a common cadence.
+    """
+    if isinstance(window, (int, np.integer)):
+        if window < 1:
+            raise ValueError(f"window must be at least 1 row, got {window}")
+        return int(window), None, False
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError("Time-based windows need data indexed by timestamp.")
+    if not index.is_unique:
+        raise ValueError("Repeated timestamps do not map to a row grid.")
+    window_ns = pd.Timedelta(window).value
+    time_index = TimeIndex.from_index(index)
+    step = max(time_index.step, 1)
+    rows = max(1, -(-window_ns // step))
+    if time_index.is_regular:
+        return rows, None, True
+    offsets = time_index.starts - time_index.starts[0]
+    if (offsets % step).any():
+        raise ValueError("Rows are not aligned to a common cadence.")
+    grid = np.repeat(offsets // step - time_index.positions, time_index.lengths) + np.arange(len(index))
+    return rows, grid, True
+
+
+def _on_grid(values, grid):
+    # Spread rows onto the regular grid; gap rows are missing.
+    if grid is None:
+        return values
+    out = np.full((len(values), int(grid[-1]) + 1), np.nan)
+    out[:, grid] = values
+    return out
+
+
+@timed()
+def rolling_statistics(df, window, columns=None, stats=None, min_periods=None):
+    """
+    Trailing rolling statistics of several columns at once.
+
+    Matches `df[columns].rolling(window, min_periods).agg(stats)`. Means and
+    standard deviations come from windowed sums of the values and their
+    squares, minima and maxima from forward/backward block scans, so every
+    statistic costs O(n) whatever the window length. Missing readings are
+    skipped and a window needs `min_periods` valid readings.
+
+    A duration window is turned into a fixed number of rows on the station
+    cadence; rows missing from the logger output count as missing readings,
+    which gives the same result as pandas' time-based windows.
+
+    Args:
+    - df (pd.DataFrame): Data in time order, indexed by timestamp for
+      duration windows.
+    - window (int, str or Timedelta): Window length in rows, or a duration
+      such as '1h'.
+    - columns (list): Columns to summarise. Defaults to all numeric columns.
+    - stats (list): Any of 'count', 'sum', 'mean', 'std', 'var', 'min',
+      'max', and quantiles given as floats (e.g. 0.5). Defaults to
+      ROLLING_STATS.
+    - min_periods (int): Minimum valid readings per window. Defaults to the
+      window length for row windows and 1 for duration windows, as in pandas.
+
+    Returns:
+    - rolled (pd.DataFrame): Same index as `df`, with (column, statistic)
+      columns.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    columns = list(columns)
+    stats = ROLLING_STATS if stats is None else list(stats)
+    unknown = [stat for stat in stats if isinstance(stat, str) and stat not in ROLLING_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown rolling statistics: {unknown}")
+    try:
+        rows, grid, time_based = _window_rows(df.index, window)
+    except ValueError:
+        if isinstance(window, (int, np.integer)):
+            raise
+        # Irregular timestamps: let pandas search every window.
+        return df[columns].rolling(window, min_periods=min_periods).agg(stats)
+    if min_periods is None:
+        min_periods = 1 if time_based else rows
+
+    rows_in_window = None
+    if 'count' in stats:
+        # Like pandas, counts only need enough rows in the window, valid or not.
+        present = np.ones(len(df)) if grid is None else np.bincount(grid, minlength=int(grid[-1]) + 1)
+        rows_in_window = _block_scan(present[np.newaxis].astype(np.float64), rows, np.add, 0.0)
+
+    # Column-major output: one contiguous block per (column, statistic).
+    # Columns are rolled one at a time, which bounds the temporaries to a
+    # few copies of one column.
+    out = np.empty((len(columns) * len(stats), len(df)))
+    for c, col in enumerate(columns):
+        values = _on_grid(df[col].to_numpy(dtype=np.float64)[np.newaxis], grid)
+        results = _window_statistics(values, rows, stats, min_periods, rows_in_window)
+        for s, stat in enumerate(stats):
+            out[c * len(stats) + s] = results[stat][0] if grid is None else results[stat][0, grid]
+    labels = pd.MultiIndex.from_product([columns, [stat if isinstance(stat, str) else str(stat) for stat in stats]])
+    return pd.DataFrame(out.T, index=df.index, columns=labels, copy=False)
+
+
+def _window_statistics(values, rows, stats, min_periods, rows_in_window):
+    # The requested statistics of series of shape (k, n), NaN where a
+    # window has fewer than min_periods valid readings.
+    n = values.shape[1]
+    valid = ~np.isnan(values)
+    complete = bool(valid.all())
+    if complete:
+        count = np.broadcast_to(np.minimum(np.arange(1, n + 1), rows).astype(np.float64), values.shape)
+    else:
+        count = _block_scan(valid, rows, np.add, 0.0)
+    sparse = count < max(min_periods, 1)
+
+    results = {}
+    if {'sum', 'mean', 'std', 'var'} & set(stats):
+        # Centring on the series mean keeps the sums of squares small.
+        shift = np.nan_to_num(np.nanmean(values, axis=1, keepdims=True)) if valid.any() else np.zeros((len(values), 1))
+        centred = values - shift
+        if not complete:
+            centred[~valid] = 0.0
+        total = _block_scan(centred, rows, np.add, 0.0)
+        centred *= centred
+        squares = _block_scan(centred, rows, np.add, 0.0)
+        del centred
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            var = np.maximum(squares - total * mean, 0.0) / (count - 1)
+        var[count < 2] = np.nan
+        results['sum'] = total + count * shift
+        results['mean'] = mean + shift
+        results['var'] = var
+        results['std'] = np.sqrt(var)
+    if 'min' in stats:
+        results['min'] = _block_scan(values if complete else np.where(valid, values, np.inf), rows, np.minimum, np.inf)
+    if 'max' in stats:
+        results['max'] = _block_scan(values if complete else np.where(valid, values, -np.inf), rows, np.maximum,
+                                     -np.inf)
+    for q in stats:
+        if not isinstance(q, str):
+            # Order statistics have no O(1) window update; pandas keeps a
+            # sorted skiplist per window, O(n log w).
+            results[q] = pd.DataFrame(values.T).rolling(rows, min_periods=1).quantile(q).to_numpy().T.copy()
+    for stat in results:
+        results[stat][sparse] = np.nan
+    if 'count' in stats:
+        results['count'] = np.where(rows_in_window >= min_periods, count, np.nan)
+    return results
+
+
+def rolling(df, window, stat='mean', columns=None, min_periods=None):
+    """
+    One rolling statistic per column, like `df[columns].rolling(window).mean()`.
+
+    Args:
+    - df (pd.DataFrame): Data in time order.
+    - window (int, str or Timedelta): See `rolling_statistics`.
+    - stat (str or float): The statistic, or a quantile.
+    - columns (list): Columns to summarise. Defaults to all numeric columns.
+    - min_periods (int): See `rolling_statistics`.
+
+    Returns:
+    - rolled (pd.DataFrame): Same index and columns as the selected data.
+    """
+    rolled = rolling_statistics(df, window, columns, [stat], min_periods)
+    return rolled.droplevel(1, axis=1)
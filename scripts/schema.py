@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+# Sensor readings logged by the stations. Float32 keeps ~7 significant
+# digits, which is well beyond the resolution of the instruments.
+SENSOR_COLUMNS = [
+    'GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WSgust',
+    'WSstdev', 'WD', 'WDstdev', 'BP', 'Precipitation', 'TModA', 'TModB',
+]
+# Wind directions, stored as uint16 degrees when the logger reports whole degrees.
+DIRECTION_COLUMNS = ['WD']
+# 0/1 flags, stored as int8.
+FLAG_COLUMNS = ['Cleaning']
+
+# Statistics compared by `check_statistics`.
+CHECKED_STATISTICS = ['mean', 'std', 'min', 'max']
+
+
+def _whole_degrees(values):
+    finite = np.isfinite(values)
+    return finite.all() and (values >= 0).all() and (values <= 360).all() and (values == np.round(values)).all()
+
+
+def compact_dtypes(df):
+    """
+    Choose the compact storage type of each station column.
+
+    Sensors become float32; wind directions become uint16 when every value
+    is a whole number of degrees (otherwise float32); flags without missing
+    values become int8. Other columns keep their type.
+
+    Args:
+    - df (pd.DataFrame): Station data.
+
+    Returns:
+    - dtypes (dict): Column -> dtype, for the columns that change.
+    """
+    dtypes = {}
+    for col in df.columns:
+        if col in DIRECTION_COLUMNS and _whole_degrees(df[col].to_numpy(dtype=np.float64)):
+            dtypes[col] = np.uint16
+        elif col in SENSOR_COLUMNS:
+            dtypes[col] = np.float32
+        elif col in FLAG_COLUMNS and not df[col].isnull().any():
+            dtypes[col] = np.int8
+    return {col: dtype for col, dtype in dtypes.items() if df[col].dtype != dtype}
+
+
+def compact_frame(df, drop_empty=True):
+    """
+    Convert station data to its compact representation.
+
+    All-null columns (such as Comments in the station exports) carry no
+    information and are dropped; their names are kept in
+    `df.attrs['dropped_columns']`.
+
+    Args:
+    - df (pd.DataFrame): Station data.
+    - drop_empty (bool): Drop all-null columns.
+
+    Returns:
+    - df (pd.DataFrame): The compact frame. The input is not modified.
+    """
+    dropped = [col for col in df.columns if df[col].isnull().all()] if drop_empty and len(df) else []
+    compact = df.drop(columns=dropped)
+    compact = compact.astype(compact_dtypes(compact))
+    compact.attrs['dropped_columns'] = dropped
+    return compact
+
+
+def memory_footprint(df):
+    """
+    Report the memory used by each column of a frame.
+
+    Args:
+    - df (pd.DataFrame): The frame.
+
+    Returns:
+    - footprint (pd.DataFrame): One row per column (and the index) with its
+      dtype, bytes, and the bytes the same column would take as float64.
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    dtypes = pd.Series({col: str(dtype) for col, dtype in df.dtypes.items()})
+    dtypes['Index'] = str(df.index.dtype)
+    float64_bytes = pd.Series(len(df) * 8, index=usage.index)
+    for col in df.columns:
+        if df[col].dtype.kind not in 'biuf':
+            float64_bytes[col] = usage[col]
+    float64_bytes['Index'] = usage['Index']
+    return pd.DataFrame({'dtype': dtypes[usage.index], 'bytes': usage, 'float64_bytes': float64_bytes})
+
+
+def footprint_summary(frames):
+    """
+    Summarise the memory footprint of several stations.
+
+    Args:
+    - frames (dict): Station name -> station data.
+
+    Returns:
+    - summary (pd.DataFrame): One row per station with rows, columns, MB
+      used, MB as float64 and the saving ratio.
+    """
+    rows = {}
+    for name, df in frames.items():
+        footprint = memory_footprint(df)
+        rows[name] = {
+            'rows': len(df),
+            'columns': df.shape[1],
+            'MB': footprint['bytes'].sum() / 2 ** 20,
+            'float64 MB': footprint['float64_bytes'].sum() / 2 ** 20,
+        }
+    summary = pd.DataFrame.from_dict(rows, orient='index')
+    summary['saving'] = 1 - summary['MB'] / summary['float64 MB']
+    return summary
+
+
+def check_statistics(compact, reference, columns=None, rtol=1e-4):
+    """
+    Compare the summary statistics of a compact frame with the float64 data.
+
+    Statistics are computed in float64 on both sides, so the only source of
+    difference is the rounding of the stored values. Tolerances are relative
+    to each column's standard deviation (or magnitude, for constant
+    columns), which keeps them meaningful for values near zero.
+
+    Args:
+    - compact (pd.DataFrame): Data from `compact_frame`.
+    - reference (pd.DataFrame): The same data as float64.
+    - columns (list): Columns to compare. Defaults to the numeric columns of `compact`.
+    - rtol (float): Allowed difference as a fraction of the column scale.
+
+    Returns:
+    - check (pd.DataFrame): One row per column with the largest scaled
+      difference across CHECKED_STATISTICS and a 'within_tolerance' flag.
+    """
+    if columns is None:
+        columns = compact.select_dtypes(include='number').columns
+    columns = list(columns)
+    ours = compact[columns].astype(np.float64).agg(CHECKED_STATISTICS)
+    theirs = reference[columns].astype(np.float64).agg(CHECKED_STATISTICS)
+    scale = theirs.loc['std'].where(theirs.loc['std'] > 0, theirs.abs().max()).replace(0, 1)
+    difference = ((ours - theirs).abs() / scale).max()
+    return pd.DataFrame({'difference': difference, 'within_tolerance': difference <= rtol})
@@ -0,0 +1,295 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.sketches import MomentSketch, QuantileSketch, combine_moments, weighted_quantile
+from scripts.station_store import derived_cache_path, load_station, pyarrow, write_atomically
+
+# Level capacity of the per-day quantile sketches. A day of minute data
+# (1440 values) is compacted three times, keeping ~180 items with a
+# worst-case rank error of 7 / 1440 (0.5%).
+DAILY_SKETCH_SIZE = 256
+MOMENT_STATS = ['count', 'missing', 'mean', 'm2', 'min', 'max', 'max_rank_error']
+
+
+@timed()
+def daily_sketches(df, columns=None, k=DAILY_SKETCH_SIZE, seed=0):
+    """
+    Summarise minute data as per-day moments and quantile sketches.
+
+    Args:
+    - df (pd.DataFrame): Minute data indexed by timestamp, in time order.
+    - columns (list): Columns to summarise. Defaults to all numeric columns.
+    - k (int): Level capacity of the quantile sketches.
+    - seed (int): Seed of the compaction offsets.
+
+    Returns:
+    - moments (pd.DataFrame): One row per day and column with the columns
+      'day', 'column' and MOMENT_STATS.
+    - items (pd.DataFrame): The items retained by the quantile sketches,
+      with columns 'day', 'column', 'weight' and 'value'.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=np.float64)
+    day_ns, starts = np.unique(df.index.floor('D').as_unit('ns').asi8, return_index=True)
+    bounds = np.append(starts, len(values))
+    rng = np.random.default_rng(seed)
+
+    moments = np.empty((len(day_ns), len(columns), len(MOMENT_STATS)))
+    item_days, item_columns, item_weights, item_values = [], [], [], []
+    for d in range(len(day_ns)):
+        block = values[bounds[d]:bounds[d + 1]]
+        day = MomentSketch(len(columns))
+        day.update(block)
+        moments[d, :, 0] = day.count
+        moments[d, :, 1] = len(block) - day.count
+        moments[d, :, 2:6] = np.column_stack([day.mean, day.m2, day.min, day.max])
+        for c in range(len(columns)):
+            sketch = QuantileSketch(k=k, seed=rng)
+            sketch.update(block[:, c])
+            items, weights = sketch.items()
+            moments[d, c, 6] = sketch.max_rank_error
+            item_days.append(np.full(len(items), day_ns[d]))
+            item_columns.append(np.full(len(items), c))
+            item_weights.append(weights)
+            item_values.append(items)
+
+    codes = pd.Categorical.from_codes(np.tile(np.arange(len(columns)), len(day_ns)), columns)
+    moments = pd.DataFrame(moments.reshape(-1, len(MOMENT_STATS)), columns=MOMENT_STATS)
+    moments.insert(0, 'day', pd.DatetimeIndex(np.repeat(day_ns, len(columns)).astype('datetime64[ns]')))
+    moments.insert(1, 'column', codes)
+    concat = (lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype))  # noqa: E731
+    items = pd.DataFrame({
+        'day': pd.DatetimeIndex(concat(item_days, np.int64).astype('datetime64[ns]')),
+        'column': pd.Categorical.from_codes(concat(item_columns, np.int64), columns),
+        'weight': concat(item_weights, np.float64),
+        'value': concat(item_values, np.float64),
+    })
+    return moments, items
+
+
+class SketchStore:
+    """
+    Per-day moment and quantile sketches of one or more stations.
+
+    Means and standard deviations over any range of days come from combining
+    the per-day Welford moments; quartiles and IQR bounds from pooling the
+    items retained by the per-day quantile sketches. Both only touch a few
+    hundred rows per day instead of 1440 minutes per column, and stores of
+    several stations combine into one.
+
+    Moments are exact. Quantiles are approximate: their rank error is at
+    most the sum of the per-day compaction errors over the number of values
+    (see `QuantileSketch.rank_error`), reported as 'rank_error' by `bounds`.
+    Pooling days adds no error, so the bound does not grow with the range.
+    The `eda_helpers` checks stay exact unless a store is passed to them.
+
+    Args:
+    - moments (pd.DataFrame): Per-day moments, see `daily_sketches`.
+    - items (pd.DataFrame): Per-day sketch items, see `daily_sketches`.
+    """
+
+    def __init__(self, moments, items):
+        self.moments = moments.sort_values('day', kind='stable').reset_index(drop=True)
+        self.items = items.sort_values('day', kind='stable').reset_index(drop=True)
+        self._moments_by_column = {col: group for col, group in self.moments.groupby('column', observed=True)}
+        self._items_by_column = {
+            col: (group['day'].to_numpy(), group['weight'].to_numpy(), group['value'].to_numpy())
+            for col, group in self.items.groupby('column', observed=True)
+        }
+
+    @classmethod
+    def from_frame(cls, df, columns=None, k=DAILY_SKETCH_SIZE, seed=0):
+        """
+        Build the store from minute data.
+
+        Args:
+        - df (pd.DataFrame): Minute data indexed by timestamp.
+        - columns (list): Columns to summarise. Defaults to all numeric columns.
+        - k (int): Level capacity of the quantile sketches.
+        - seed (int): Seed of the compaction offsets.
+
+        Returns:
+        - store (SketchStore): The new store.
+        """
+        return cls(*daily_sketches(df, columns, k, seed))
+
+    @classmethod
+    def combine(cls, stores):
+        """
+        Pool the sketches of several stores, e.g. a group of stations.
+
+        Args:
+        - stores (iterable): SketchStore objects.
+
+        Returns:
+        - store (SketchStore): A store answering for all of them together.
+        """
+        stores = list(stores)
+        columns = list(dict.fromkeys(col for store in stores for col in store.columns))
+
+        def recode(table):
+            table = table.copy()
+            table['column'] = pd.Categorical(table['column'].astype(str), categories=columns)
+            return table
+
+        return cls(pd.concat([recode(store.moments) for store in stores], ignore_index=True),
+                   pd.concat([recode(store.items) for store in stores], ignore_index=True))
+
+    @property
+    def columns(self):
+        return list(self.moments['column'].cat.categories)
+
+    def append(self, df, k=DAILY_SKETCH_SIZE, seed=0):
+        """
+        Fold newly appended minute data into the store.
+
+        Sketches of a day that is already present are kept side by side with
+        the new ones; queries pool them like any other day.
+
+        Args:
+        - df (pd.DataFrame): New minute data indexed by timestamp.
+        - k (int): Level capacity of the new sketches.
+        - seed (int): Seed of the compaction offsets.
+
+        Returns:
+        - store (SketchStore): A store with the new days.
+        """
+        return SketchStore.combine([self, SketchStore.from_frame(df, self.columns, k, seed)])
+
+    def _select(self, columns):
+        columns = self.columns if columns is None else list(columns)
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            raise KeyError(f"Columns not in the sketch store: {missing}")
+        return columns
+
+    @staticmethod
+    def _days(days, start, end):
+        # Rows of sorted day stamps within an inclusive range.
+        lo = 0 if start is None else np.searchsorted(days, pd.Timestamp(start).floor('D').to_datetime64(), 'left')
+        hi = len(days) if end is None else np.searchsorted(days, pd.Timestamp(end).to_datetime64(), 'right')
+        return slice(lo, hi)
+
+    def stats(self, columns=None, start=None, end=None):
+        """
+        Exact count, missing count, mean, standard deviation, minimum and maximum.
+
+        Args:
+        - columns (list): Columns to report. Defaults to all stored columns.
+        - start, end (str or Timestamp): Inclusive date range. Defaults to all data.
+
+        Returns:
+        - stats (pd.DataFrame): One row per column.
+        """
+        rows = {}
+        for col in self._select(columns):
+            group = self._moments_by_column[col]
+            window = group.iloc[self._days(group['day'].to_numpy(), start, end)]
+            count, mean, m2 = combine_moments(window['count'].to_numpy(), window['mean'].to_numpy(),
+                                              window['m2'].to_numpy())
+            rows[col] = {
+                'count': count,
+                'missing': window['missing'].sum(),
+                'mean': float(mean) if count else np.nan,
+                'std': np.sqrt(m2 / (count - 1)) if count > 1 else np.nan,
+                'min': window['min'].min() if count else np.nan,
+                'max': window['max'].max() if count else np.nan,
+            }
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def bounds(self, columns=None, start=None, end=None, iqr_factor=1.5, impute=False):
+        """
+        Approximate quartiles and IQR outlier bounds.
+
+        Args:
+        - columns (list): Columns to report. Defaults to all stored columns.
+        - start, end (str or Timestamp): Inclusive date range. Defaults to all data.
+        - iqr_factor (float): Multiplier of the IQR for the bounds.
+        - impute (bool): Count missing values as the column mean, as
+          `clean_data` does before computing its bounds.
+
+        Returns:
+        - bounds (pd.DataFrame): One row per column with 'q1', 'q3',
+          'lower', 'upper' and the worst-case 'rank_error' of the quartiles
+          as a fraction of the values.
+        """
+        columns = self._select(columns)
+        stats = self.stats(columns, start, end)
+        rows = {}
+        for col in columns:
+            days, weights, values = self._items_by_column[col]
+            window = self._days(days, start, end)
+            weights, values = weights[window], values[window]
+            group = self._moments_by_column[col]
+            error = group['max_rank_error'].to_numpy()[self._days(group['day'].to_numpy(), start, end)].sum()
+            total = stats.loc[col, 'count']
+            if impute and stats.loc[col, 'missing'] and total:
+                weights = np.append(weights, stats.loc[col, 'missing'])
+                values = np.append(values, stats.loc[col, 'mean'])
+                total += stats.loc[col, 'missing']
+            q1, q3 = weighted_quantile(values, weights, [0.25, 0.75])
+            rows[col] = {'q1': q1, 'q3': q3, 'rank_error': error / total if total else np.nan}
+        bounds = pd.DataFrame.from_dict(rows, orient='index')
+        iqr = bounds['q3'] - bounds['q1']
+        bounds.insert(2, 'lower', bounds['q1'] - iqr_factor * iqr)
+        bounds.insert(3, 'upper', bounds['q3'] + iqr_factor * iqr)
+        return bounds
+
+    def save(self, path):
+        """
+        Write the store to Parquet: the moments to `path`, the sketch items
+        next to it with an '-items' suffix.
+
+        Each file is replaced atomically, the items first: a moments file
+        only ever sits next to complete items.
+
+        Args:
+        - path (pathlib.Path): The output path.
+        """
+        write_atomically(_items_path(path), self.items.to_parquet)
+        write_atomically(path, self.moments.to_parquet)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a store written by `save`.
+
+        Args:
+        - path (pathlib.Path): The moments file.
+
+        Returns:
+        - store (SketchStore): The loaded store.
+        """
+        return cls(pd.read_parquet(path), pd.read_parquet(_items_path(path)))
+
+
+def _items_path(path):
+    return path.with_name(f'{path.stem}-items{path.suffix}')
+
+
+@timed()
+def load_station_sketches(file_path, columns=None, cache_dir=None):
+    """
+    Return the per-day sketches of a station, cached next to the station data.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - columns (list): Columns to summarise. Defaults to all numeric columns.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - store (SketchStore): The station's sketches.
+    """
+    name = 'sketches' if columns is None else 'sketches-' + '-'.join(columns)
+    path = derived_cache_path(file_path, name, cache_dir)
+    if pyarrow is not None and path.exists() and _items_path(path).exists():
+        return SketchStore.load(path)
+
+    store = SketchStore.from_frame(load_station(file_path, columns=columns, cache_dir=cache_dir), columns)
+    if pyarrow is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        store.save(path)
+    return store
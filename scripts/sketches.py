@@ -0,0 +1,233 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantile sketch with bounded memory.
+
+    Values are kept in levels of at most `k` items; an item at level h stands
+    for 2**h original values. When a level overflows it is sorted and every
+    other item (random offset) is promoted to the next level, so memory grows
+    only with log(n / k). The rank error of a quantile is at most H / k in
+    the worst case (H = number of levels) and in practice well under 1% for
+    the default `k`; `rank_error` reports the exact worst-case bound of the
+    compactions this sketch has gone through.
+
+    Args:
+    k (int): Capacity of each level. Larger is more accurate.
+    seed (int): Seed for the compaction offsets, for reproducible results.
+    """
+
+    def __init__(self, k=1024, seed=None):
+        self.k = k
+        self.count = 0
+        self.max_rank_error = 0.0
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Add values to the sketch. NaNs are ignored.
+
+        Args:
+        values (array-like): The values to add.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one.
+
+        Args:
+        other (QuantileSketch): The sketch to merge.
+
+        Returns:
+        QuantileSketch: This sketch.
+        """
+        for h, items in enumerate(other._levels):
+            if h == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = np.concatenate([self._levels[h], items])
+        self.count += other.count
+        self.max_rank_error += other.max_rank_error
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Keep the last item of an odd-sized level so weights stay exact.
+                keep = items[len(items) - len(items) % 2:]
+                pairs = items[:len(items) - len(items) % 2]
+                promoted = pairs[self._rng.integers(2)::2]
+                # Each compaction shifts any rank by at most one item's weight.
+                self.max_rank_error += 2.0 ** h
+                self._levels[h] = keep
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+            h += 1
+
+    def quantile(self, q):
+        """
+        Estimate one or more quantiles.
+
+        Args:
+        q (float or array-like): Quantile(s) in [0, 1].
+
+        Returns:
+        float or np.ndarray: The estimated quantile(s), NaN if the sketch is empty.
+        """
+        return weighted_quantile(*self.items(), q)
+
+    @property
+    def rank_error(self):
+        """
+        Worst-case rank error of any quantile, as a fraction of the count.
+
+        Returns:
+        float: 0 while no compaction has happened.
+        """
+        return self.max_rank_error / self.count if self.count else 0.0
+
+    def items(self):
+        """
+        The retained items and their weights.
+
+        Returns:
+        np.ndarray: The items.
+        np.ndarray: Their weights (2**level); the weights sum to `count`.
+        """
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self._levels)])
+        return items, weights
+
+
+def weighted_quantile(items, weights, q):
+    """
+    Quantiles of weighted items, as estimated by `QuantileSketch`.
+
+    Items retained by several sketches can be pooled and queried together,
+    which is the same as merging the sketches without further compaction.
+
+    Args:
+    items (np.ndarray): The items.
+    weights (np.ndarray): Their weights.
+    q (float or array-like): Quantile(s) in [0, 1].
+
+    Returns:
+    float or np.ndarray: The estimated quantile(s), NaN without items.
+    """
+    q = np.asarray(q, dtype=np.float64)
+    if not len(items):
+        return np.full(q.shape, np.nan) if q.ndim else np.nan
+    order = np.argsort(items, kind='stable')
+    items = items[order]
+    cum_weights = np.cumsum(weights[order])
+    ranks = q * (cum_weights[-1] - 1)
+    idx = np.searchsorted(cum_weights, ranks, side='right')
+    return items[np.minimum(idx, len(items) - 1)]
+
+
+class MomentSketch:
+    """
+    Mergeable count, mean, variance, minimum and maximum of several columns.
+
+    Batches are folded in with Chan et al.'s parallel form of Welford's
+    update: counts add, means combine weighted by count, and the sums of
+    squared deviations (M2) add plus a correction for the distance between
+    the means. Unlike running sums of squares this does not lose precision
+    on large, offset values, and sketches of different days or stations
+    merge exactly.
+
+    Args:
+    n_columns (int): Number of columns tracked.
+    """
+
+    def __init__(self, n_columns):
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values):
+        """
+        Add a batch of rows. NaNs are ignored.
+
+        Args:
+        values (array-like): Array of shape (rows, n_columns).
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.count))
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / count
+            m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+        filled = count > 0
+        batch = MomentSketch(len(self.count))
+        batch.count = count
+        batch.mean = np.where(filled, mean, 0.0)
+        batch.m2 = np.where(filled, m2, 0.0)
+        batch.min = np.where(filled, np.nanmin(np.where(valid, values, np.inf), axis=0, initial=np.inf), np.inf)
+        batch.max = np.where(filled, np.nanmax(np.where(valid, values, -np.inf), axis=0, initial=-np.inf), -np.inf)
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one.
+
+        Args:
+        other (MomentSketch): The sketch to merge.
+
+        Returns:
+        MomentSketch: This sketch.
+        """
+        self.count, self.mean, self.m2 = combine_moments(
+            np.stack([self.count, other.count]), np.stack([self.mean, other.mean]), np.stack([self.m2, other.m2]))
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    @property
+    def var(self):
+        """Sample variance (ddof=1), NaN below two values."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), matching pandas."""
+        return np.sqrt(self.var)
+
+
+def combine_moments(count, mean, m2, axis=0):
+    """
+    Combine partial counts, means and M2 along an axis (Chan et al.).
+
+    Args:
+    count (np.ndarray): Partial counts.
+    mean (np.ndarray): Partial means (any value where the count is 0).
+    m2 (np.ndarray): Partial sums of squared deviations from the mean.
+    axis (int): The axis to combine.
+
+    Returns:
+    np.ndarray: Total counts.
+    np.ndarray: Combined means, 0 where the total count is 0.
+    np.ndarray: Combined M2.
+    """
+    total = count.sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combined = np.where(count > 0, count * mean, 0.0).sum(axis=axis) / total
+    combined = np.where(total > 0, combined, 0.0)
+    deviation = np.where(count > 0, mean - np.expand_dims(combined, axis), 0.0)
+    return total, combined, m2.sum(axis=axis) + (count * deviation ** 2).sum(axis=axis)
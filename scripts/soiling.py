@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.parallel import map_stations
+from scripts.station_store import TIMESTAMP_COLUMN
+from scripts.time_index import parse_timestamps
+
+MODULE_COLUMNS = ['ModA', 'ModB']
+# Performance ratios are only meaningful with the sun well up; low-light
+# readings are dominated by sensor offsets and angle-of-incidence effects.
+MIN_IRRADIANCE = 200.0
+DEFAULT_WINDOW = pd.Timedelta(days=3)
+_DAY_NS = pd.Timedelta(days=1).value
+
+
+def has_time_axis(df):
+    """
+    Whether the cleaning-event analysis can place the rows of a frame in time.
+
+    Args:
+    - df (pd.DataFrame): Station data.
+
+    Returns:
+    - bool: True if `df` is indexed by timestamp or has a Timestamp column.
+    """
+    return isinstance(df.index, pd.DatetimeIndex) or TIMESTAMP_COLUMN in df.columns
+
+
+def _timestamps(df):
+    # Station frames are indexed by timestamp; raw CSV frames carry a column.
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index
+    if TIMESTAMP_COLUMN in df.columns:
+        return parse_timestamps(df[TIMESTAMP_COLUMN])
+    raise ValueError("Cleaning-event analysis needs data indexed by timestamp or a Timestamp column.")
+
+
+def _cumsum0(values):
+    # Cumulative sum with a leading zero, so sum(values[a:b]) == c[b] - c[a].
+    out = np.empty(len(values) + 1, dtype=np.float64)
+    out[0] = 0.0
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def _ratio(numerator, denominator):
+    out = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+@timed()
+def detect_cleaning_events(df, flag='Cleaning'):
+    """
+    Find the cleaning events of a station from its cleaning flag.
+
+    An event is a run of consecutive rows with the flag set; runs are found
+    from the flag's rising and falling edges in one pass.
+
+    Args:
+    - df (pd.DataFrame): Station data in time order, indexed by timestamp
+      or with a Timestamp column.
+    - flag (str): The 0/1 cleaning flag column.
+
+    Returns:
+    - events (pd.DataFrame): One row per event with its first and last
+      timestamps ('start', 'end'), its length in rows ('rows') and its row
+      positions ('start_row', 'end_row', end exclusive).
+    """
+    flags = (df[flag].to_numpy() > 0).astype(np.int8)
+    edges = np.diff(flags, prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    timestamps = _timestamps(df) if len(starts) else df.index[:0]
+    return pd.DataFrame({
+        'start': timestamps[starts],
+        'end': timestamps[ends - 1],
+        'rows': ends - starts,
+        'start_row': starts,
+        'end_row': ends,
+    })
+
+
+@timed()
+def analyze_cleaning_events(df, modules=None, irradiance='GHI', window=DEFAULT_WINDOW,
+                            min_irradiance=MIN_IRRADIANCE, flag='Cleaning'):
+    """
+    Measure the effect of each cleaning event on the module sensors.
+
+    For each event the performance ratio of every module (module reading
+    over irradiance, summed over rows with at least `min_irradiance`) is
+    computed in the `window` before the event and the `window` after it.
+    Window sums are differences of cumulative sums, so the cost is one pass
+    over the data whatever the number of events.
+
+    The recovery is the relative change of the ratio across the event; the
+    soiling rate is the relative change per day of the ratio from the
+    window after an event to the window before the next one (negative when
+    the modules get dirtier).
+
+    Args:
+    - df (pd.DataFrame): Station data in time order, indexed by timestamp
+      or with a Timestamp column.
+    - modules (list): Module columns. Defaults to MODULE_COLUMNS.
+    - irradiance (str): Reference irradiance column.
+    - window (str or Timedelta): Length of the windows around each event.
+    - min_irradiance (float): Irradiance below which rows are ignored.
+    - flag (str): The cleaning flag column.
+
+    Returns:
+    - events (pd.DataFrame): The events from `detect_cleaning_events`
+      without the row positions, plus 'days_to_next' and, per module,
+      '<module>_pr_before', '<module>_pr_after', '<module>_recovery' and
+      '<module>_soiling_rate'.
+    """
+    modules = MODULE_COLUMNS if modules is None else list(modules)
+    events = detect_cleaning_events(df, flag)
+    ns = _timestamps(df).as_unit('ns').asi8
+    window_ns = pd.Timedelta(window).value
+
+    start_row = events['start_row'].to_numpy()
+    end_row = events['end_row'].to_numpy()
+    before_lo = np.searchsorted(ns, ns[start_row] - window_ns, side='left')
+    after_hi = np.searchsorted(ns, ns[end_row - 1] + window_ns, side='right')
+
+    result = events.drop(columns=['start_row', 'end_row'])
+    gap_ns = np.append(ns[start_row[1:]] - ns[end_row[:-1] - 1], np.nan) if len(events) else np.empty(0)
+    result['days_to_next'] = gap_ns / _DAY_NS
+    # The ratios are window averages, so the soiling rate is measured
+    # between window midpoints; events closer than a window give no rate.
+    span_days = result['days_to_next'].to_numpy() - window_ns / _DAY_NS
+    span_days[~(span_days > 0)] = np.nan
+
+    sun = df[irradiance].to_numpy(dtype=np.float64)
+    sunny = sun >= min_irradiance
+    for module in modules:
+        reading = df[module].to_numpy(dtype=np.float64)
+        valid = sunny & np.isfinite(reading)
+        module_sums = _cumsum0(np.where(valid, reading, 0.0))
+        sun_sums = _cumsum0(np.where(valid, sun, 0.0))
+        before = _ratio(module_sums[start_row] - module_sums[before_lo], sun_sums[start_row] - sun_sums[before_lo])
+        after = _ratio(module_sums[after_hi] - module_sums[end_row], sun_sums[after_hi] - sun_sums[end_row])
+        result[f'{module}_pr_before'] = before
+        result[f'{module}_pr_after'] = after
+        result[f'{module}_recovery'] = after / before - 1
+        next_before = np.append(before[1:], np.nan)
+        result[f'{module}_soiling_rate'] = (next_before / after - 1) / span_days
+    return result
+
+
+def soiling_summary(events, modules=None):
+    """
+    Summarise the per-event table into soiling-loss estimates per module.
+
+    Medians are used so that a single event next to a data gap or a cloudy
+    window does not dominate the estimate.
+
+    Args:
+    - events (pd.DataFrame): Output of `analyze_cleaning_events`.
+    - modules (list): Module columns. Defaults to MODULE_COLUMNS.
+
+    Returns:
+    - summary (pd.DataFrame): One row per module with the number of events
+      with a measurable recovery ('events'), the median recovery
+      ('recovery'), the median soiling rate per day ('soiling_rate_per_day')
+      and the loss it implies over 30 days without cleaning
+      ('loss_after_30_days').
+    """
+    modules = MODULE_COLUMNS if modules is None else list(modules)
+    rows = {}
+    for module in modules:
+        rate = events[f'{module}_soiling_rate'].median()
+        rows[module] = {
+            'events': int(events[f'{module}_recovery'].notna().sum()),
+            'recovery': events[f'{module}_recovery'].median(),
+            'soiling_rate_per_day': rate,
+            'loss_after_30_days': -30 * rate,
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+@timed()
+def daily_performance_ratio(df, modules=None, irradiance='GHI', min_irradiance=MIN_IRRADIANCE):
+    """
+    Daily performance ratio of each module sensor.
+
+    Args:
+    - df (pd.DataFrame): Station data in time order, indexed by timestamp
+      or with a Timestamp column.
+    - modules (list): Module columns. Defaults to MODULE_COLUMNS.
+    - irradiance (str): Reference irradiance column.
+    - min_irradiance (float): Irradiance below which rows are ignored.
+
+    Returns:
+    - ratios (pd.DataFrame): One row per calendar day, one column per
+      module; NaN on days without enough sun.
+    """
+    modules = MODULE_COLUMNS if modules is None else list(modules)
+    ns = _timestamps(df).as_unit('ns').asi8
+    if not len(ns):
+        return pd.DataFrame(columns=modules, dtype=np.float64)
+    day = ns // _DAY_NS
+    first_day = day[0]
+    codes = day - first_day
+    n_days = int(codes[-1]) + 1
+
+    sun = df[irradiance].to_numpy(dtype=np.float64)
+    sunny = sun >= min_irradiance
+    ratios = {}
+    for module in modules:
+        reading = df[module].to_numpy(dtype=np.float64)
+        valid = sunny & np.isfinite(reading)
+        ratios[module] = _ratio(
+            np.bincount(codes, weights=np.where(valid, reading, 0.0), minlength=n_days),
+            np.bincount(codes, weights=np.where(valid, sun, 0.0), minlength=n_days),
+        )
+    days = pd.DatetimeIndex((first_day + np.arange(n_days)) * _DAY_NS, name='Day')
+    return pd.DataFrame(ratios, index=days)
+
+
+def analyze_stations(frames, max_workers=None, **kwargs):
+    """
+    Run `analyze_cleaning_events` on several stations concurrently.
+
+    Args:
+    - frames (dict): Station name -> station data.
+    - max_workers (int): Thread pool size. Defaults to the number of CPUs.
+    - **kwargs: Passed to `analyze_cleaning_events`.
+
+    Returns:
+    - events (dict): Station name -> per-event table, in the order of `frames`.
+    """
+    return map_stations(lambda df: analyze_cleaning_events(df, **kwargs), frames, max_workers=max_workers)
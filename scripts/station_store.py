@@ -0,0 +1,478 @@
+import hashlib
+import io
+import operator
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.schema import SENSOR_COLUMNS, compact_frame
+from scripts.time_index import TIMESTAMP_FORMAT, TimeIndex, parse_timestamps
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = pq = None
+
+TIMESTAMP_COLUMN = 'Timestamp'
+
+# One week of minute data per row group keeps row-group statistics useful
+# for time-window reads without making the file metadata large.
+ROW_GROUP_SIZE = 7 * 24 * 60
+
+CACHE_DIR_ENV = 'SOLAR_CACHE_DIR'
+
+# Bumped whenever the cached representation changes, so caches written by
+# an older version are rebuilt rather than served.
+CACHE_VERSION = 2
+
+# Comparison operators accepted in `query_station` predicates.
+PREDICATE_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def source_fingerprint(file_path, hash_contents=False):
+    """
+    Compute a fingerprint identifying the current version of a source file.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    hash_contents (bool): Hash the file contents instead of its size and
+        modification time. Slower, but robust to tools that preserve mtime.
+
+    Returns:
+    str: A short hexadecimal fingerprint.
+    """
+    digest = hashlib.sha1()
+    if hash_contents:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    else:
+        stat = os.stat(file_path)
+        digest.update(f'{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_directory(file_path, cache_dir=None):
+    """
+    Resolve the directory holding the columnar cache for a source file.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    cache_dir (str): Explicit cache directory. Defaults to the
+        SOLAR_CACHE_DIR environment variable, then to a `.station_cache`
+        folder next to the source file.
+
+    Returns:
+    Path: The cache directory.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir is None:
+        cache_dir = Path(file_path).resolve().parent / '.station_cache'
+    return Path(cache_dir)
+
+
+def cache_path(file_path, cache_dir=None, hash_contents=False):
+    """
+    Return the columnar cache file for the current version of a source file.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    Path: Location of the Parquet file (which may not exist yet).
+    """
+    fingerprint = source_fingerprint(file_path, hash_contents=hash_contents)
+    stem = Path(file_path).stem
+    return cache_directory(file_path, cache_dir) / f'{stem}-{fingerprint}-v{CACHE_VERSION}.parquet'
+
+
+@timed()
+def parse_station_csv(file_path):
+    """
+    Parse a station CSV into a typed DataFrame indexed by timestamp.
+
+    Sensor columns are read as float32 and the timestamp with the logger's
+    fixed format; the frame is then compacted (see `schema.compact_frame`),
+    which drops all-null columns such as Comments.
+
+    Args:
+    file_path (str or file-like): Path to the source CSV file, or a binary
+        buffer holding CSV text.
+
+    Returns:
+    pd.DataFrame: The typed station data.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    if hasattr(file_path, 'seek'):
+        file_path.seek(0)
+    dtypes = {col: np.float32 for col in SENSOR_COLUMNS if col in header}
+    df = compact_frame(pd.read_csv(file_path, dtype=dtypes))
+
+    if TIMESTAMP_COLUMN in df.columns:
+        df.index = parse_timestamps(df.pop(TIMESTAMP_COLUMN), TIMESTAMP_FORMAT, name=TIMESTAMP_COLUMN)
+    return df
+
+
+def parse_appended_rows(file_path, offset, end=None):
+    """
+    Parse the rows of a station CSV stored from a byte offset on.
+
+    Used to read the rows appended to a file since an earlier version,
+    without parsing the rows before them.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    offset (int): Byte offset of the first row to parse; must be the start
+        of a line.
+    end (int): Byte offset where parsing stops. Defaults to the end of the file.
+
+    Returns:
+    pd.DataFrame: The typed rows, as from `parse_station_csv`.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        body = f.read() if end is None else f.read(max(end - offset, 0))
+    return parse_station_csv(io.BytesIO(header + body))
+
+
+def _hash_bytes(f, digest, size):
+    # Feed the next `size` bytes of `f` to `digest`; returns the last byte read.
+    last = b''
+    while size > 0:
+        block = f.read(min(1 << 20, size))
+        if not block:
+            break
+        digest.update(block)
+        size -= len(block)
+        last = block[-1:]
+    return last
+
+
+def source_state(file_path, previous=None):
+    """
+    Describe the contents of a source file, and whether it only grew since an earlier state.
+
+    A file counts as appended to when it is larger than before, its first
+    `previous['size']` bytes still hash to `previous['digest']` and they
+    end with a complete line.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    previous (dict): A state returned earlier, or None.
+
+    Returns:
+    dict: The current 'fingerprint' (see `source_fingerprint`), 'size' and
+        content 'digest'.
+    int: Byte offset where the appended rows start, or None if the file
+        was not appended to since `previous`.
+    """
+    fingerprint = source_fingerprint(file_path)
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha1()
+    offset = None
+    with open(file_path, 'rb') as f:
+        hashed = 0
+        if previous is not None and 0 < previous['size'] < size:
+            hashed = previous['size']
+            last = _hash_bytes(f, digest, hashed)
+            if last == b'\n' and digest.hexdigest() == previous['digest']:
+                offset = hashed
+        _hash_bytes(f, digest, size - hashed)
+    return {'fingerprint': fingerprint, 'size': size, 'digest': digest.hexdigest()}, offset
+
+
+def write_atomically(target, write):
+    """
+    Write a cache file through a temporary file of its own.
+
+    Readers never see a partly written file, and processes writing the same
+    file at once never write to each other's temporary file; the last one
+    to finish wins.
+
+    Args:
+    target (Path): The file to write.
+    write (callable): Called with the temporary path to write to.
+    """
+    target = Path(target)
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=f'{target.stem}.', suffix='.tmp',
+                                     delete=False) as tmp:
+        pass
+    try:
+        write(tmp.name)
+        os.replace(tmp.name, target)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+@timed()
+def build_station_cache(file_path, cache_dir=None, hash_contents=False):
+    """
+    Convert a station CSV into its columnar cache file.
+
+    Stale cache files for older versions of the same source are removed.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    Path: Location of the written Parquet file.
+    """
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to build the station cache.")
+
+    target = cache_path(file_path, cache_dir, hash_contents=hash_contents)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    df = parse_station_csv(file_path)
+    write_atomically(target, lambda path: df.to_parquet(path, engine='pyarrow', row_group_size=ROW_GROUP_SIZE))
+
+    # Remove the cache and derived files of older versions of the source,
+    # and only those: another station's stem may start with this one.
+    stem = Path(file_path).stem
+    own = re.compile(rf'^{re.escape(stem)}-[0-9a-f]{{16}}-v\d+(\..+)?\.parquet$')
+    for stale in target.parent.glob(f'{stem}-*.parquet'):
+        if own.match(stale.name) and not stale.name.startswith(f'{target.stem}.') and stale != target:
+            stale.unlink(missing_ok=True)
+    return target
+
+
+def derived_cache_path(file_path, name, cache_dir=None, hash_contents=False):
+    """
+    Return the cache file for data derived from the current source version.
+
+    Derived files (aggregates, frequency tables, ...) sit next to the station
+    cache and are discarded together with it when the source changes.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    name (str): Name of the derived dataset, e.g. 'daily'.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    Path: Location of the derived Parquet file (which may not exist yet).
+    """
+    target = cache_path(file_path, cache_dir, hash_contents=hash_contents)
+    return target.with_name(f'{target.stem}.{name}.parquet')
+
+
+def incremental_cache_path(file_path, name, cache_dir=None):
+    """
+    Return the cache file of a dataset that is updated as its source grows.
+
+    Unlike derived files, it is not tied to one version of the source and
+    survives the rebuild of the station cache; it records the source state
+    it describes (see `source_state`) and is rewritten in place.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    name (str): Name of the dataset, e.g. 'daily'.
+    cache_dir (str): Cache directory, see `cache_directory`.
+
+    Returns:
+    Path: Location of the Parquet file (which may not exist yet).
+    """
+    stem = Path(file_path).stem
+    return cache_directory(file_path, cache_dir) / f'{stem}.{name}.v{CACHE_VERSION}.parquet'
+
+
+@timed()
+def load_station(file_path, columns=None, cache_dir=None, refresh=False, hash_contents=False):
+    """
+    Load station data, serving it from the columnar cache when possible.
+
+    The first load of a given source version parses the CSV and writes the
+    cache; later loads memory-map the Parquet file and only decode the
+    requested columns.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    columns (list): Columns to load. Defaults to all columns.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    refresh (bool): Rebuild the cache even if it is up to date.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    pd.DataFrame: The station data indexed by timestamp.
+    """
+    if pyarrow is None:
+        df = parse_station_csv(file_path)
+        return df if columns is None else df[list(columns)]
+
+    target = cache_path(file_path, cache_dir, hash_contents=hash_contents)
+    if refresh or not target.exists():
+        target = build_station_cache(file_path, cache_dir, hash_contents=hash_contents)
+
+    return pd.read_parquet(
+        target,
+        engine='pyarrow',
+        columns=None if columns is None else list(columns),
+        memory_map=True,
+    )
+
+
+def station_columns(file_path, cache_dir=None, hash_contents=False):
+    """
+    Return the data columns of a station without loading them.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    list: The column names, as returned by `load_station`.
+    """
+    if pyarrow is None:
+        return list(parse_station_csv(file_path).columns)
+    target = cache_path(file_path, cache_dir, hash_contents=hash_contents)
+    if not target.exists():
+        target = build_station_cache(file_path, cache_dir, hash_contents=hash_contents)
+    return [name for name in pq.read_schema(target).names
+            if name != TIMESTAMP_COLUMN and not name.startswith('__index_level_')]
+
+
+@timed()
+def load_time_index(file_path, cache_dir=None, hash_contents=False):
+    """
+    Return the implicit time index of a station, cached next to the station data.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    TimeIndex: The station's timestamps as start + step segments.
+
+    Raises:
+    ValueError: If the station's timestamps are out of order.
+    """
+    path = derived_cache_path(file_path, 'time_index', cache_dir, hash_contents=hash_contents)
+    if pyarrow is not None and path.exists():
+        return TimeIndex.from_frame(pd.read_parquet(path))
+
+    df = load_station(file_path, columns=[], cache_dir=cache_dir, hash_contents=hash_contents)
+    time_index = TimeIndex.from_index(df.index)
+    if pyarrow is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(path, time_index.to_frame().to_parquet)
+    return time_index
+
+
+def _may_match(statistics, op, value):
+    # Whether a row group with these min/max statistics can hold a matching row.
+    if statistics is None or not statistics.has_min_max:
+        return True
+    low, high = statistics.min, statistics.max
+    if op == '==':
+        return low <= value <= high
+    if op == '!=':
+        return not (low == high == value)
+    if op in ('<', '<='):
+        return PREDICATE_OPERATORS[op](low, value)
+    return PREDICATE_OPERATORS[op](high, value)
+
+
+def _apply_query(df, start, end, filters):
+    if start is not None or end is not None:
+        if not df.index.is_monotonic_increasing:
+            # Out-of-order logger output: label slicing needs sorted timestamps.
+            df = df.sort_index(kind='stable')
+        df = df.loc[start:end]
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, value in filters:
+            mask &= PREDICATE_OPERATORS[op](df[col], value).to_numpy()
+        df = df[mask]
+    return df
+
+
+@timed()
+def query_station(file_path, columns=None, start=None, end=None, filters=None, cache_dir=None,
+                  hash_contents=False):
+    """
+    Load the rows and columns of a station matching a query.
+
+    The query is pushed down to the columnar cache: the time window is
+    mapped to row groups through the station's time index, row groups whose
+    min/max statistics rule out a predicate are skipped, and only the
+    requested and filtered columns of the remaining row groups are decoded.
+
+    Args:
+    file_path (str): Path to the source CSV file.
+    columns (list): Columns to return. Defaults to all columns.
+    start, end (str or Timestamp): Inclusive time window, as accepted by
+        `df.loc`. None leaves a side open. Stations whose timestamps are
+        out of order are read in full and returned sorted by time.
+    filters (list): Predicates as (column, operator, value) tuples combined
+        with AND, e.g. [('WS', '<=', 4.0), ('Cleaning', '==', 1)]. Operators
+        are ==, !=, <, <=, > and >=.
+    cache_dir (str): Cache directory, see `cache_directory`.
+    hash_contents (bool): See `source_fingerprint`.
+
+    Returns:
+    pd.DataFrame: The matching rows indexed by timestamp.
+    """
+    filters = [tuple(f) for f in filters or []]
+    for _, op, _ in filters:
+        if op not in PREDICATE_OPERATORS:
+            raise ValueError(f"Unsupported predicate operator: {op}")
+
+    if pyarrow is None:
+        df = _apply_query(parse_station_csv(file_path), start, end, filters)
+        return df if columns is None else df[list(columns)]
+
+    target = cache_path(file_path, cache_dir, hash_contents=hash_contents)
+    if not target.exists():
+        target = build_station_cache(file_path, cache_dir, hash_contents=hash_contents)
+    parquet = pq.ParquetFile(target, memory_map=True)
+    metadata = parquet.metadata
+    names = parquet.schema_arrow.names
+
+    # Row groups overlapping the time window.
+    offsets = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+    groups = range(metadata.num_row_groups)
+    if start is not None or end is not None:
+        try:
+            time_index = load_time_index(file_path, cache_dir, hash_contents=hash_contents)
+        except ValueError:
+            # Timestamps out of order: the window can be in any row group.
+            time_index = None
+        if time_index is not None:
+            rows = time_index.slice(start, end)
+            first = np.searchsorted(offsets, rows.start, side='right') - 1
+            last = np.searchsorted(offsets, rows.stop, side='left')
+            groups = range(first, last) if rows.stop > rows.start else range(0)
+
+    # Row groups whose statistics allow a matching row.
+    groups = [
+        i for i in groups
+        if all(_may_match(metadata.row_group(i).column(names.index(col)).statistics, op, value)
+               for col, op, value in filters)
+    ]
+
+    wanted = [name for name in names if name != TIMESTAMP_COLUMN] if columns is None else list(columns)
+    read_columns = wanted + [col for col, _, _ in filters if col not in wanted]
+    df = parquet.read_row_groups(groups, columns=read_columns, use_pandas_metadata=True).to_pandas()
+    return _apply_query(df, start, end, filters)[wanted]
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from scripts.sketches import QuantileSketch
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _scan_statistics(file_path, chunksize, sketch_size):
+    # First pass: per-column sums, counts and quantile sketches of the
+    # numeric columns, plus which columns ever hold non-numeric data.
+    sums, counts, nulls, sketches = {}, {}, {}, {}
+    non_numeric, non_null = set(), {}
+    columns = None
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        columns = chunk.columns
+        for col in chunk.columns:
+            non_null[col] = non_null.get(col, 0) + int(chunk[col].notnull().sum())
+        for col in chunk.select_dtypes(exclude='number').columns:
+            non_numeric.add(col)
+        for col in chunk.select_dtypes(include='number').columns:
+            values = chunk[col].to_numpy(dtype=np.float64)
+            valid = values[~np.isnan(values)]
+            sums[col] = sums.get(col, 0.0) + valid.sum()
+            counts[col] = counts.get(col, 0) + len(valid)
+            nulls[col] = nulls.get(col, 0) + len(values) - len(valid)
+            sketches.setdefault(col, QuantileSketch(k=sketch_size, seed=0)).update(valid)
+    if columns is None:
+        raise pd.errors.EmptyDataError(f"No data in file {file_path}.")
+    return columns, sums, counts, nulls, sketches, non_numeric, non_null
+
+
+def clean_csv_streaming(file_path, output_path, chunksize=DEFAULT_CHUNKSIZE, sketch_size=1024):
+    """
+    Clean a station CSV that does not fit in memory, chunk by chunk.
+
+    Applies the same steps as `clean_data`: drop an all-null Comments column,
+    impute numeric columns with their mean, forward fill the other columns
+    and drop rows outside the 1.5 * IQR bounds of any numeric column. The
+    first pass accumulates means and approximate quartiles per column; the
+    second re-reads the file, cleans each chunk and appends it to
+    `output_path`. Peak memory is bounded by `chunksize`, not the file size.
+
+    Args:
+    - file_path (str): The input CSV file.
+    - output_path (str): The CSV file to write the cleaned rows to.
+    - chunksize (int): Rows per chunk.
+    - sketch_size (int): Capacity of the quantile sketches, see `QuantileSketch`.
+
+    Returns:
+    - bounds (pd.DataFrame): The mean and IQR bounds used for each numeric
+      column, with the number of rows read and written in `attrs`.
+    """
+    columns, sums, counts, nulls, sketches, non_numeric, non_null = _scan_statistics(
+        file_path, chunksize, sketch_size)
+
+    dropped = [col for col in ['Comments'] if col in columns and non_null[col] == 0]
+    num_cols = [col for col in columns if col in sums and col not in non_numeric and col not in dropped]
+    cat_cols = [col for col in columns if col in non_numeric and col not in dropped]
+
+    means = pd.Series({col: sums[col] / counts[col] if counts[col] else np.nan for col in num_cols}, dtype=np.float64)
+    for col in num_cols:
+        # clean_data computes the quartiles after mean imputation.
+        remaining = nulls[col]
+        while remaining > 0 and counts[col]:
+            size = min(remaining, chunksize)
+            sketches[col].update(np.full(size, means[col]))
+            remaining -= size
+    quartiles = np.array([sketches[col].quantile([0.25, 0.75]) for col in num_cols]).reshape(-1, 2)
+    iqr = quartiles[:, 1] - quartiles[:, 0]
+    bounds = pd.DataFrame({
+        'mean': means.to_numpy(),
+        'lower': quartiles[:, 0] - 1.5 * iqr,
+        'upper': quartiles[:, 1] + 1.5 * iqr,
+    }, index=pd.Index(num_cols))
+
+    lower = bounds['lower'].to_numpy()
+    upper = bounds['upper'].to_numpy()
+    carry = None
+    rows_in = rows_out = 0
+    for i, chunk in enumerate(pd.read_csv(file_path, chunksize=chunksize)):
+        chunk = chunk.drop(columns=dropped)
+        chunk[num_cols] = chunk[num_cols].fillna(means)
+        if cat_cols:
+            if carry is not None:
+                first = chunk.index[0]
+                chunk.loc[first, cat_cols] = chunk.loc[first, cat_cols].fillna(carry)
+            chunk[cat_cols] = chunk[cat_cols].ffill()
+            carry = chunk[cat_cols].iloc[-1]
+
+        values = chunk[num_cols].to_numpy(dtype=np.float64)
+        mask = ((values >= lower) & (values <= upper)).all(axis=1)
+        cleaned = chunk[mask]
+        cleaned.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows_in += len(chunk)
+        rows_out += len(cleaned)
+
+    bounds.attrs['rows_in'] = rows_in
+    bounds.attrs['rows_out'] = rows_out
+    return bounds
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# One year of minute readings, the size of each real station file.
+STATION_ROWS = 525_600
+
+STATION_COLUMNS = [
+    'GHI', 'DNI', 'DHI', 'ModA', 'ModB', 'Tamb', 'RH', 'WS', 'WSgust',
+    'WD', 'BP', 'Cleaning', 'TModA', 'TModB',
+]
+
+
+def make_station_frame(n_rows=STATION_ROWS, start='2021-08-09 00:01', seed=0, missing_fraction=0.001):
+    """
+    Generate synthetic minute-resolution station data.
+
+    Irradiance follows a clipped daily sine with noise, module readings and
+    temperatures track it, and wind, humidity and pressure are random around
+    realistic levels. A small fraction of GHI/DNI/DHI values is missing and
+    the Cleaning flag is set for one minute roughly every two weeks.
+
+    Args:
+    - n_rows (int): Number of minutes to generate.
+    - start (str): Timestamp of the first row.
+    - seed (int): Random seed.
+    - missing_fraction (float): Fraction of irradiance values set to NaN.
+
+    Returns:
+    - df (pd.DataFrame): Data with a string 'Timestamp' column and the
+      STATION_COLUMNS, as read from a station CSV.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start, periods=n_rows, freq='min')
+    minute_of_day = np.arange(n_rows) % 1440
+    sun = np.clip(np.sin((minute_of_day / 60 - 6) / 12 * np.pi), 0, None).astype(np.float32)
+
+    def noise(scale):
+        return rng.normal(0, scale, n_rows).astype(np.float32)
+
+    ghi = sun * 950 + noise(15)
+    dni = sun * 750 + noise(20)
+    dhi = sun * 220 + noise(8)
+    for values in (ghi, dni, dhi):
+        values[rng.random(n_rows) < missing_fraction] = np.nan
+
+    tamb = 24 + 8 * sun + noise(1.5)
+    df = pd.DataFrame({
+        'Timestamp': timestamps.strftime('%Y-%m-%d %H:%M'),
+        'GHI': ghi,
+        'DNI': dni,
+        'DHI': dhi,
+        'ModA': ghi * 0.95 + noise(5),
+        'ModB': ghi * 0.93 + noise(5),
+        'Tamb': tamb,
+        'RH': rng.uniform(15, 100, n_rows).astype(np.float32),
+        'WS': rng.gamma(2.0, 1.0, n_rows).astype(np.float32),
+        'WSgust': rng.gamma(3.0, 1.0, n_rows).astype(np.float32),
+        'WD': rng.uniform(0, 360, n_rows).astype(np.float32),
+        'BP': rng.integers(990, 1000, n_rows),
+        'Cleaning': (rng.random(n_rows) < 1 / 20_160).astype(np.int64),
+        'TModA': tamb + 22 * sun + noise(1),
+        'TModB': tamb + 20 * sun + noise(1),
+    })
+    return df
+
+
+def write_station_csv(file_path, n_rows=STATION_ROWS, seed=0):
+    """
+    Write synthetic station data to a CSV file like the real station exports.
+
+    Args:
+    - file_path (str): Output path.
+    - n_rows (int): Number of minutes to generate.
+    - seed (int): Random seed.
+
+    Returns:
+    - file_path (str): The written path.
+    """
+    make_station_frame(n_rows, seed=seed).to_csv(file_path, index=False, float_format='%.1f')
+    return file_path
@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+# Timestamp format written by the station loggers, e.g. '2021-08-09 00:01'.
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def parse_timestamps(values, fmt=TIMESTAMP_FORMAT, name='Timestamp'):
+    """
+    Parse timestamp strings into a DatetimeIndex.
+
+    Values matching `fmt` take pandas' vectorised fixed-format path; files
+    in another layout fall back to ISO 8601 and finally to per-element
+    format inference, which is an order of magnitude slower.
+
+    Args:
+    - values (array-like): The timestamp strings.
+    - fmt (str): The expected strftime format.
+    - name (str): Name of the returned index.
+
+    Returns:
+    - index (pd.DatetimeIndex): The parsed timestamps.
+    """
+    for attempt in (fmt, 'ISO8601'):
+        try:
+            return pd.DatetimeIndex(pd.to_datetime(values, format=attempt), name=name)
+        except (ValueError, TypeError):
+            continue
+    return pd.DatetimeIndex(pd.to_datetime(values, format='mixed'), name=name)
+
+
+def detect_step(ns):
+    """
+    Most common positive spacing between consecutive timestamps.
+
+    Args:
+    - ns (np.ndarray): Non-decreasing timestamps as int64 nanoseconds.
+
+    Returns:
+    - step (int): The cadence in nanoseconds, or 0 when no two rows differ.
+    """
+    diffs = np.diff(ns)
+    diffs = diffs[diffs > 0]
+    if not len(diffs):
+        return 0
+    steps, counts = np.unique(diffs, return_counts=True)
+    return int(steps[counts.argmax()])
+
+
+class TimeIndex:
+    """
+    Implicit representation of a regularly sampled, non-decreasing time index.
+
+    Rows are stored as runs of constant cadence: each segment is the row
+    position and timestamp where the run starts. A complete minute series is
+    a single segment, and every gap, irregular step or repeated timestamp
+    in the logger output starts a new one. Locating a timestamp is a binary search over the (few)
+    segments plus one division, instead of a search over every row.
+
+    Args:
+    - step (int): The cadence in nanoseconds.
+    - positions (np.ndarray): Row position of the first row of each segment.
+    - starts (np.ndarray): Timestamp (int64 ns) of the first row of each segment.
+    - length (int): Total number of rows.
+    """
+
+    def __init__(self, step, positions, starts, length):
+        self.step = int(step)
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.length = int(length)
+        self.lengths = np.diff(np.append(self.positions, self.length))
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Build the implicit index from timestamps.
+
+        Args:
+        - index (pd.DatetimeIndex): Non-decreasing timestamps; repeated
+          timestamps (e.g. a logger writing a minute twice) are kept.
+
+        Returns:
+        - time_index (TimeIndex): The implicit index.
+
+        Raises:
+        - ValueError: If the timestamps are out of order.
+        """
+        ns = pd.DatetimeIndex(index).as_unit('ns').asi8
+        diffs = np.diff(ns)
+        if (diffs < 0).any():
+            raise ValueError("Timestamps must be in increasing order to build a time index.")
+        step = detect_step(ns)
+        breaks = (diffs != step) | (diffs == 0)
+        positions = np.concatenate([[0], np.flatnonzero(breaks) + 1]) if len(ns) else np.empty(0, np.int64)
+        return cls(step, positions, ns[positions], len(ns))
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def is_regular(self):
+        """True if the index has no gaps or irregular steps."""
+        return len(self.positions) <= 1
+
+    def gaps(self):
+        """
+        List the interruptions of the regular cadence.
+
+        Repeated timestamps are not gaps and are left out.
+
+        Returns:
+        - gaps (pd.DataFrame): One row per gap with the last timestamp before
+          it ('after'), the first timestamp after it ('before') and the
+          number of missing steps ('missing').
+        """
+        last = self.starts[:-1] + (self.lengths[:-1] - 1) * self.step
+        first = self.starts[1:]
+        forward = first > last
+        last, first = last[forward], first[forward]
+        missing = (first - last) // self.step - 1 if self.step else np.zeros(len(first), np.int64)
+        return pd.DataFrame({
+            'after': pd.to_datetime(last),
+            'before': pd.to_datetime(first),
+            'missing': missing,
+        })
+
+    def position(self, timestamp, side='left'):
+        """
+        Row position of a timestamp, like `searchsorted` on the full index.
+
+        Args:
+        - timestamp (str, Timestamp or datetime-like array): What to locate.
+        - side (str): 'left' for the first row at or after the timestamp,
+          'right' for the first row after it.
+
+        Returns:
+        - position (int or np.ndarray): Row position(s), between 0 and len(self).
+        """
+        t = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(timestamp))).as_unit('ns').asi8
+        if self.length == 0:
+            result = np.zeros(len(t), dtype=np.int64)
+        else:
+            if side not in ('left', 'right'):
+                raise ValueError(f"side must be 'left' or 'right', got {side!r}")
+            # The last segment starting before (left) or at (right) the
+            # timestamp; with repeated timestamps several segments can start
+            # at the same time, and every row of the earlier ones counts.
+            segment = np.searchsorted(self.starts, t, side=side) - 1
+            before_first = segment < 0
+            segment = segment.clip(min=0)
+            offset = t - self.starts[segment]
+            step = max(self.step, 1)
+            if side == 'left':
+                within = -(-offset // step)
+            else:
+                within = offset // step + 1
+            within = np.minimum(within, self.lengths[segment])
+            result = np.where(before_first, 0, self.positions[segment] + within)
+        return int(result[0]) if np.ndim(timestamp) == 0 else result
+
+    def slice(self, start=None, end=None):
+        """
+        Row slice covering an inclusive time window, like `df.loc[start:end]`.
+
+        Args:
+        - start, end (str or Timestamp): Window bounds. None leaves a side open.
+
+        Returns:
+        - rows (slice): Positional slice for `df.iloc`.
+        """
+        lo = 0 if start is None else self.position(start, 'left')
+        hi = self.length if end is None else self.position(end, 'right')
+        return slice(lo, max(lo, hi))
+
+    def to_index(self, name='Timestamp'):
+        """
+        Materialise the timestamps.
+
+        Returns:
+        - index (pd.DatetimeIndex): The full index.
+        """
+        offsets = np.repeat(self.starts - self.positions * self.step, self.lengths)
+        ns = offsets + np.arange(self.length, dtype=np.int64) * self.step
+        return pd.DatetimeIndex(ns.astype('datetime64[ns]'), name=name)
+
+    def to_frame(self):
+        """
+        Return the segments as a table, for storing next to the station cache.
+
+        Returns:
+        - segments (pd.DataFrame): Columns 'position', 'start', 'step' and 'length'.
+        """
+        return pd.DataFrame({
+            'position': self.positions,
+            'start': self.starts,
+            'step': np.full(len(self.positions), self.step, dtype=np.int64),
+            'length': np.full(len(self.positions), self.length, dtype=np.int64),
+        })
+
+    @classmethod
+    def from_frame(cls, segments):
+        """
+        Rebuild an index from `to_frame` output.
+
+        Args:
+        - segments (pd.DataFrame): The stored segments.
+
+        Returns:
+        - time_index (TimeIndex): The implicit index.
+        """
+        if segments.empty:
+            return cls(0, [], [], 0)
+        return cls(segments['step'].iloc[0], segments['position'], segments['start'], segments['length'].iloc[0])
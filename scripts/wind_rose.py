@@ -0,0 +1,172 @@
+import hashlib
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import timed
+from scripts.station_store import derived_cache_path, load_station, pyarrow, write_atomically
+
+DEFAULT_SECTORS = 16
+# Speed class edges in m/s; the last class is open-ended.
+DEFAULT_SPEED_BINS = (0.0, 0.5, 2.0, 4.0, 6.0, 8.0, 10.0, np.inf)
+DIRECTION_LABELS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+
+
+def speed_labels(speed_bins=DEFAULT_SPEED_BINS):
+    """
+    Labels of the speed classes, e.g. '2-4' and '>10'.
+
+    Args:
+    - speed_bins (sequence): Increasing class edges in m/s.
+
+    Returns:
+    - labels (list): One label per class.
+    """
+    return [f'>{lo:g}' if np.isinf(hi) else f'{lo:g}-{hi:g}' for lo, hi in zip(speed_bins[:-1], speed_bins[1:])]
+
+
+def sector_centers(sectors=DEFAULT_SECTORS):
+    """
+    Direction of the centre of each sector, in degrees from north.
+
+    Args:
+    - sectors (int): Number of sectors.
+
+    Returns:
+    - centers (np.ndarray): Sector centres; the first sector is centred on north.
+    """
+    return np.arange(sectors) * (360.0 / sectors)
+
+
+def _codes(df, ws_col, wd_col, sectors, speed_bins):
+    # Sector and speed class of every row; rows without a valid reading are dropped.
+    ws = df[ws_col].to_numpy(dtype=np.float64)
+    wd = df[wd_col].to_numpy(dtype=np.float64)
+    valid = np.isfinite(ws) & np.isfinite(wd) & (ws >= speed_bins[0])
+    # Invalid rows are dropped by the caller; zero them so the cast stays quiet.
+    wd = np.where(valid, wd, 0.0)
+    width = 360.0 / sectors
+    sector = (np.floor(((wd + width / 2) % 360.0) / width).astype(np.int64)) % sectors
+    speed = np.searchsorted(np.asarray(speed_bins, dtype=np.float64), ws, side='right') - 1
+    speed = np.clip(speed, 0, len(speed_bins) - 2)
+    return sector, speed, valid
+
+
+@timed()
+def wind_rose_table(df, ws_col='WS', wd_col='WD', sectors=DEFAULT_SECTORS, speed_bins=DEFAULT_SPEED_BINS,
+                    freq=None):
+    """
+    Count wind readings per direction sector and speed class.
+
+    Every reading is reduced to one integer key and counted with a single
+    `np.bincount`, so the cost is one pass over the data however long the
+    record. Tables of different periods can be added together.
+
+    Args:
+    - df (pd.DataFrame): Data with wind speed and direction, indexed by
+      timestamp when `freq` is given.
+    - ws_col (str): Wind speed column (m/s).
+    - wd_col (str): Wind direction column (degrees from north).
+    - sectors (int): Number of direction sectors.
+    - speed_bins (sequence): Increasing speed class edges.
+    - freq (str): Optional period, e.g. 'M', to count each time window separately.
+
+    Returns:
+    - table (pd.DataFrame): Counts with one row per sector (indexed by its
+      centre in degrees) and one column per speed class. With `freq`, the
+      index is (period, sector).
+    """
+    sector, speed, valid = _codes(df, ws_col, wd_col, sectors, speed_bins)
+    n_speeds = len(speed_bins) - 1
+    key = sector * n_speeds + speed
+    columns = pd.Index(speed_labels(speed_bins), name='Speed (m/s)')
+    centers = pd.Index(sector_centers(sectors), name='Sector')
+
+    if freq is None:
+        counts = np.bincount(key[valid], minlength=sectors * n_speeds)
+        return pd.DataFrame(counts.reshape(sectors, n_speeds), index=centers, columns=columns)
+
+    periods = df.index.to_period(freq)
+    period_codes, uniques = pd.factorize(periods, sort=True)
+    cells = sectors * n_speeds
+    counts = np.bincount(period_codes[valid] * cells + key[valid], minlength=len(uniques) * cells)
+    index = pd.MultiIndex.from_product([uniques, centers], names=['Period', 'Sector'])
+    return pd.DataFrame(counts.reshape(len(uniques) * sectors, n_speeds), index=index, columns=columns)
+
+
+def frequencies(table):
+    """
+    Turn a count table into percentages of all readings.
+
+    Args:
+    - table (pd.DataFrame): Output of `wind_rose_table` for a single period.
+
+    Returns:
+    - percent (pd.DataFrame): The same table in percent.
+    """
+    total = table.to_numpy().sum()
+    return table * (100.0 / total) if total else table.astype(np.float64)
+
+
+def draw_wind_rose(ax, table, cmap='viridis'):
+    """
+    Draw a wind rose as stacked bars on a polar axis.
+
+    Args:
+    - ax (matplotlib.projections.polar.PolarAxes): The axis to draw on.
+    - table (pd.DataFrame): Counts from `wind_rose_table` for one period.
+    - cmap (str): Colormap of the speed classes.
+    """
+    percent = frequencies(table)
+    theta = np.radians(percent.index.to_numpy(dtype=np.float64))
+    width = 2 * np.pi / len(percent)
+    colors = matplotlib.colormaps[cmap](np.linspace(0, 1, percent.shape[1]))
+    bottom = np.zeros(len(percent))
+    for color, label in zip(colors, percent.columns):
+        values = percent[label].to_numpy()
+        ax.bar(theta, values, width=width, bottom=bottom, color=color, edgecolor='white', linewidth=0.5,
+               label=label)
+        bottom += values
+
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_thetagrids(45.0 * np.arange(8), DIRECTION_LABELS)
+    ax.set_rlabel_position(270)
+    ax.yaxis.set_major_formatter(lambda value, _: f'{value:g}%')
+    ax.legend(title=table.columns.name, loc='upper left', bbox_to_anchor=(1.05, 1.0))
+
+
+def _cache_name(sectors, speed_bins, freq):
+    bins = hashlib.sha1(repr(tuple(float(b) for b in speed_bins)).encode()).hexdigest()[:8]
+    return f'windrose-{sectors}-{bins}' + (f'-{freq}' if freq else '')
+
+
+@timed()
+def load_station_wind_rose(file_path, sectors=DEFAULT_SECTORS, speed_bins=DEFAULT_SPEED_BINS, freq=None,
+                           cache_dir=None):
+    """
+    Return the wind rose table of a station, cached next to the station data.
+
+    Args:
+    - file_path (str): Path to the station CSV file.
+    - sectors (int): Number of direction sectors.
+    - speed_bins (sequence): Increasing speed class edges.
+    - freq (str): Optional period, see `wind_rose_table`.
+    - cache_dir (str): Cache directory, see `station_store.cache_directory`.
+
+    Returns:
+    - table (pd.DataFrame): The station's wind rose counts.
+    """
+    path = derived_cache_path(file_path, _cache_name(sectors, speed_bins, freq), cache_dir)
+    if pyarrow is not None and path.exists():
+        table = pd.read_parquet(path)
+        table.columns.name = 'Speed (m/s)'
+        return table
+
+    df = load_station(file_path, columns=['WS', 'WD'], cache_dir=cache_dir)
+    table = wind_rose_table(df, sectors=sectors, speed_bins=speed_bins, freq=freq)
+    if pyarrow is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(path, table.to_parquet)
+    return table
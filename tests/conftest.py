@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.synthetic import make_station_frame, write_station_csv
+
+# Five days of minute data: enough days for daily/monthly rollups and
+# several row groups, small enough to keep the suite fast.
+TEST_ROWS = 5 * 1440 + 200
+
+
+@pytest.fixture
+def station_frame():
+    """Synthetic minute data indexed by timestamp, with some missing irradiance."""
+    df = make_station_frame(TEST_ROWS, start='2022-01-30 22:00', missing_fraction=0.01)
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('Timestamp')), name='Timestamp')
+    return df
+
+
+@pytest.fixture
+def gappy_frame(station_frame):
+    """The station frame with a few hours and scattered minutes missing."""
+    rng = np.random.default_rng(1)
+    drop = np.zeros(len(station_frame), dtype=bool)
+    drop[3000:3180] = True
+    drop[rng.choice(len(station_frame), 50, replace=False)] = True
+    return station_frame[~drop]
+
+
+@pytest.fixture
+def station_csv(tmp_path):
+    """A synthetic station CSV and a cache directory of its own."""
+    path = write_station_csv(tmp_path / 'station.csv', TEST_ROWS)
+    return path, tmp_path / 'cache'
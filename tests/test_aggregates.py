@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import aggregates
+from scripts.aggregates import AggregateStore, load_station_aggregates
+from scripts.station_store import load_station
+from scripts.synthetic import make_station_frame
+
+COLUMNS = ['GHI', 'DNI', 'Tamb', 'WS']
+
+
+def _assert_close(result, expected):
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9, atol=1e-9, check_freq=False,
+                                  check_names=False)
+
+
+@pytest.mark.parametrize('frame', ['station_frame', 'gappy_frame'])
+def test_daily_series_matches_resample(request, frame):
+    df = request.getfixturevalue(frame)
+    store = AggregateStore.from_frame(df, COLUMNS)
+    _assert_close(store.daily_series(), df[COLUMNS].astype(np.float64).resample('D').mean())
+
+
+def test_daily_series_window(station_frame):
+    store = AggregateStore.from_frame(station_frame, COLUMNS)
+    expected = station_frame[COLUMNS].astype(np.float64).resample('D').mean().loc['2022-02-01':'2022-02-02']
+    _assert_close(store.daily_series(start='2022-02-01', end='2022-02-02'), expected)
+
+
+def test_monthly_matches_groupby(station_frame):
+    store = AggregateStore.from_frame(station_frame, COLUMNS)
+    values = station_frame[COLUMNS].astype(np.float64)
+    grouped = values.groupby(values.index.to_period('M'))
+    _assert_close(store.monthly(), pd.concat({'mean': grouped.mean(), 'std': grouped.std()}, axis=1))
+
+
+@pytest.mark.parametrize('start, end', [(None, None), ('2022-02-01', '2022-02-03'), ('2022-02-02', None)])
+def test_stats_match_describe(station_frame, start, end):
+    store = AggregateStore.from_frame(station_frame, COLUMNS)
+    # Date strings select whole days, in the store and in the minute data alike.
+    values = station_frame[COLUMNS].astype(np.float64).loc[start:end]
+    _assert_close(store.stats(start=start, end=end), values.agg(['mean', 'std']))
+
+
+def test_append_matches_full_build(station_frame):
+    split = station_frame.index[3000]
+    store = AggregateStore.from_frame(station_frame.loc[:split - pd.Timedelta('1ns')], COLUMNS)
+    store.append(station_frame.loc[split:])
+    _assert_close(store.daily, AggregateStore.from_frame(station_frame, COLUMNS).daily)
+
+
+def test_save_load_round_trip(tmp_path, station_frame):
+    store = AggregateStore.from_frame(station_frame, COLUMNS)
+    store.source = {'fingerprint': 'abc', 'size': 1, 'digest': 'def'}
+    store.save(tmp_path / 'daily.parquet')
+    loaded = AggregateStore.load(tmp_path / 'daily.parquet')
+    _assert_close(loaded.daily, store.daily)
+    assert loaded.source == store.source
+
+
+def _write_rows(df, path, append=False):
+    df.to_csv(path, index=False, float_format='%.1f', mode='a' if append else 'w', header=not append)
+
+
+def test_cached_aggregates_follow_appends(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    df = make_station_frame(4000)
+    path, cache_dir = tmp_path / 'station.csv', tmp_path / 'cache'
+    _write_rows(df.iloc[:2500], path)
+    load_station_aggregates(path, COLUMNS, cache_dir)
+
+    # An append folds in the new rows without reloading the station.
+    _write_rows(df.iloc[2500:], path, append=True)
+    full = load_station(path, cache_dir=tmp_path / 'reference')
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the station was reloaded")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(aggregates, 'load_station', fail)
+        appended = load_station_aggregates(path, COLUMNS, cache_dir)
+        # Unchanged source: served from the cache.
+        cached = load_station_aggregates(path, COLUMNS, cache_dir)
+    expected = full[COLUMNS].astype(np.float64).resample('D').mean()
+    _assert_close(appended.daily_series(), expected)
+    _assert_close(cached.daily_series(), expected)
+
+    # Any other change rebuilds the rollups.
+    _write_rows(df.iloc[:1000], path)
+    rebuilt = load_station_aggregates(path, COLUMNS, cache_dir)
+    expected = load_station(path, cache_dir=tmp_path / 'reference')[COLUMNS].astype(np.float64).resample('D').mean()
+    _assert_close(rebuilt.daily_series(), expected)
@@ -0,0 +1,26 @@
+import json
+
+from scripts import benchmark
+
+
+def _stub_benchmarks(monkeypatch, func):
+    monkeypatch.setattr(benchmark, 'build_benchmarks', lambda: {'stub': (lambda df: (df,), func)})
+
+
+def test_failing_benchmark_fails_the_run(monkeypatch, tmp_path, capsys):
+    def broken(df):
+        raise RuntimeError('boom')
+
+    _stub_benchmarks(monkeypatch, broken)
+    output = tmp_path / 'bench.json'
+    assert benchmark.main(['--scales', '0.001', '--repeat', '1', '--output', str(output)]) == 1
+    assert 'RuntimeError: boom' in capsys.readouterr().err
+    assert json.loads(output.read_text())['results'][0]['error'] == 'RuntimeError: boom'
+
+
+def test_passing_benchmarks_succeed(monkeypatch, tmp_path):
+    _stub_benchmarks(monkeypatch, len)
+    output = tmp_path / 'bench.json'
+    assert benchmark.main(['--scales', '0.001', '--repeat', '1', '--output', str(output)]) == 0
+    assert benchmark.main(['--scales', '0.001', '--repeat', '1', '--compare', str(output),
+                           '--tolerance', '1000']) == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.eda_helpers import clean_data
+
+
+def baseline_clean_data(df):
+    # The original pandas implementation of `clean_data`.
+    if 'Comments' in df.columns:
+        if df['Comments'].isnull().all():
+            df = df.drop('Comments', axis=1)
+    num_cols = df.select_dtypes(include=['int64', 'float64']).columns
+    cat_cols = df.select_dtypes(include=['object', 'string']).columns
+    df[num_cols] = df[num_cols].fillna(df[num_cols].mean())
+    df[cat_cols] = df[cat_cols].ffill()
+    mask = np.ones(len(df), dtype=bool)
+    for col in num_cols:
+        Q1 = df[col].quantile(0.25)
+        Q3 = df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        mask = mask & ((df[col] >= (Q1 - 1.5 * IQR)) & (df[col] <= (Q3 + 1.5 * IQR)))
+    return df[mask]
+
+
+@pytest.fixture(params=[object, 'str'])
+def raw_frame(request, station_frame):
+    # As read from a CSV by pandas: float64 sensors, an empty Comments
+    # column and a text column with gaps.
+    df = station_frame.astype({col: np.float64 for col in station_frame.select_dtypes('float32').columns})
+    df['Comments'] = np.nan
+    operators = np.where(np.arange(len(df)) % 97 == 0, None, 'crew-a')
+    df['Operator'] = pd.Series(operators, index=df.index, dtype=request.param)
+    df.iloc[0, df.columns.get_loc('Operator')] = 'crew-b'
+    # Some outliers beyond the IQR bounds.
+    df.iloc[::500, df.columns.get_loc('WS')] = 60.0
+    return df
+
+
+def test_clean_data_matches_baseline(raw_frame):
+    expected = baseline_clean_data(raw_frame.copy())
+    result = clean_data(raw_frame)
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+
+
+def test_clean_data_does_not_modify_input(raw_frame):
+    before = raw_frame.copy()
+    clean_data(raw_frame)
+    pd.testing.assert_frame_equal(raw_frame, before)
+
+
+def test_clean_data_audit_counts(raw_frame):
+    cleaned, audit = clean_data(raw_frame, return_audit=True)
+    assert audit.attrs['rows_in'] == len(raw_frame)
+    assert audit.attrs['rows_out'] == len(cleaned)
+    assert audit.loc['GHI', 'imputed'] == raw_frame['GHI'].isnull().sum()
+    assert audit.loc['WS', 'rejected'] >= (raw_frame['WS'] == 60.0).sum()
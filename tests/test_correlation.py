@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.correlation import (CorrelationStore, correlations_by_period, load_station_correlations, pearson_matrix,
+                                 spearman_matrix)
+
+COLUMNS = ['GHI', 'DNI', 'DHI', 'TModA', 'TModB', 'WS']
+
+
+def _assert_close(result, expected):
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-8, atol=1e-10)
+
+
+def _expected(df, columns=COLUMNS, method='pearson'):
+    return df[columns].astype(np.float64).corr(method=method)
+
+
+@pytest.mark.parametrize('frame', ['station_frame', 'gappy_frame'])
+def test_pearson_matrix_matches_corr(request, frame):
+    df = request.getfixturevalue(frame)
+    _assert_close(pearson_matrix(df, COLUMNS), _expected(df))
+
+
+def test_pearson_matrix_constant_and_sparse_columns(station_frame):
+    df = station_frame[COLUMNS].astype(np.float64)
+    df['Flat'] = 1.0
+    df['Sparse'] = np.nan
+    df.iloc[:1, df.columns.get_loc('Sparse')] = 3.0
+    _assert_close(pearson_matrix(df), df.corr())
+
+
+@pytest.mark.parametrize('start, end', [(None, None), ('2022-02-01', '2022-02-02'), (None, '2022-01-31')])
+def test_store_pearson_matches_corr(station_frame, start, end):
+    store = CorrelationStore.from_frame(station_frame, COLUMNS)
+    _assert_close(store.pearson(start=start, end=end), _expected(station_frame.loc[start:end]))
+    subset = ['DNI', 'GHI', 'WS']
+    _assert_close(store.pearson(subset, start, end), _expected(station_frame.loc[start:end], subset))
+
+
+def test_store_by_period_matches_corr(station_frame):
+    stores = {'a': CorrelationStore.from_frame(station_frame, COLUMNS)}
+    result = correlations_by_period(stores, 'M', COLUMNS).loc['a']
+    values = station_frame[COLUMNS].astype(np.float64)
+    for period, group in values.groupby(values.index.to_period('M')):
+        expected = group.corr()
+        expected.index.name = 'Column'
+        _assert_close(result.loc[period], expected)
+
+
+def test_store_append_matches_full_build(gappy_frame):
+    split = gappy_frame.index[4000]
+    store = CorrelationStore.from_frame(gappy_frame.loc[:split - pd.Timedelta('1ns')], COLUMNS)
+    store.append(gappy_frame.loc[split:])
+    _assert_close(store.pearson(), _expected(gappy_frame))
+
+
+def test_spearman_matrix_matches_corr(station_frame, gappy_frame):
+    complete = station_frame[COLUMNS].dropna()
+    _assert_close(spearman_matrix(complete, COLUMNS), _expected(complete, method='spearman'))
+    _assert_close(spearman_matrix(gappy_frame, COLUMNS), _expected(gappy_frame, method='spearman'))
+
+
+def test_save_load_keeps_column_names(tmp_path, station_frame):
+    pytest.importorskip('pyarrow')
+    df = station_frame[COLUMNS[:3]].set_axis(['GHI:raw', 'DNI', 'sum:1:2'], axis=1)
+    store = CorrelationStore.from_frame(df)
+    store.save(tmp_path / 'pairs.parquet')
+    loaded = CorrelationStore.load(tmp_path / 'pairs.parquet')
+    assert loaded.columns == ['GHI:raw', 'DNI', 'sum:1:2']
+    _assert_close(loaded.pearson(), df.astype(np.float64).corr())
+
+
+def test_station_correlations_are_cached(station_csv):
+    pytest.importorskip('pyarrow')
+    path, cache_dir = station_csv
+    store = load_station_correlations(path, COLUMNS, cache_dir)
+    assert len(list(cache_dir.glob('*.pairs-*.parquet'))) == 1
+    assert not list(cache_dir.glob('*.tmp'))
+    _assert_close(load_station_correlations(path, COLUMNS, cache_dir).pearson(), store.pearson())
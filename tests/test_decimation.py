@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.decimation import decimate_frame, lttb_indices, minmax_indices
+from scripts.time_index import TimeIndex
+
+COLUMNS = ['GHI', 'DNI', 'DHI', 'Tamb']
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+@pytest.mark.parametrize('max_points', [10, 500, 2000])
+def test_decimated_frame_fits_the_budget(station_frame, method, max_points):
+    plot_df = decimate_frame(station_frame, COLUMNS, max_points, method=method)
+    assert len(plot_df) <= max_points
+    assert list(plot_df.columns) == COLUMNS
+    assert plot_df.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(plot_df, station_frame.loc[plot_df.index, COLUMNS])
+
+
+def test_minmax_keeps_every_extreme(station_frame):
+    plot_df = decimate_frame(station_frame, COLUMNS, 2000)
+    for col in COLUMNS:
+        assert plot_df[col].max() == station_frame[col].max()
+        assert plot_df[col].min() == station_frame[col].min()
+
+
+def test_narrow_window_is_raw(gappy_frame):
+    start, end = '2022-02-01 10:00', '2022-02-01 14:00'
+    expected = gappy_frame.loc[start:end, COLUMNS]
+    pd.testing.assert_frame_equal(decimate_frame(gappy_frame, COLUMNS, 2000, start=start, end=end), expected)
+    time_index = TimeIndex.from_index(gappy_frame.index)
+    pd.testing.assert_frame_equal(
+        decimate_frame(gappy_frame, COLUMNS, 2000, start=start, end=end, time_index=time_index), expected)
+
+
+def test_minmax_indices_match_bucket_extremes():
+    y = np.random.default_rng(0).normal(size=1000)
+    idx = minmax_indices(y, 10)
+    for bucket in np.split(np.arange(1000), 10):
+        assert bucket[y[bucket].argmax()] in idx and bucket[y[bucket].argmin()] in idx
+
+
+def test_lttb_skips_nan_and_keeps_ends():
+    y = np.sin(np.linspace(0, 20, 5000))
+    y[::7] = np.nan
+    idx = lttb_indices(np.arange(len(y)), y, 300)
+    assert len(idx) == 300 and not np.isnan(y[idx]).any()
+    assert idx[0] == 1 and idx[-1] == len(y) - 1
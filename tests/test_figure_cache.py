@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.figure_cache import FigureCache
+
+
+def test_images_round_trip_through_disk(tmp_path):
+    key = FigureCache.make_key('benin', 'histograms', fingerprint='abc')
+    FigureCache(tmp_path).put_images(key, [b'first', b'second'])
+    # A new instance (another session or process) reads them from disk.
+    assert FigureCache(tmp_path).get_images(key) == [b'first', b'second']
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f'{key}-0.png', f'{key}-1.png', f'{key}.json']
+
+
+def test_missing_entry_is_a_miss(tmp_path):
+    cache = FigureCache(tmp_path)
+    assert cache.get_images('unknown') is None
+    cache.put_images('key', [b'a', b'b'])
+    (tmp_path / 'key-1.png').unlink()
+    assert FigureCache(tmp_path).get_images('key') is None
+
+
+def test_concurrent_writers_of_one_key(tmp_path):
+    caches = [FigureCache(tmp_path) for _ in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda cache: [cache.put('key', b'x' * 100_000) for _ in range(20)], caches))
+    assert FigureCache(tmp_path).get('key') == b'x' * 100_000
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_disk_eviction_drops_manifests(tmp_path):
+    cache = FigureCache(tmp_path, max_disk_bytes=250)
+    for i in range(5):
+        cache.put_images(f'key{i}', [bytes(100)])
+    assert len(list(tmp_path.glob('*.png'))) == 2
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert FigureCache(tmp_path).get_images('key0') is None
+    assert FigureCache(tmp_path).get_images('key4') == [bytes(100)]
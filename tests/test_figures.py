@@ -0,0 +1,30 @@
+import numpy as np
+
+from scripts.figure_cache import figure_to_bytes
+from scripts.figures import FigureTemplate, histogram_stairs
+
+
+def _titles(fig, axes):
+    for i, ax in enumerate(axes.flat):
+        ax.set_title(f'panel {i}')
+
+
+def test_template_figures_are_reused_after_release():
+    template = FigureTemplate(2, 2, figsize=(6, 4), layout='constrained', setup=_titles)
+    fig, axes = template.acquire()
+    assert fig.get_layout_engine() is not None
+    for ax in axes.flat:
+        histogram_stairs(ax, np.arange(100.0), bins=10)
+    assert figure_to_bytes(fig).startswith(b'\x89PNG')
+
+    again, axes = template.acquire()
+    assert again is fig
+    assert all(not ax.patches and not ax.lines for ax in axes.flat)
+    assert [ax.get_title() for ax in axes.flat] == [f'panel {i}' for i in range(4)]
+
+
+def test_acquired_figures_are_distinct_until_released():
+    template = FigureTemplate(1, 1)
+    first, _ = template.acquire()
+    second, _ = template.acquire()
+    assert first is not second
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.ranking import daily_site_table, rank_station_files, rank_stations, site_metrics
+from scripts.station_store import load_station
+from scripts.synthetic import write_station_csv
+
+
+def test_daily_insolation_matches_resample(station_frame, gappy_frame):
+    daily = daily_site_table({'full': station_frame, 'gappy': gappy_frame})
+    for name, df in [('full', station_frame), ('gappy', gappy_frame)]:
+        for col in ['GHI', 'DNI', 'DHI']:
+            expected = df[col].astype(np.float64).clip(lower=0).resample('D').mean() * 24 / 1000
+            np.testing.assert_allclose(daily.loc[name, col.lower()], expected, rtol=1e-9)
+    # Coverage is the fraction of a day's minutes with a GHI reading.
+    coverage = station_frame['GHI'].resample('D').count() / 1440
+    np.testing.assert_allclose(daily.loc['full', 'coverage'], coverage, rtol=1e-12)
+
+
+def test_empty_input_gives_empty_metrics():
+    daily = daily_site_table({})
+    assert daily.index.names == ['Station', 'Day']
+    metrics = site_metrics(daily)
+    assert metrics.empty and metrics.index.name == 'Station'
+    assert list(metrics.columns) == list(site_metrics(daily_site_table({'a': pd.DataFrame(
+        {'GHI': [500.0]}, index=pd.DatetimeIndex(['2022-01-01 12:00']))})).columns)
+
+
+def test_rank_station_files_matches_rank_stations(tmp_path):
+    pytest.importorskip('pyarrow')
+    paths = {name: write_station_csv(tmp_path / f'{name}.csv', 4 * 1440, seed=seed)
+             for seed, name in enumerate(['benin', 'togo', 'sierraleone'])}
+    cache_dir = tmp_path / 'cache'
+    frames = {name: load_station(path, cache_dir=cache_dir) for name, path in paths.items()}
+    expected = rank_stations(frames)
+    pd.testing.assert_frame_equal(rank_station_files(paths, cache_dir=cache_dir), expected)
+    # Served from the cached daily tables the second time.
+    assert len(list(cache_dir.glob('*.site_days.parquet'))) == 3
+    assert not list(cache_dir.glob('*.tmp'))
+    pd.testing.assert_frame_equal(rank_station_files(paths, cache_dir=cache_dir), expected)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.rolling import rolling, rolling_statistics
+
+COLUMNS = ['GHI', 'DNI', 'Tamb']
+STATS = ['count', 'sum', 'mean', 'std', 'var', 'min', 'max']
+
+
+def _expected(df, window, stat, min_periods=None):
+    return df[COLUMNS].astype(np.float64).rolling(window, min_periods=min_periods).agg(stat)
+
+
+@pytest.mark.parametrize('stat', STATS)
+@pytest.mark.parametrize('window', [1, 7, 60, '15min', '1h', '1D'])
+def test_rolling_matches_pandas(station_frame, window, stat):
+    result = rolling(station_frame, window, stat, COLUMNS)
+    pd.testing.assert_frame_equal(result, _expected(station_frame, window, stat), check_exact=False, rtol=1e-7,
+                                  atol=1e-6)
+
+
+@pytest.mark.parametrize('stat', STATS)
+@pytest.mark.parametrize('window', ['15min', '1h'])
+def test_rolling_with_gaps_matches_pandas(gappy_frame, window, stat):
+    result = rolling(gappy_frame, window, stat, COLUMNS)
+    pd.testing.assert_frame_equal(result, _expected(gappy_frame, window, stat), check_exact=False, rtol=1e-7,
+                                  atol=1e-6)
+
+
+def test_rolling_min_periods(station_frame):
+    result = rolling(station_frame, 30, 'mean', COLUMNS, min_periods=5)
+    pd.testing.assert_frame_equal(result, _expected(station_frame, 30, 'mean', min_periods=5), check_exact=False,
+                                  rtol=1e-7, atol=1e-6)
+
+
+def test_rolling_quantile_matches_pandas(station_frame):
+    result = rolling(station_frame, '1h', 0.5, COLUMNS)
+    expected = station_frame[COLUMNS].astype(np.float64).rolling('1h').quantile(0.5)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-7, atol=1e-6)
+
+
+def test_rolling_statistics_labels(station_frame):
+    result = rolling_statistics(station_frame, '1h', COLUMNS, ['mean', 'max'])
+    assert list(result.columns) == [(col, stat) for col in COLUMNS for stat in ['mean', 'max']]
+    assert result.index.equals(station_frame.index)
+
+
+def test_rolling_repeated_timestamps_fall_back_to_pandas(station_frame):
+    repeated = station_frame.iloc[np.sort(np.append(np.arange(len(station_frame)), [10, 500, 501]))]
+    result = rolling(repeated, '1h', 'mean', COLUMNS)
+    pd.testing.assert_frame_equal(result, _expected(repeated, '1h', 'mean'), check_exact=False, rtol=1e-7,
+                                  atol=1e-6)
+
+
+def test_rolling_rejects_unknown_statistic(station_frame):
+    with pytest.raises(ValueError):
+        rolling_statistics(station_frame, 10, COLUMNS, ['median'])
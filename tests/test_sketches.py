@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.eda_helpers import calculate_zscores, clean_data
+from scripts.sketch_store import SketchStore, load_station_sketches
+from scripts.sketches import MomentSketch, QuantileSketch, combine_moments
+
+QUANTILES = [0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0]
+
+
+def _chunks(values, n_chunks):
+    return np.array_split(values, n_chunks)
+
+
+def _rank(values, x):
+    # Fraction of the values at or below x.
+    return np.searchsorted(np.sort(values), x, side='right') / len(values)
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    return np.concatenate([rng.normal(400, 120, 30_000), rng.exponential(50, 10_000)])
+
+
+def test_quantile_sketch_is_exact_without_compaction(values):
+    sample = values[:500]
+    sketch = QuantileSketch(k=1024)
+    sketch.update(sample)
+    assert sketch.rank_error == 0.0
+    np.testing.assert_array_equal(sketch.quantile(QUANTILES), np.quantile(sample, QUANTILES, method='lower'))
+
+
+def test_quantile_sketch_merge_within_rank_error(values):
+    merged = QuantileSketch(k=256, seed=1)
+    for i, chunk in enumerate(_chunks(values, 13)):
+        part = QuantileSketch(k=256, seed=i)
+        part.update(chunk)
+        merged.merge(part)
+    assert merged.count == len(values)
+    assert 0 < merged.rank_error < 0.05
+    estimates = merged.quantile(QUANTILES)
+    for q, estimate in zip(QUANTILES, estimates):
+        assert abs(_rank(values, estimate) - q) <= merged.rank_error + 1 / len(values)
+
+
+def test_quantile_sketch_ignores_nan(values):
+    sketch = QuantileSketch()
+    sketch.update(np.append(values[:100], [np.nan] * 10))
+    assert sketch.count == 100
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_moment_sketch_merge_matches_exact_moments(values):
+    data = np.column_stack([values, values * 1e-3 + 1e6, np.where(np.arange(len(values)) % 7, values, np.nan)])
+    merged = MomentSketch(data.shape[1])
+    for chunk in _chunks(data, 9):
+        part = MomentSketch(data.shape[1])
+        part.update(chunk)
+        merged.merge(part)
+    np.testing.assert_array_equal(merged.count, np.sum(~np.isnan(data), axis=0))
+    np.testing.assert_allclose(merged.mean, np.nanmean(data, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(merged.std, np.nanstd(data, axis=0, ddof=1), rtol=1e-8)
+    np.testing.assert_array_equal(merged.min, np.nanmin(data, axis=0))
+    np.testing.assert_array_equal(merged.max, np.nanmax(data, axis=0))
+
+
+def test_moment_sketch_merge_with_empty_sketch(values):
+    sketch = MomentSketch(1)
+    sketch.update(values[:, np.newaxis])
+    sketch.merge(MomentSketch(1))
+    np.testing.assert_allclose(sketch.mean, [values.mean()], rtol=1e-12)
+    np.testing.assert_allclose(sketch.var, [values.var(ddof=1)], rtol=1e-9)
+
+
+def test_combine_moments_matches_pooled_data(values):
+    parts = _chunks(values, 5)
+    count = np.array([len(p) for p in parts], dtype=np.float64)
+    mean = np.array([p.mean() for p in parts])
+    m2 = np.array([((p - p.mean()) ** 2).sum() for p in parts])
+    total, combined, pooled_m2 = combine_moments(count, mean, m2)
+    assert total == len(values)
+    np.testing.assert_allclose(combined, values.mean(), rtol=1e-12)
+    np.testing.assert_allclose(pooled_m2 / (total - 1), values.var(ddof=1), rtol=1e-9)
+
+
+def test_sketch_store_matches_station_frame(station_frame):
+    columns = ['GHI', 'Tamb', 'WS']
+    store = SketchStore.from_frame(station_frame, columns)
+    start, end = '2022-01-31', '2022-02-02'
+    window = station_frame.loc[start:f'{end} 23:59', columns].astype(np.float64)
+
+    stats = store.stats(columns, start, end)
+    np.testing.assert_array_equal(stats['count'], window.count())
+    np.testing.assert_allclose(stats['mean'], window.mean(), rtol=1e-9)
+    np.testing.assert_allclose(stats['std'], window.std(), rtol=1e-9)
+
+    bounds = store.bounds(columns, start, end)
+    for col in columns:
+        values = window[col].dropna().to_numpy()
+        for q, name in [(0.25, 'q1'), (0.75, 'q3')]:
+            assert abs(_rank(values, bounds.loc[col, name]) - q) <= bounds.loc[col, 'rank_error'] + 1 / len(values)
+
+
+def test_station_sketches_cache_is_written_atomically(station_csv, monkeypatch):
+    pytest.importorskip('pyarrow')
+    path, cache_dir = station_csv
+    store = load_station_sketches(path, ['GHI', 'WS'], cache_dir)
+
+    # A crash between the two writes leaves the items but no moments file,
+    # so the next load rebuilds instead of trusting a partial cache.
+    to_parquet = pd.DataFrame.to_parquet
+
+    def crash_on_moments(self, target, *args, **kwargs):
+        if '-items' not in str(target):
+            raise KeyboardInterrupt
+        return to_parquet(self, target, *args, **kwargs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pd.DataFrame, 'to_parquet', crash_on_moments)
+        with pytest.raises(KeyboardInterrupt):
+            load_station_sketches(path, ['GHI', 'DNI'], cache_dir)
+    assert not list(cache_dir.glob('*.tmp'))
+    written = [p.name for p in cache_dir.glob('*sketches-GHI-DNI*')]
+    assert len(written) == 1 and '-items' in written[0]
+    rebuilt = load_station_sketches(path, ['GHI', 'DNI'], cache_dir)
+    assert set(rebuilt.moments['column']) == {'GHI', 'DNI'}
+
+    cached = load_station_sketches(path, ['GHI', 'WS'], cache_dir)
+    pd.testing.assert_frame_equal(cached.moments, store.moments)
+    pd.testing.assert_frame_equal(cached.items, store.items)
+
+
+def _subsets(df):
+    return {
+        'daytime': df.between_time('07:00', '17:00'),
+        'predicate': df[df['WS'] <= 2.0],
+        'mid_day': df.loc['2022-02-01 12:00':'2022-02-02 12:00'],
+    }
+
+
+@pytest.mark.parametrize('subset', ['daytime', 'predicate', 'mid_day'])
+def test_filtered_frames_do_not_use_the_sketches(station_frame, subset):
+    store = SketchStore.from_frame(station_frame, ['GHI', 'WS'])
+    df = _subsets(station_frame)[subset]
+    pd.testing.assert_frame_equal(clean_data(df, sketches=store), clean_data(df))
+    pd.testing.assert_frame_equal(calculate_zscores(df, ['GHI', 'WS'], sketches=store),
+                                  calculate_zscores(df, ['GHI', 'WS']))
+
+
+def test_whole_days_use_the_sketches(station_frame, monkeypatch):
+    store = SketchStore.from_frame(station_frame, ['GHI', 'WS'])
+    calls = []
+    bounds = SketchStore.bounds
+    monkeypatch.setattr(SketchStore, 'bounds', lambda self, *args, **kwargs: calls.append(args) or
+                        bounds(self, *args, **kwargs))
+    days = station_frame.loc['2022-01-31':'2022-02-02']
+    cleaned = clean_data(days, sketches=store)
+    assert calls == [(['GHI', 'WS'], days.index.min(), days.index.max())]
+    # Within the sketches' rank error of the exact result.
+    assert abs(len(cleaned) - len(clean_data(days))) <= 0.01 * len(days)
+    pd.testing.assert_frame_equal(calculate_zscores(days, ['GHI', 'WS'], sketches=store),
+                                  calculate_zscores(days, ['GHI', 'WS']), rtol=1e-5)
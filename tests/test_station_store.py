@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import station_store
+from scripts.station_store import build_station_cache, cache_path, load_station, query_station
+from scripts.synthetic import make_station_frame
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def small_row_groups(monkeypatch):
+    # Many row groups, so that pruning by time and by statistics is exercised.
+    monkeypatch.setattr(station_store, 'ROW_GROUP_SIZE', 500)
+
+
+def _expected(df, start=None, end=None, filters=()):
+    df = df.sort_index(kind='stable').loc[start:end] if start is not None or end is not None else df
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        mask &= station_store.PREDICATE_OPERATORS[op](df[col], value).to_numpy()
+    return df[mask]
+
+
+QUERIES = [
+    dict(),
+    dict(start='2021-08-10 06:00', end='2021-08-10 18:00'),
+    dict(start='2021-08-11 23:59:30'),
+    dict(end='2021-08-09 00:30'),
+    dict(start='2021-08-12 00:00', end='2021-08-11 00:00'),
+    dict(start='2030-01-01'),
+    dict(filters=[('WS', '<=', 2.0)]),
+    dict(filters=[('Cleaning', '==', 1)]),
+    dict(filters=[('GHI', '>', 500.0), ('Tamb', '<', 30.0)]),
+    dict(start='2021-08-10', end='2021-08-12 12:00', filters=[('WS', '>=', 3.0), ('RH', '!=', 50.0)]),
+]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_query_matches_load_and_mask(station_csv, small_row_groups, query):
+    path, cache_dir = station_csv
+    df = load_station(path, cache_dir=cache_dir)
+    result = query_station(path, columns=['GHI', 'WS'], cache_dir=cache_dir, **query)
+    pd.testing.assert_frame_equal(result, _expected(df, **query)[['GHI', 'WS']])
+
+
+def test_query_all_columns(station_csv, small_row_groups):
+    path, cache_dir = station_csv
+    df = load_station(path, cache_dir=cache_dir)
+    result = query_station(path, start='2021-08-10', end='2021-08-10 03:00', cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(result, df.loc['2021-08-10':'2021-08-10 03:00'])
+
+
+def test_query_rejects_unknown_operator(station_csv):
+    path, cache_dir = station_csv
+    with pytest.raises(ValueError):
+        query_station(path, filters=[('WS', '~', 1.0)], cache_dir=cache_dir)
+
+
+def _write_frame(df, path):
+    df.to_csv(path, index=False, float_format='%.1f')
+    return path
+
+
+@pytest.mark.parametrize('order', ['repeated', 'shuffled'])
+def test_query_with_irregular_timestamps(tmp_path, small_row_groups, order):
+    df = make_station_frame(3000)
+    rows = np.arange(len(df))
+    if order == 'repeated':
+        rows = np.sort(np.append(rows, [5, 5, 999, 1000, 2999]))
+    else:
+        rows[1200:1300] = rows[1200:1300][::-1]
+    path = _write_frame(df.iloc[rows], tmp_path / 'station.csv')
+    cache_dir = tmp_path / 'cache'
+    loaded = load_station(path, cache_dir=cache_dir)
+    for start, end in [('2021-08-09 00:05', '2021-08-09 00:10'), ('2021-08-09 16:00', '2021-08-09 22:00'),
+                       (None, '2021-08-09 01:00'), ('2021-08-10 01:00', None)]:
+        result = query_station(path, columns=['GHI'], start=start, end=end, cache_dir=cache_dir,
+                               filters=[('WS', '>', 1.0)])
+        pd.testing.assert_frame_equal(result, _expected(loaded, start, end, [('WS', '>', 1.0)])[['GHI']])
+
+
+def test_cache_rebuild_keeps_other_stations(tmp_path):
+    df = make_station_frame(200)
+    benin = _write_frame(df, tmp_path / 'benin.csv')
+    benin_2 = _write_frame(df, tmp_path / 'benin-2.csv')
+    cache_dir = tmp_path / 'cache'
+    other = build_station_cache(benin_2, cache_dir)
+    old = build_station_cache(benin, cache_dir)
+
+    _write_frame(df.iloc[:100], benin)
+    new = build_station_cache(benin, cache_dir)
+    assert new == cache_path(benin, cache_dir)
+    assert new.exists() and other.exists()
+    assert not old.exists()
+    assert not list(cache_dir.glob('*.tmp'))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from scripts.synthetic import STATION_COLUMNS, make_station_frame, write_station_csv
+
+
+def test_station_frame_layout():
+    df = make_station_frame(3000, missing_fraction=0.01)
+    assert list(df.columns) == ['Timestamp'] + STATION_COLUMNS
+    timestamps = pd.to_datetime(df['Timestamp'], format='%Y-%m-%d %H:%M')
+    assert (timestamps.diff().dropna() == pd.Timedelta('1min')).all()
+    assert df[['GHI', 'DNI', 'DHI']].isnull().any().all()
+    # Module readings follow GHI, gaps included; everything else is complete.
+    assert df.drop(columns=['GHI', 'DNI', 'DHI', 'ModA', 'ModB']).notnull().all().all()
+
+
+def test_station_frame_is_reproducible():
+    pd.testing.assert_frame_equal(make_station_frame(500, seed=3), make_station_frame(500, seed=3))
+    assert not make_station_frame(500, seed=3).equals(make_station_frame(500, seed=4))
+
+
+def test_night_irradiance_is_noise(station_frame):
+    night = station_frame.between_time('20:00', '04:00')
+    day = station_frame.between_time('11:00', '13:00')
+    assert night['GHI'].abs().mean() < 30
+    assert day['GHI'].mean() > 800
+
+
+def test_station_csv_round_trip(tmp_path):
+    path = write_station_csv(tmp_path / 'station.csv', 500)
+    df = pd.read_csv(path)
+    expected = make_station_frame(500)
+    assert list(df.columns) == list(expected.columns)
+    np.testing.assert_allclose(df['GHI'], expected['GHI'], atol=0.051)
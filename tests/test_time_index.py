@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.time_index import TimeIndex
+
+
+def _random_windows(index, count, seed):
+    rng = np.random.default_rng(seed)
+    lo, hi = index[0] - pd.Timedelta('2h'), index[-1] + pd.Timedelta('2h')
+    span = int((hi - lo) / pd.Timedelta('1s'))
+    for _ in range(count):
+        a, b = np.sort(rng.integers(0, span, 2))
+        yield lo + pd.Timedelta(seconds=int(a)), lo + pd.Timedelta(seconds=int(b))
+
+
+def _assert_slices_match(df, seed):
+    time_index = TimeIndex.from_index(df.index)
+    for start, end in _random_windows(df.index, 200, seed):
+        pd.testing.assert_frame_equal(df.iloc[time_index.slice(start, end)], df.loc[start:end])
+    pd.testing.assert_frame_equal(df.iloc[time_index.slice(None, df.index[100])], df.loc[:df.index[100]])
+    pd.testing.assert_frame_equal(df.iloc[time_index.slice(df.index[-100], None)], df.loc[df.index[-100]:])
+
+
+def test_slice_matches_loc(station_frame):
+    assert TimeIndex.from_index(station_frame.index).is_regular
+    _assert_slices_match(station_frame, seed=0)
+
+
+def test_slice_matches_loc_with_gaps(gappy_frame):
+    _assert_slices_match(gappy_frame, seed=1)
+
+
+def test_slice_matches_loc_with_repeated_timestamps(station_frame):
+    repeats = np.sort(np.append(np.arange(len(station_frame)), [0, 10, 10, 500, 501, len(station_frame) - 1]))
+    _assert_slices_match(station_frame.iloc[repeats], seed=2)
+
+
+def test_exact_bounds_are_inclusive(gappy_frame):
+    time_index = TimeIndex.from_index(gappy_frame.index)
+    start, end = gappy_frame.index[2990], gappy_frame.index[3010]
+    assert time_index.slice(start, end) == slice(2990, 3011)
+
+
+def test_to_index_round_trip(gappy_frame):
+    time_index = TimeIndex.from_index(gappy_frame.index)
+    assert time_index.to_index().equals(gappy_frame.index.as_unit('ns'))
+    restored = TimeIndex.from_frame(time_index.to_frame())
+    assert restored.to_index().equals(gappy_frame.index.as_unit('ns'))
+
+
+def test_gaps(gappy_frame, station_frame):
+    gaps = TimeIndex.from_index(gappy_frame.index).gaps()
+    expected = gappy_frame.index.to_series().diff().dropna()
+    expected = expected[expected > pd.Timedelta('1min')]
+    assert len(gaps) == len(expected)
+    assert gaps['missing'].sum() == len(station_frame) - len(gappy_frame)
+
+
+def test_out_of_order_timestamps_are_rejected(station_frame):
+    with pytest.raises(ValueError):
+        TimeIndex.from_index(station_frame.index[::-1])
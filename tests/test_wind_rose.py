@@ -0,0 +1,49 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.wind_rose import DEFAULT_SPEED_BINS, load_station_wind_rose, wind_rose_table
+
+
+def _expected(df, sectors=16, speed_bins=DEFAULT_SPEED_BINS):
+    # The same table from pd.cut and a crosstab.
+    width = 360.0 / sectors
+    valid = df[['WS', 'WD']].notnull().all(axis=1) & (df['WS'] >= speed_bins[0])
+    df = df[valid].astype(np.float64)
+    sector = pd.cut((df['WD'] + width / 2) % 360.0, np.arange(sectors + 1) * width, right=False, labels=False)
+    speed = pd.cut(df['WS'], list(speed_bins), right=False, labels=False)
+    counts = pd.crosstab(sector, speed).reindex(index=range(sectors), columns=range(len(speed_bins) - 1),
+                                                fill_value=0)
+    return counts.to_numpy()
+
+
+@pytest.fixture
+def wind_frame(station_frame):
+    df = station_frame[['WS', 'WD']].copy()
+    df.iloc[::37, 0] = np.nan
+    df.iloc[::41, 1] = np.nan
+    return df
+
+
+def test_table_matches_crosstab(wind_frame):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        table = wind_rose_table(wind_frame)
+    np.testing.assert_array_equal(table.to_numpy(), _expected(wind_frame))
+    assert table.to_numpy().sum() == wind_frame.notnull().all(axis=1).sum()
+
+
+def test_monthly_tables_add_up(wind_frame):
+    monthly = wind_rose_table(wind_frame, sectors=8, freq='M')
+    np.testing.assert_array_equal(monthly.groupby(level='Sector').sum().to_numpy(),
+                                  wind_rose_table(wind_frame, sectors=8).to_numpy())
+
+
+def test_station_wind_rose_is_cached(station_csv):
+    pytest.importorskip('pyarrow')
+    path, cache_dir = station_csv
+    table = load_station_wind_rose(path, cache_dir=cache_dir)
+    assert not list(cache_dir.glob('*.tmp'))
+    pd.testing.assert_frame_equal(load_station_wind_rose(path, cache_dir=cache_dir), table)